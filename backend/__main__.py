@@ -0,0 +1,61 @@
+"""
+Production entry point.
+
+    python -m backend serve --workers 4 --port 8000
+
+Runs uvicorn with several worker processes and reload disabled. All
+persistent state lives in shared backends: complaints in the SQLite
+file (written through immediately, so any worker can read them back),
+user profiles in their own SQLite file, documents in the artifact
+directory and AQI history under the history directory. Response caches
+and live streams stay per worker; alert matching runs in whichever
+worker holds the alert lease. On SIGTERM
+or SIGINT each worker stops accepting connections, waits up to
+--graceful-timeout seconds for in-flight requests and then runs the
+shutdown hooks that flush the stores.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def serve(args):
+    import uvicorn
+
+    if args.workers > 1:
+        if os.environ.get("AQI_COMPLAINT_STORE", "sqlite") == "memory":
+            sys.exit("AQI_COMPLAINT_STORE=memory cannot be shared between workers, use sqlite")
+        os.environ.setdefault("AQI_COMPLAINT_BATCH_SIZE", "1")
+
+    uvicorn.run(
+        "main:app",
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency,
+        proxy_headers=True,
+        log_level=args.log_level
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend", description="Air Justice API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the API with multiple worker processes")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    serve_parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds to drain in-flight requests on shutdown")
+    serve_parser.add_argument("--limit-concurrency", type=int, default=None, help="Per-worker connection limit before answering 503")
+    serve_parser.add_argument("--log-level", default="info")
+    serve_parser.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
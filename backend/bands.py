@@ -0,0 +1,156 @@
+"""
+Breakpoint tables shared by every endpoint.
+
+Each BandTable maps a value to one of a fixed set of bands through
+sorted inclusive upper bounds, with a bisect fast path for scalars and
+np.searchsorted for arrays. Band payloads are built once at import as
+read-only fragments and returned as-is, so responses share them instead
+of allocating fresh dicts and lists per call. Changing a breakpoint
+(e.g. moving to NAQI bands) only touches this module.
+"""
+from bisect import bisect_left
+
+import numpy as np
+
+class FrozenDict(dict):
+    """
+    dict that refuses mutation, so shared fragments stay intact while
+    still serializing like any other dict
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("band fragments are read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(tuple):
+    """
+    tuple marking a shared constant list, so the JSON layer can encode it
+    once (see responses.py)
+    """
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+class BandTable:
+    """
+    bounds are inclusive upper bounds of every band but the last, which
+    is open-ended; value <= bounds[i] falls in band i
+    """
+
+    def __init__(self, bounds, bands):
+        if len(bands) != len(bounds) + 1:
+            raise ValueError("need exactly one more band than bounds")
+        if list(bounds) != sorted(bounds):
+            raise ValueError("bounds must be sorted")
+        self.bounds = tuple(bounds)
+        self.bands = freeze(bands)
+        self._bounds_array = np.array(self.bounds, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.bands)
+
+    def index(self, value: float):
+        return bisect_left(self.bounds, value)
+
+    def lookup(self, value: float):
+        return self.bands[bisect_left(self.bounds, value)]
+
+    def indexes(self, values):
+        """
+        Band index for every value in an array
+        """
+        return np.searchsorted(self._bounds_array, values, side="left")
+
+    def column(self, key: str):
+        """
+        One field of every band, e.g. the category names
+        """
+        return freeze([band[key] for band in self.bands])
+
+# Upper bounds of the AQI bands used across the API
+AQI_BREAKPOINTS = (50, 100, 150, 200, 300)
+
+AQI_CATEGORIES = BandTable(AQI_BREAKPOINTS, [
+    {"name": "Good", "color": "#10B981", "health_implications": "Minimal impact"},
+    {"name": "Moderate", "color": "#FBBF24", "health_implications": "Minor discomfort for sensitive people"},
+    {"name": "Unhealthy for Sensitive", "color": "#F97316", "health_implications": "Increased health effects for sensitive groups"},
+    {"name": "Unhealthy", "color": "#EF4444", "health_implications": "Everyone may experience health effects"},
+    {"name": "Very Unhealthy", "color": "#8B5CF6", "health_implications": "Health alert: everyone may experience more serious health effects"},
+    {"name": "Hazardous", "color": "#7C2D12", "health_implications": "Health emergency: entire population affected"}
+])
+AQI_CATEGORY_NAMES = AQI_CATEGORIES.column("name")
+AQI_CATEGORY_COLORS = AQI_CATEGORIES.column("color")
+
+HEALTH_RISKS = BandTable(AQI_BREAKPOINTS, [
+    {"risk": "LOW", "advice": ["No restrictions needed", "Ideal for outdoor activities"]},
+    {"risk": "MODERATE", "advice": ["Sensitive groups take precautions", "Limit prolonged exertion"]},
+    {"risk": "HIGH for sensitive groups", "advice": ["Sensitive groups avoid outdoor activities", "Keep medications handy"]},
+    {"risk": "HIGH for everyone", "advice": ["Everyone reduce outdoor activities", "Use air purifiers", "Wear masks"]},
+    {"risk": "VERY HIGH", "advice": ["Avoid all outdoor activities", "Stay indoors", "Use N95 masks"]},
+    {"risk": "SEVERE", "advice": ["Health emergency", "Stay indoors with purifiers", "Consider relocation"]}
+])
+
+MEDICAL_ESCALATION = BandTable((200,), [
+    [],
+    [
+        "CONSULT DOCTOR IF: Experiencing breathing difficulty, chest pain, or dizziness",
+        "EMERGENCY: Call ambulance if severe respiratory distress"
+    ]
+])
+
+PREDICTION_ALERTS = BandTable((150, 200, 300), [
+    {
+        "alert": "CONDITIONS MANAGEABLE",
+        "actions": ["Normal activities with precautions", "Stay hydrated", "Monitor AQI changes", "Support clean air initiatives"]
+    },
+    {
+        "alert": "UNHEALTHY CONDITIONS PREDICTED",
+        "actions": ["Sensitive groups stay indoors", "Use air purifiers", "Keep windows closed during peak hours", "Monitor health symptoms"]
+    },
+    {
+        "alert": "LEGAL VIOLATIONS PREDICTED",
+        "actions": [
+            "Plan indoor activities during peak hours",
+            "Use N95 masks if going outside",
+            "File preventive complaint with authorities",
+            "Alert community members"
+        ]
+    },
+    {
+        "alert": "HEALTH EMERGENCY PREDICTED",
+        "actions": [
+            "Avoid all outdoor activities during peak hours",
+            "Use highest grade air purifiers",
+            "Consider temporary relocation if possible",
+            "Keep emergency medications ready"
+        ]
+    }
+])
+
+# Excess over a legal threshold
+SEVERE_EXCESS = 100
+VIOLATION_SEVERITY = BandTable((20, 50, SEVERE_EXCESS), ["LOW", "MEDIUM", "HIGH", "SEVERE"])
+
+# Measured value when a violation is found
+ACTION_URGENCY = BandTable((200, 300), ["WITHIN_48_HOURS", "URGENT", "IMMEDIATE"])
+
+# Indian NAQI bands (CPCB); sub-indices come from naqi.py
+NAQI_BREAKPOINTS = (50, 100, 200, 300, 400)
+
+NAQI_CATEGORIES = BandTable(NAQI_BREAKPOINTS, [
+    {"name": "Good", "color": "#00B050", "health_implications": "Minimal impact"},
+    {"name": "Satisfactory", "color": "#92D050", "health_implications": "Minor breathing discomfort to sensitive people"},
+    {"name": "Moderate", "color": "#FFFF00", "health_implications": "Breathing discomfort to people with lung disease, asthma and heart disease"},
+    {"name": "Poor", "color": "#FF9900", "health_implications": "Breathing discomfort to most people on prolonged exposure"},
+    {"name": "Very Poor", "color": "#FF0000", "health_implications": "Respiratory illness on prolonged exposure"},
+    {"name": "Severe", "color": "#C00000", "health_implications": "Affects healthy people and seriously impacts those with existing diseases"}
+])
@@ -0,0 +1,120 @@
+"""
+Time alert matching over the (cell, band) subscription index against a
+scan of every subscriber.
+
+Usage: python benchmarks/bench_alerts.py [--subscribers 1000000] [--ticks 5] [--step 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bands import AQI_CATEGORIES
+from subscriptions import SubscriptionIndex
+
+CITIES = 200
+CITY_SPREAD_DEG = 0.15
+
+def subscribers(rng, n: int):
+    """
+    Users clustered around random city centres, thresholds spread over
+    the alerting bands
+    """
+    centres = np.column_stack([rng.uniform(8, 34, CITIES), rng.uniform(70, 95, CITIES)])
+    home = centres[rng.integers(0, CITIES, n)] + rng.normal(0, CITY_SPREAD_DEG, (n, 2))
+    thresholds = rng.choice(np.array(AQI_CATEGORIES.bounds[:-1]) + 1, n)
+    for i in range(n):
+        yield {"id": f"user-{i}", "lat": float(home[i, 0]), "lon": float(home[i, 1]), "threshold": float(thresholds[i])}
+
+class DriftingAQI:
+    """
+    Per-cell AQI that drifts between ticks, so some cells cross bands
+    """
+
+    def __init__(self, rng, step: float):
+        self.rng = rng
+        self.step = step
+        self.values = None
+
+    def __call__(self, lats, lons):
+        if self.values is None or len(self.values) != len(lats):
+            self.values = self.rng.uniform(20, 250, len(lats))
+        else:
+            self.values = np.clip(self.values + self.rng.normal(0, self.step, len(lats)), 0, 500)
+        return self.values
+
+def scan(profiles: dict, cells, previous, current, cell_size: float):
+    """
+    Baseline: test every subscriber against its cell's band change
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+    alerts = []
+    for record in profiles.values():
+        i = position[(int(record["lat"] // cell_size), int(record["lon"] // cell_size))]
+        band = AQI_CATEGORIES.index(record["threshold"])
+        if previous[i] < band <= current[i]:
+            alerts.append(record["id"])
+    return alerts
+
+def run(n: int, ticks: int, step: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    index = SubscriptionIndex({}, DriftingAQI(rng, step))
+
+    start = time.perf_counter()
+    index.add_many(subscribers(rng, n))
+    register_seconds = time.perf_counter() - start
+
+    index.evaluate()  # first tick records each cell's band
+    results = []
+    for _ in range(ticks):
+        previous = index._last_bands.copy()
+        start = time.perf_counter()
+        alerts = index.evaluate()
+        tick_seconds = time.perf_counter() - start
+        results.append({
+            "alerts": sum(len(users) for users, _, _ in alerts),
+            "probes_hit": len(alerts),
+            "tick_seconds": tick_seconds,
+            "match_ms": index.last_match_ms
+        })
+
+    start = time.perf_counter()
+    scanned = scan(index.profiles, index._cells, previous, index._last_bands, index.cell_size)
+    scan_seconds = time.perf_counter() - start
+
+    return {
+        "subscribers": n,
+        "cells": len(index.cell_users),
+        "index_keys": len(index.index),
+        "register_seconds": register_seconds,
+        "scan_ms": scan_seconds * 1000,
+        "scan_matches_last_tick": len(scanned) == results[-1]["alerts"],
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000000)
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--step", type=float, default=5.0, help="Standard deviation of the per-tick AQI change")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.subscribers, args.ticks, args.step)
+    print(f"subscribers={report['subscribers']} cells={report['cells']} keys={report['index_keys']} register={report['register_seconds']:.1f}s")
+    print(f"{'alerts':>8} {'probes':>8} {'tick ms':>9} {'match ms':>9}")
+    for row in report["results"]:
+        print(f"{row['alerts']:>8} {row['probes_hit']:>8} {row['tick_seconds'] * 1000:>9.1f} {row['match_ms']:>9.2f}")
+    print(f"full scan of the last tick: {report['scan_ms']:.0f} ms (same alerts: {report['scan_matches_last_tick']})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Source attribution query latency against a large synthetic emitter catalogue.
+
+Emitters are clustered around a few metro areas so radius queries hit
+dense neighbourhoods, as they do in the real catalogue.
+
+Usage: python benchmarks/bench_attribution.py [--emitters 100000] [--radius 5] [--output results.json]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import latency_stats, write_report
+
+from attribution import EmitterCatalogue, KIND_TYPES
+
+METROS = [(28.61, 77.21), (19.08, 72.88), (22.57, 88.36), (13.08, 80.27), (12.97, 77.59)]
+METRO_SPREAD_DEG = 0.25
+QUERIES = 1000
+BULK_SIZES = [1000, 10000]
+
+def synthetic_emitters(rng, n: int):
+    centres = np.array(METROS)[rng.integers(0, len(METROS), n)]
+    lats = centres[:, 0] + rng.normal(0, METRO_SPREAD_DEG, n)
+    lons = centres[:, 1] + rng.normal(0, METRO_SPREAD_DEG, n)
+    kinds = rng.choice(list(KIND_TYPES), n)
+    strength = rng.uniform(10, 150, n)
+    return [
+        {"id": f"SYN-{i}", "kind": kind, "name": f"Synthetic {i}", "lat": lat, "lon": lon, "strength": s}
+        for i, (kind, lat, lon, s) in enumerate(zip(kinds.tolist(), lats.tolist(), lons.tolist(), strength.tolist()))
+    ]
+
+def receptors(rng, n: int):
+    centres = np.array(METROS)[rng.integers(0, len(METROS), n)]
+    return centres[:, 0] + rng.normal(0, METRO_SPREAD_DEG, n), centres[:, 1] + rng.normal(0, METRO_SPREAD_DEG, n)
+
+def run(emitters: int, radius_km: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    catalogue_rows = synthetic_emitters(rng, emitters)
+    start = time.perf_counter()
+    catalogue = EmitterCatalogue(catalogue_rows)
+    build_seconds = time.perf_counter() - start
+
+    lats, lons = receptors(rng, QUERIES)
+    wind = rng.uniform(0, 360, QUERIES)
+    single, matched = [], []
+    for lat, lon, wind_from in zip(lats.tolist(), lons.tolist(), wind.tolist()):
+        start = time.perf_counter()
+        sources, _, _ = catalogue.ranked(lat, lon, radius_km, wind_from, 4.0)
+        single.append(time.perf_counter() - start)
+        matched.append(sum(source["emitters"] for source in sources))
+
+    bulk = []
+    for n in BULK_SIZES:
+        lats, lons = receptors(rng, n)
+        start = time.perf_counter()
+        catalogue.shares(catalogue.attribute_many(lats, lons, radius_km))
+        elapsed = time.perf_counter() - start
+        bulk.append({"receptors": n, "seconds": round(elapsed, 4), "per_receptor_us": round(elapsed / n * 1e6, 2)})
+
+    return {
+        "benchmark": "attribution",
+        "emitters": emitters,
+        "radius_km": radius_km,
+        "build_seconds": round(build_seconds, 4),
+        "mean_emitters_in_radius": round(float(np.mean(matched)), 1),
+        "single_query": latency_stats(single),
+        "bulk": bulk
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emitters", type=int, default=100000)
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.emitters, args.radius)
+    latency = report["single_query"]
+    print(f"emitters={report['emitters']} radius={report['radius_km']} km build={report['build_seconds']:.2f}s "
+          f"mean in radius={report['mean_emitters_in_radius']}")
+    print(f"single query p50 {latency['p50_ms']:.3f} ms  p95 {latency['p95_ms']:.3f} ms  p99 {latency['p99_ms']:.3f} ms")
+    for row in report["bulk"]:
+        print(f"bulk {row['receptors']:>6} receptors {row['seconds']:.3f}s ({row['per_receptor_us']:.1f} us/receptor)")
+
+    if args.output:
+        write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
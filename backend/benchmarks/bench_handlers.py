@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks for the hot helpers and handlers in main.py.
+
+Caches are bypassed so every call does the full work.
+
+Usage: python benchmarks/bench_handlers.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from common import isolate_app_state, random_locations, write_report
+
+isolate_app_state()
+
+import main
+
+PREDICT_HOURS = [24, 168, 720]
+MIN_RUN_SECONDS = 0.2
+
+def autorange(run_once):
+    """
+    Calls per repeat so one repeat takes at least MIN_RUN_SECONDS
+    """
+    number = 1
+    while True:
+        if run_once(number) >= MIN_RUN_SECONDS or number >= 1 << 20:
+            return number
+        number *= 2
+
+def measure(run_once, repeat: int):
+    number = autorange(run_once)
+    timings = [run_once(number) / number for _ in range(repeat)]
+    return {
+        "calls_per_repeat": number,
+        "best_us": round(min(timings) * 1e6, 3),
+        "median_us": round(float(np.median(timings)) * 1e6, 3)
+    }
+
+def sync_case(func, args_list):
+    def run_once(number):
+        start = time.perf_counter()
+        for i in range(number):
+            func(*args_list[i % len(args_list)])
+        return time.perf_counter() - start
+    return run_once
+
+def async_case(loop, func, args_list):
+    async def calls(number):
+        start = time.perf_counter()
+        for i in range(number):
+            await func(*args_list[i % len(args_list)])
+        return time.perf_counter() - start
+    return lambda number: loop.run_until_complete(calls(number))
+
+def sample_complaint():
+    complaint = main.ComplaintData(
+        location=main.Location(lat=28.6139, lon=77.2090),
+        aqi=320,
+        description="Benchmark complaint",
+        source_type="INDUSTRIAL_EMISSIONS"
+    )
+    rules = main.law_catalogue.rules("aqi", main.gazetteer.state_name(28.6139, 77.2090))
+    return main.build_complaint_record(main.new_complaint_id(), complaint, rules.violations(complaint.aqi))
+
+def run(repeat: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lats, lons = random_locations(rng, 256)
+    points = list(zip(lats.tolist(), lons.tolist()))
+    aqi_values = rng.uniform(0, 500, 256).tolist()
+    loop = asyncio.new_event_loop()
+
+    # Undecorated handlers, so the response cache never answers; predict
+    # looks get_aqi up on the module, so swap in the undecorated one too
+    predict = main.predict_aqi.__wrapped__
+    cached_get_aqi = main.get_aqi
+    main.get_aqi = cached_get_aqi.__wrapped__
+
+    cases = {
+        "categorize_aqi": sync_case(main.categorize_aqi, [(v,) for v in aqi_values]),
+        "get_city_name": sync_case(main.get_city_name, points),
+        "check_legal_violations": async_case(
+            loop, main.check_legal_violations, [(v, lat, lon) for v, (lat, lon) in zip(aqi_values, points)]
+        ),
+        "generate_legal_document": sync_case(main.generate_legal_document, [(sample_complaint(),)])
+    }
+    for hours in PREDICT_HOURS:
+        cases[f"predict_aqi[hours={hours}]"] = async_case(
+            loop, lambda lat, lon, hours=hours: predict(lat, lon, hours=hours), points
+        )
+
+    results = {}
+    try:
+        for name, run_once in cases.items():
+            results[name] = measure(run_once, repeat)
+            print(f"{name:<32} best {results[name]['best_us']:>12.3f} us  median {results[name]['median_us']:>12.3f} us")
+    finally:
+        main.get_aqi = cached_get_aqi
+        loop.close()
+    return {"benchmark": "handlers", "repeat": repeat, "results": results}
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    if args.output:
+        write_report(report, args.output)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,71 @@
+"""
+Compare per-query IDW interpolation with precomputed grid lookups.
+
+Usage: python benchmarks/bench_interpolation.py [--stations 500] [--output results.json]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import random_locations, write_report
+from interpolate import AQIGrid, IDWInterpolator
+
+QUERY_SIZES = [1000, 10000, 100000]
+
+def best_of(func, repeats: int = 3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(stations: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    station_lats, station_lons = random_locations(rng, stations)
+    interpolator = IDWInterpolator(station_lats, station_lons, rng.uniform(50, 450, stations))
+
+    start = time.perf_counter()
+    grid = AQIGrid(interpolator.query)
+    build_seconds = time.perf_counter() - start
+
+    results = []
+    for n in QUERY_SIZES:
+        lats, lons = random_locations(rng, n)
+        idw = best_of(lambda: interpolator.query(lats, lons))
+        lookup = best_of(lambda: grid.lookup(lats, lons))
+        results.append({
+            "queries": n,
+            "idw_seconds": idw,
+            "grid_seconds": lookup,
+            "idw_per_query_us": idw / n * 1e6,
+            "grid_per_query_us": lookup / n * 1e6,
+            "speedup": idw / lookup if lookup else None
+        })
+
+    return {
+        "benchmark": "interpolation",
+        "stations": stations,
+        "grid_shape": list(grid.shape),
+        "grid_build_seconds": build_seconds,
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = run(args.stations)
+    print(f"stations={report['stations']} grid={report['grid_shape']} build={report['grid_build_seconds']:.2f}s")
+    print(f"{'queries':>8} {'idw us/q':>10} {'grid us/q':>10} {'speedup':>8}")
+    for row in report["results"]:
+        print(f"{row['queries']:>8} {row['idw_per_query_us']:>10.2f} {row['grid_per_query_us']:>10.3f} {row['speedup']:>8.1f}x")
+
+    if args.output:
+        write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Shared helpers for the benchmark scripts: isolated app state, timing
+statistics and JSON reports that can be diffed between commits.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# India bounding box, matches interpolate.GRID_BOUNDS
+LAT_RANGE = (6.0, 37.5)
+LON_RANGE = (68.0, 98.0)
+
+def isolate_app_state():
+    """
+    Point every on-disk store at a scratch directory before main is
+    imported, so benchmarks never touch the real databases
+    """
+    scratch = tempfile.mkdtemp(prefix="aqi-bench-")
+    os.environ.setdefault("AQI_COMPLAINT_DB", os.path.join(scratch, "complaints.db"))
+    os.environ.setdefault("AQI_ARTIFACT_DIR", os.path.join(scratch, "artifacts"))
+    os.environ.setdefault("AQI_HISTORY_DIR", os.path.join(scratch, "history"))
+    os.environ.setdefault("AQI_JOB_DB", os.path.join(scratch, "jobs.db"))
+    os.environ.setdefault("AQI_NOTIFY_SINK", os.path.join(scratch, "outbox", "notifications.jsonl"))
+    os.environ.setdefault("AQI_TILE_DIR", os.path.join(scratch, "tiles"))
+    os.environ.setdefault("AQI_USER_DB", os.path.join(scratch, "users.db"))
+    return scratch
+
+def random_locations(rng, n: int):
+    return rng.uniform(*LAT_RANGE, n), rng.uniform(*LON_RANGE, n)
+
+def latency_stats(seconds):
+    """
+    Percentiles in milliseconds for a list of per-call durations
+    """
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if ms.size == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4)
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def write_report(report: dict, path: str):
+    report = {"environment": environment(), **report}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
@@ -0,0 +1,55 @@
+"""
+Diff two benchmark JSON reports, e.g. from two commits.
+
+Every numeric leaf present in both reports is printed with its relative
+change; --threshold hides changes smaller than the given percentage.
+
+Usage: python benchmarks/compare.py baseline.json candidate.json [--threshold 5]
+"""
+import argparse
+import json
+
+# Leaves that are configuration rather than measurements
+SKIP_KEYS = {"environment", "requests", "concurrency", "count", "calls_per_repeat", "repeat", "queries", "stations", "locations"}
+
+def numeric_leaves(report, prefix: str = ""):
+    if isinstance(report, dict):
+        for key, value in report.items():
+            if key not in SKIP_KEYS:
+                yield from numeric_leaves(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(report, list):
+        for i, value in enumerate(report):
+            yield from numeric_leaves(value, f"{prefix}[{i}]")
+    elif isinstance(report, (int, float)) and not isinstance(report, bool):
+        yield prefix, float(report)
+
+def compare(baseline: dict, candidate: dict, threshold: float = 0.0):
+    before = dict(numeric_leaves(baseline))
+    rows = []
+    for path, after in numeric_leaves(candidate):
+        if path not in before:
+            continue
+        change = (after - before[path]) / before[path] * 100 if before[path] else None
+        if change is None or abs(change) >= threshold:
+            rows.append((path, before[path], after, change))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Only show changes of at least this many percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline {baseline.get('environment', {}).get('commit')}  candidate {candidate.get('environment', {}).get('commit')}")
+    for path, before, after, change in compare(baseline, candidate, args.threshold):
+        delta = f"{change:+.1f}%" if change is not None else "n/a"
+        print(f"{path:<60} {before:>14.4f} {after:>14.4f} {delta:>9}")
+
+if __name__ == "__main__":
+    main()
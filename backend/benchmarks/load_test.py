@@ -0,0 +1,151 @@
+"""
+In-process load generator for the API endpoints.
+
+Drives the ASGI app through httpx.AsyncClient with a fixed number of
+concurrent workers per scenario and reports latency percentiles and
+requests/sec. --locations bounds the distinct coordinates requested,
+which controls the response cache hit rate.
+
+Usage: python benchmarks/load_test.py [--requests 2000] [--concurrency 32] [--locations 500] [--output results.json]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+from common import isolate_app_state, latency_stats, random_locations, write_report
+
+isolate_app_state()
+
+import main
+
+SCENARIOS = ["aqi", "aqi_predict", "legal_check", "complaint_file", "complaint_status"]
+SEED_COMPLAINTS = 200
+
+def request_factories(rng, locations: int, complaint_ids):
+    """
+    scenario -> function(i) returning (method, url, keyword arguments)
+    """
+    lats, lons = random_locations(rng, locations)
+    lats, lons = np.round(lats, 4).tolist(), np.round(lons, 4).tolist()
+    aqi_values = np.round(rng.uniform(20, 480, locations), 1).tolist()
+
+    def point(i):
+        j = i % locations
+        return lats[j], lons[j], aqi_values[j]
+
+    def aqi(i):
+        lat, lon, _ = point(i)
+        return "GET", "/aqi", {"params": {"lat": lat, "lon": lon}}
+
+    def aqi_predict(i):
+        lat, lon, _ = point(i)
+        return "GET", "/aqi/predict", {"params": {"lat": lat, "lon": lon, "hours": 24}}
+
+    def legal_check(i):
+        lat, lon, value = point(i)
+        return "GET", "/legal/check", {"params": {"aqi": value, "lat": lat, "lon": lon}}
+
+    def complaint_file(i):
+        lat, lon, value = point(i)
+        payload = {"location": {"lat": lat, "lon": lon}, "aqi": value, "description": "Load test"}
+        return "POST", "/complaint/file", {"json": payload}
+
+    def complaint_status(i):
+        return "GET", f"/complaint/status/{complaint_ids[i % len(complaint_ids)]}", {}
+
+    return {
+        "aqi": aqi,
+        "aqi_predict": aqi_predict,
+        "legal_check": legal_check,
+        "complaint_file": complaint_file,
+        "complaint_status": complaint_status
+    }
+
+async def run_scenario(client: httpx.AsyncClient, make_request, total: int, concurrency: int):
+    latencies = []
+    statuses = Counter()
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 4),
+        "requests_per_second": round(total / elapsed, 2) if elapsed else None,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency": latency_stats(latencies)
+    }
+
+async def seed_complaints(client: httpx.AsyncClient, rng, n: int):
+    lats, lons = random_locations(rng, n)
+    ids = []
+    for lat, lon in zip(lats.tolist(), lons.tolist()):
+        response = await client.post("/complaint/file", json={"location": {"lat": lat, "lon": lon}, "aqi": 300})
+        response.raise_for_status()
+        ids.append(response.json()["complaint_id"])
+    
+    # Filing only queues the complaint, wait until the workers stored them all
+    while any(main.complaint_store.get(complaint_id) is None for complaint_id in ids):
+        await asyncio.sleep(0.1)
+    return ids
+
+async def run(scenarios, total: int, concurrency: int, locations: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    await main.start_background_tasks()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            complaint_ids = await seed_complaints(client, rng, SEED_COMPLAINTS)
+            factories = request_factories(rng, locations, complaint_ids)
+
+            results = {}
+            for name in scenarios:
+                main.response_cache.backend.clear()
+                results[name] = await run_scenario(client, factories[name], total, concurrency)
+                latency = results[name]["latency"]
+                print(
+                    f"{name:<18} {results[name]['requests_per_second']:>9.1f} req/s  "
+                    f"p50 {latency['p50_ms']:>8.2f} ms  p95 {latency['p95_ms']:>8.2f} ms  p99 {latency['p99_ms']:>8.2f} ms  "
+                    f"{results[name]['status_codes']}"
+                )
+    finally:
+        await main.stop_background_tasks()
+
+    return {
+        "benchmark": "load",
+        "requests_per_scenario": total,
+        "concurrency": concurrency,
+        "locations": locations,
+        "results": results
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--locations", type=int, default=500, help="Distinct coordinates requested")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Run only these scenarios")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.scenario or SCENARIOS, args.requests, args.concurrency, args.locations))
+    if args.output:
+        write_report(report, args.output)
+
+if __name__ == "__main__":
+    main_cli()
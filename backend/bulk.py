@@ -0,0 +1,86 @@
+"""
+Incremental parsing of bulk uploads.
+
+Accepts either NDJSON (one object per line) or a single JSON array and
+yields items as soon as they are complete, so memory stays bounded by
+the largest item rather than the whole upload.
+"""
+import codecs
+import json
+
+from fastapi.responses import StreamingResponse
+
+MAX_ITEM_BYTES = 1024 * 1024
+
+class BulkItemError(Exception):
+    """
+    A single item in the upload could not be decoded
+    """
+
+async def iter_json_records(chunks):
+    """
+    Yield decoded items (or BulkItemError instances) from an async
+    iterator of byte chunks
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    json_decoder = json.JSONDecoder()
+    buffer = ""
+    mode = None  # "array" or "ndjson"
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+
+        if mode is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            buffer = stripped[1:] if mode == "array" else stripped
+
+        if mode == "ndjson":
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield _decode_line(line)
+        else:
+            while True:
+                buffer = buffer.lstrip(" \t\r\n,")
+                if not buffer or buffer[0] == "]":
+                    break
+                try:
+                    item, end = json_decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break  # incomplete, wait for more data
+                buffer = buffer[end:]
+                yield item
+
+        if len(buffer) > MAX_ITEM_BYTES:
+            yield BulkItemError(f"Item larger than {MAX_ITEM_BYTES} bytes")
+            return
+
+    buffer += decoder.decode(b"", final=True)
+    if mode == "ndjson" and buffer.strip():
+        yield _decode_line(buffer)
+    elif mode == "array":
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer and buffer[0] != "]":
+            yield BulkItemError("Truncated JSON array")
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator may still be reading the request.
+
+    The stock response listens for client disconnects on receive(), which
+    would swallow the request body chunks the iterator is consuming.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _decode_line(line: str):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return BulkItemError(f"Invalid JSON: {e.msg}")
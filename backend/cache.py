@@ -0,0 +1,140 @@
+"""
+Response cache for location based endpoints.
+
+Keys are a quantized lat/lon cell plus a time bucket, so every request
+for the same cell inside the same TTL window shares one computed result.
+"""
+from collections import OrderedDict
+from functools import wraps
+import math
+import threading
+import time
+
+from fastapi import HTTPException
+
+CELL_SIZE_DEG = 0.01  # ~1.1 km at the equator
+
+class LRUTTLCache:
+    """
+    Bounded LRU cache where every entry also carries an expiry time
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+def location_cell(lat: float, lon: float, cell_size: float = CELL_SIZE_DEG):
+    """
+    Quantize a coordinate to the integer index of its grid cell
+    """
+    return (int(lat // cell_size), int(lon // cell_size))
+
+def validate_location(lat: float, lon: float):
+    """
+    Reject coordinates that have no grid cell with a 400
+    """
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise HTTPException(status_code=400, detail="lat and lon must be finite numbers")
+    if abs(lat) > 90 or abs(lon) > 180:
+        raise HTTPException(status_code=400, detail="lat must be within [-90, 90] and lon within [-180, 180]")
+
+def time_bucket(ttl: float, now: float = None):
+    """
+    Index of the TTL window containing now
+    """
+    return int((time.time() if now is None else now) // ttl)
+
+class ResponseCache:
+    """
+    Per-endpoint TTL caching on top of a pluggable backend.
+
+    A backend only needs get(key) and set(key, value, expires_at);
+    stats() is optional.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else LRUTTLCache()
+        self.ttls = {}
+        self.hits = {}
+        self.misses = {}
+
+    def cached(self, endpoint: str, ttl: float):
+        """
+        Decorator for async handlers taking lat and lon keyword arguments.
+        Other arguments (e.g. hours) become part of the key.
+        """
+        self.ttls[endpoint] = ttl
+        self.hits[endpoint] = 0
+        self.misses[endpoint] = 0
+
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(lat: float, lon: float, **kwargs):
+                validate_location(lat, lon)
+                now = time.time()
+                bucket = time_bucket(ttl, now)
+                key = (endpoint, location_cell(lat, lon), bucket, tuple(sorted(kwargs.items())))
+                result = self.backend.get(key)
+                if result is None:
+                    self.misses[endpoint] += 1
+                    result = await func(lat, lon, **kwargs)
+                    self.backend.set(key, result, (bucket + 1) * ttl)
+                else:
+                    self.hits[endpoint] += 1
+                return result
+            wrapper.response_cached = True
+            return wrapper
+        return decorator
+
+    def stats(self):
+        stats = self.backend.stats() if hasattr(self.backend, "stats") else {}
+        endpoints = {
+            endpoint: {"hits": self.hits[endpoint], "misses": self.misses[endpoint]}
+            for endpoint in self.ttls
+        }
+        return {"backend": type(self.backend).__name__, "ttl_seconds": dict(self.ttls), "endpoints": endpoints, **stats}
@@ -0,0 +1,208 @@
+"""
+Legal document rendering and content-addressed artifact storage.
+
+Templates in templates/ are compiled once at startup. Rendered documents
+are written to disk under their SHA-256 digest and looked up through a
+small per-complaint reference file, so a document is rendered once and
+then served as a static artifact with ETag and Range support.
+"""
+import hashlib
+import os
+import re
+from string import Template
+
+from fastapi import Response
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
+ARTIFACT_DIR = os.environ.get("AQI_ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts"))
+
+# format -> (template file, media type, file extension)
+FORMATS = {
+    "text": ("complaint.txt", "text/plain; charset=utf-8", "txt"),
+    "markdown": ("complaint.md", "text/markdown; charset=utf-8", "md"),
+    "pdf": ("complaint.txt", "application/pdf", "pdf")
+}
+
+class CompiledTemplate:
+    """
+    $name / ${name} template split once into (literal, field) segments
+    """
+
+    def __init__(self, text: str):
+        self.segments = []
+        literal = ""
+        position = 0
+        for match in Template.pattern.finditer(text):
+            literal += text[position:match.start()]
+            field = match.group("named") or match.group("braced")
+            if field:
+                self.segments.append((literal, field))
+                literal = ""
+            else:
+                literal += "$" if match.group("escaped") is not None else match.group(0)
+            position = match.end()
+        self.segments.append((literal + text[position:], None))
+
+    def render(self, values: dict):
+        return "".join(
+            literal + str(values[field]) if field else literal
+            for literal, field in self.segments
+        )
+
+def complaint_fields(complaint: dict):
+    violation = complaint["violation"]
+    impact = complaint["impact_analysis"]
+    return {
+        "id": complaint["id"],
+        "timestamp": complaint["timestamp"],
+        "status": complaint["status"],
+        "location": violation["location"],
+        "aqi": violation["aqi"],
+        "source_type": violation["source_type"] or "Multiple Sources",
+        "legal_basis": "\n".join(f"- {v['name']} (Exceeded by {v['excess']} points)" for v in violation["legal_basis"]),
+        "affected_area": impact["affected_area"],
+        "estimated_population": impact["estimated_population"],
+        "health_risk": impact["health_risk"],
+        "environmental_impact": impact["environmental_impact"],
+        "authorities": "\n".join(f"- {auth}" for auth in complaint["processing"]["authorities_notified"])
+    }
+
+class DocumentRenderer:
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.templates = {}
+        for name in {template for template, _, _ in FORMATS.values()}:
+            with open(os.path.join(template_dir, name), encoding="utf-8") as f:
+                self.templates[name] = CompiledTemplate(f.read())
+
+    def render_text(self, complaint: dict, fmt: str = "text"):
+        return self.templates[FORMATS[fmt][0]].render(complaint_fields(complaint))
+
+    def render(self, complaint: dict, fmt: str):
+        """
+        Rendered document as bytes in the requested format
+        """
+        text = self.render_text(complaint, fmt)
+        if fmt == "pdf":
+            return text_to_pdf(text)
+        return text.encode("utf-8")
+
+class ArtifactStore:
+    """
+    Files stored under objects/<digest[:2]>/<digest>.<ext>, with named
+    references in refs/<name> pointing at them
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+
+    def path(self, digest: str, ext: str):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{ext}")
+
+    def put(self, data: bytes, ext: str):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, data)
+        return digest
+
+    def link(self, name: str, digest: str, ext: str):
+        _atomic_write(os.path.join(self.root, "refs", name), f"{digest}.{ext}".encode())
+
+    def resolve(self, name: str):
+        """
+        (digest, ext) for a reference, None when missing
+        """
+        try:
+            with open(os.path.join(self.root, "refs", name), encoding="utf-8") as f:
+                digest, ext = f.read().strip().split(".", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        return (digest, ext) if os.path.exists(self.path(digest, ext)) else None
+
+def _atomic_write(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+def artifact_response(path: str, digest: str, media_type: str, if_none_match: str = None, range_header: str = None):
+    """
+    Serve an artifact with a strong ETag, 304 revalidation and a single
+    byte range. The URL is a name, not the digest, so clients must
+    revalidate before reusing a copy.
+    """
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "no-cache"}
+
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    size = len(data)
+
+    # Unsupported range syntax falls through to the full body
+    match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    if match and (match.group(1) or match.group(2)):
+        start, end = match.groups()
+        if start:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        else:
+            start = max(size - int(end), 0)
+            end = size - 1
+        if start >= size or start > end:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    return Response(content=data, media_type=media_type, headers=headers)
+
+def text_to_pdf(text: str, font_size: int = 10):
+    """
+    Minimal single-font PDF with one text line per document line
+    """
+    leading = font_size + 2
+    lines_per_page = int((792 - 100) / leading)
+    lines = [_pdf_escape(line) for line in text.replace("\r", "").split("\n")]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"
+    ]
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 %d Tf %d TL 50 742 Td\n" % (font_size, leading)
+        stream += "".join(f"({line}) '\n" for line in page_lines) + "ET"
+        stream = stream.encode("cp1252", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def _pdf_escape(line: str):
+    line = line.replace("₹", "Rs.")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
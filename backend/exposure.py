@@ -0,0 +1,104 @@
+"""
+Cumulative AQI exposure along a GPS track.
+
+The track is split into segments between consecutive fixes. Each segment
+is dosed with the trapezoidal mean of the AQI at its two ends times its
+duration, so the total is the time integral of AQI over the trip in
+AQI-hours. Everything is computed over whole arrays; a track is one pass
+however many points it has.
+"""
+import numpy as np
+
+from bands import AQI_CATEGORIES
+from geo import chord_to_km, to_xyz
+
+# get_health_impact counts a day at a given AQI as aqi / 100 cigarettes
+AQI_PER_CIGARETTE = 100
+CIGARETTE_AQI_HOURS = AQI_PER_CIGARETTE * 24
+MAX_TRACK_POINTS = 1000000
+DEFAULT_PEAK_AQI = AQI_CATEGORIES.bounds[2]  # above "Unhealthy for Sensitive"
+DEFAULT_PEAKS = 5
+
+def validate_track(lats, lons, timestamps):
+    """
+    Error message for an unusable track, None if it is fine
+    """
+    if not len(lats) == len(lons) == len(timestamps):
+        return "lats, lons and timestamps must have the same length"
+    if len(lats) < 2:
+        return "A track needs at least two points"
+    if len(lats) > MAX_TRACK_POINTS:
+        return f"At most {MAX_TRACK_POINTS} points per track"
+    if not (np.isfinite(lats).all() and np.isfinite(lons).all() and np.isfinite(timestamps).all()):
+        return "lats, lons and timestamps must be finite numbers"
+    if np.any(np.abs(lats) > 90) or np.any(np.abs(lons) > 180):
+        return "lats must be within [-90, 90] and lons within [-180, 180]"
+    if np.any(np.diff(timestamps) < 0):
+        return "timestamps must not decrease"
+    return None
+
+def peak_runs(above: np.ndarray):
+    """
+    (start, end) segment index pairs of every run of True, end exclusive
+    """
+    edges = np.diff(np.concatenate(([0], above.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def track_exposure(aqi, lats, lons, timestamps, peak_aqi: float = DEFAULT_PEAK_AQI, peaks: int = DEFAULT_PEAKS):
+    """
+    Dose, time per AQI category and the highest-dose stretches where the
+    segment AQI stayed above peak_aqi. timestamps are epoch seconds.
+    """
+    aqi = np.asarray(aqi, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    points = to_xyz(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+
+    hours = np.diff(timestamps) / 3600
+    segment_aqi = (aqi[:-1] + aqi[1:]) / 2
+    dose = segment_aqi * hours
+    km = chord_to_km(np.linalg.norm(np.diff(points, axis=0), axis=1))
+
+    total_hours = float(hours.sum())
+    total_dose = float(dose.sum())
+    mean_aqi = total_dose / total_hours if total_hours else float(segment_aqi.mean())
+    cigarettes = total_dose / CIGARETTE_AQI_HOURS
+
+    # Time spent in each category, by segment mean AQI
+    category_hours = np.bincount(AQI_CATEGORIES.indexes(segment_aqi), weights=hours, minlength=len(AQI_CATEGORIES))
+
+    starts, ends = peak_runs(segment_aqi > peak_aqi)
+    cumulative = np.concatenate(([0.0], np.cumsum(dose)))
+    cumulative_km = np.concatenate(([0.0], np.cumsum(km)))
+    run_dose = cumulative[ends] - cumulative[starts]
+    run_max = np.maximum.reduceat(segment_aqi, starts) if starts.size else np.empty(0)
+    order = np.argsort(-run_dose, kind="stable")[:peaks]
+
+    return {
+        "points": int(aqi.size),
+        "duration_minutes": round(total_hours * 60, 1),
+        "distance_km": round(float(km.sum()), 2),
+        "dose_aqi_hours": round(total_dose, 1),
+        "mean_aqi": round(mean_aqi),
+        "max_aqi": round(float(aqi.max())),
+        "cigarette_equivalent": round(cigarettes, 2),
+        "recovery_time": f"{int(cigarettes * 2)} hours in clean air",
+        "category_minutes": {
+            name: round(float(value) * 60, 1)
+            for name, value in zip(AQI_CATEGORIES.column("name"), category_hours)
+        },
+        "peak_threshold": peak_aqi,
+        "peak_segments": [
+            {
+                "start_index": int(starts[i]),
+                "end_index": int(ends[i]),
+                "start_time": float(timestamps[starts[i]]),
+                "end_time": float(timestamps[ends[i]]),
+                "minutes": round(float(timestamps[ends[i]] - timestamps[starts[i]]) / 60, 1),
+                "distance_km": round(float(cumulative_km[ends[i]] - cumulative_km[starts[i]]), 2),
+                "max_aqi": round(float(run_max[i])),
+                "dose_aqi_hours": round(float(run_dose[i]), 1),
+                "share_of_dose": round(float(run_dose[i]) / total_dose, 3) if total_dose else 0.0
+            }
+            for i in order.tolist()
+        ]
+    }
@@ -0,0 +1,78 @@
+"""
+Vectorized AQI forecast engine used by /aqi/predict
+"""
+from datetime import datetime
+import numpy as np
+
+MAX_FORECAST_HOURS = 720  # 30 days hourly
+
+def hour_of_day_factors(hours_of_day: np.ndarray):
+    """
+    Time pattern factor for every hour of day in the array
+    """
+    return np.select(
+        [
+            (hours_of_day >= 7) & (hours_of_day <= 9),     # Morning commute
+            (hours_of_day >= 17) & (hours_of_day <= 19),   # Evening commute
+            (hours_of_day >= 10) & (hours_of_day <= 16)    # Daytime
+        ],
+        [1.8, 1.7, 1.3],
+        default=0.8  # Night
+    )
+
+def forecast_aqi(current_aqi: np.ndarray, start: datetime, hours: int, rng=None):
+    """
+    Forecast hourly AQI for every location in current_aqi.
+
+    rng is a Generator or rng.PointStreams with one stream per location;
+    a fresh unseeded Generator is used when omitted. Returns a dict of arrays; per-hour values have shape (hours,) and
+    per-location values have shape (locations, hours).
+    """
+    current_aqi = np.atleast_1d(np.asarray(current_aqi, dtype=np.float64))
+    rng = np.random.default_rng() if rng is None else rng
+    offsets = np.arange(hours)
+    shape = (current_aqi.size, hours)
+
+    # Hour-of-day and weekday for every forecast step
+    times = np.datetime64(start, "us") + offsets.astype("timedelta64[h]")
+    hour_of_day = (start.hour + offsets) % 24
+    days_ahead = (start.hour + offsets) // 24
+    weekday = (start.weekday() + days_ahead) % 7
+    is_weekday = weekday < 5
+
+    time_factor = hour_of_day_factors(hour_of_day)
+    day_factor = np.where(is_weekday, 1.2, 1.0)
+
+    # Random weather variation per location and hour
+    weather_factor = 1.0 + rng.normal(0, 0.15, size=shape)
+
+    predicted = current_aqi[:, None] * (time_factor * day_factor) * weather_factor
+    predicted = np.clip(predicted, 50, 500)
+
+    # Confidence based on time (more confident for near future)
+    confidence = 0.9 - offsets * 0.02 + rng.normal(0, 0.05, size=shape)
+    confidence = np.clip(confidence, 0.7, 0.95)
+
+    rounded = np.round(predicted).astype(np.int64)
+
+    return {
+        "timestamps": np.datetime_as_string(times, unit="us"),
+        "hour_of_day": hour_of_day,
+        "is_weekday": is_weekday,
+        "time_factor": time_factor,
+        "weather_factor": weather_factor,
+        "predicted": predicted,
+        "aqi": rounded,
+        "confidence": confidence,
+        "peaks": find_peaks(rounded)
+    }
+
+def find_peaks(values: np.ndarray):
+    """
+    Boolean mask of strict local maxima along the last axis
+    """
+    values = np.atleast_2d(values)
+    peaks = np.zeros(values.shape, dtype=bool)
+    middle = values[:, 1:-1]
+    peaks[:, 1:-1] = (middle > values[:, :-2]) & (middle > values[:, 2:])
+    return peaks
@@ -0,0 +1,241 @@
+"""
+Reverse geocoding over a local gazetteer.
+
+Cities are indexed with a KD-tree on 3D sphere coordinates, zones with
+a bounding-box grid followed by an exact point-in-polygon test. Every
+lookup has a bulk variant taking coordinate arrays.
+"""
+import csv
+import json
+import os
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CITIES_PATH = os.environ.get("AQI_GAZETTEER_CITIES", os.path.join(DATA_DIR, "cities.csv"))
+ZONES_PATH = os.environ.get("AQI_GAZETTEER_ZONES", os.path.join(DATA_DIR, "zones.geojson"))
+
+MAX_CITY_DISTANCE_KM = 50.0
+ZONE_GRID_DEG = 0.1
+
+def to_xyz(lats, lons):
+    """
+    Convert degrees to 3D points on a sphere of EARTH_RADIUS_KM
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_KM * np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_to_km(chord):
+    """
+    Great-circle distance for a straight-line chord through the sphere
+    """
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / (2 * EARTH_RADIUS_KM), 1.0))
+
+def km_to_chord(km):
+    """
+    Straight-line chord for a great-circle distance, inf past the antipode
+    """
+    km = np.asarray(km, dtype=np.float64)
+    chord = 2 * EARTH_RADIUS_KM * np.sin(np.minimum(km, np.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))
+    return np.where(km > np.pi * EARTH_RADIUS_KM, np.inf, chord)[()]
+
+class PointIndex:
+    """
+    KD-tree over lat/lon points answering nearest, k-nearest and radius queries
+    """
+
+    def __init__(self, lats, lons):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.tree = cKDTree(to_xyz(self.lats, self.lons)) if self.lats.size else None
+
+    def __len__(self):
+        return int(self.lats.size)
+
+    def nearest(self, lats, lons, k: int = 1, max_km: float = np.inf):
+        """
+        Distances (km) and indexes of the k nearest points. Missing
+        neighbours get distance inf and index len(self).
+        """
+        points = to_xyz(lats, lons)
+        if self.tree is None:
+            shape = points.shape[:-1] + ((k,) if k > 1 else ())
+            return np.full(shape, np.inf), np.full(shape, len(self), dtype=np.int64)
+        chord, idx = self.tree.query(points, k=k, distance_upper_bound=km_to_chord(max_km))
+        return chord_to_km(chord), idx
+
+    def within(self, lat: float, lon: float, radius_km: float):
+        """
+        Indexes of all points within radius_km of (lat, lon)
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64)
+        return np.asarray(self.tree.query_ball_point(to_xyz(lat, lon), km_to_chord(radius_km)), dtype=np.int64)
+
+    def within_many(self, lats, lons, radius_km: float):
+        """
+        All (query, point, distance km) pairs within radius_km as three
+        flat arrays, grouped by query index
+        """
+        points = np.atleast_2d(to_xyz(lats, lons))
+        if self.tree is None or points.shape[0] == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        pairs = cKDTree(points).sparse_distance_matrix(self.tree, km_to_chord(radius_km), output_type="ndarray")
+        pairs = pairs[np.argsort(pairs["i"], kind="stable")]
+        return pairs["i"].astype(np.int64), pairs["j"].astype(np.int64), chord_to_km(pairs["v"])
+
+class PolygonIndex:
+    """
+    Grid of polygon bounding boxes with an exact even-odd containment test.
+    When polygons overlap the smallest one wins.
+    """
+
+    def __init__(self, polygons, grid_deg: float = ZONE_GRID_DEG):
+        self.grid_deg = grid_deg
+        self.edges = []
+        self.cells = {}
+
+        # Smallest polygons first so nested zones take precedence
+        areas = [_bbox_area(rings) for rings in polygons]
+        self.order = sorted(range(len(polygons)), key=lambda i: areas[i])
+
+        for i in self.order:
+            rings = [np.asarray(ring, dtype=np.float64) for ring in polygons[i]]
+            x1 = np.concatenate([ring[:-1, 0] for ring in rings])
+            y1 = np.concatenate([ring[:-1, 1] for ring in rings])
+            x2 = np.concatenate([ring[1:, 0] for ring in rings])
+            y2 = np.concatenate([ring[1:, 1] for ring in rings])
+            self.edges.append((i, x1, y1, x2, y2))
+
+            slot = len(self.edges) - 1
+            lon_min, lon_max = int(np.floor(min(x1.min(), x2.min()) / grid_deg)), int(np.floor(max(x1.max(), x2.max()) / grid_deg))
+            lat_min, lat_max = int(np.floor(min(y1.min(), y2.min()) / grid_deg)), int(np.floor(max(y1.max(), y2.max()) / grid_deg))
+            for cx in range(lon_min, lon_max + 1):
+                for cy in range(lat_min, lat_max + 1):
+                    self.cells.setdefault((cx, cy), []).append(slot)
+
+    def containing(self, lats, lons):
+        """
+        Index of the containing polygon for every point, -1 when none
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        result = np.full(lats.shape, -1, dtype=np.int64)
+
+        cell_x = np.floor(lons / self.grid_deg).astype(np.int64)
+        cell_y = np.floor(lats / self.grid_deg).astype(np.int64)
+        cells, inverse = np.unique(np.stack([cell_x, cell_y], axis=-1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        for c, (cx, cy) in enumerate(cells.tolist()):
+            slots = self.cells.get((cx, cy))
+            if not slots:
+                continue
+            members = np.flatnonzero(inverse == c)
+            for slot in slots:
+                pending = members[result[members] < 0]
+                if pending.size == 0:
+                    break
+                i, x1, y1, x2, y2 = self.edges[slot]
+                inside = _points_in_edges(lons[pending], lats[pending], x1, y1, x2, y2)
+                result[pending[inside]] = i
+        return result
+
+def _points_in_edges(px, py, x1, y1, x2, y2):
+    px = px[:, None]
+    py = py[:, None]
+    crosses = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at_py = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    return (np.count_nonzero(crosses & (px < x_at_py), axis=1) % 2) == 1
+
+def _bbox_area(rings):
+    ring = np.asarray(rings[0], dtype=np.float64)
+    return float(np.ptp(ring[:, 0]) * np.ptp(ring[:, 1]))
+
+class Gazetteer:
+    """
+    Nearest-city and containing-zone lookups loaded once from local files
+    """
+
+    def __init__(self, cities, zones):
+        self.city_names = np.array([c["name"] for c in cities] + ["Urban Area"], dtype=object)
+        self.city_states = np.array([c["state"] for c in cities] + [None], dtype=object)
+        self.cities = PointIndex([c["lat"] for c in cities], [c["lon"] for c in cities])
+        self.zone_names = [z["name"] for z in zones]
+        self.zone_types = np.array([z["zone_type"] for z in zones] + [None], dtype=object)
+        self.zones = PolygonIndex([z["rings"] for z in zones])
+
+    @classmethod
+    def load(cls, cities_path: str = CITIES_PATH, zones_path: str = ZONES_PATH):
+        return cls(load_cities(cities_path), load_zones(zones_path))
+
+    def city_names_for(self, lats, lons, max_km: float = MAX_CITY_DISTANCE_KM):
+        """
+        Nearest city name for every point, "Urban Area" beyond max_km
+        """
+        _, idx = self.cities.nearest(lats, lons, max_km=max_km)
+        return self.city_names[idx]
+
+    def zone_types_for(self, lats, lons):
+        """
+        Containing zone type for every point, None outside all zones
+        """
+        return self.zone_types[self.zones.containing(lats, lons)]
+
+    def city_name(self, lat: float, lon: float):
+        return self.city_names_for(np.array([lat]), np.array([lon]))[0]
+
+    def state_names_for(self, lats, lons, max_km: float = MAX_CITY_DISTANCE_KM):
+        """
+        State of the nearest city for every point, None beyond max_km
+        """
+        _, idx = self.cities.nearest(lats, lons, max_km=max_km)
+        return self.city_states[idx]
+
+    def state_name(self, lat: float, lon: float):
+        return self.state_names_for(np.array([lat]), np.array([lon]))[0]
+
+    def zone_type(self, lat: float, lon: float):
+        return self.zone_types_for(np.array([lat]), np.array([lon]))[0]
+
+def load_cities(path: str):
+    """
+    Read a CSV gazetteer with name, state, lat and lon columns
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {"name": row["name"], "state": row.get("state", ""), "lat": float(row["lat"]), "lon": float(row["lon"])}
+            for row in csv.DictReader(f)
+        ]
+
+def load_zones(path: str):
+    """
+    Read Polygon/MultiPolygon features with a zone_type property from GeoJSON
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+
+    zones = []
+    for feature in collection.get("features", []):
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        if geometry.get("type") == "Polygon":
+            rings = geometry["coordinates"]
+        elif geometry.get("type") == "MultiPolygon":
+            rings = [ring for polygon in geometry["coordinates"] for ring in polygon]
+        else:
+            continue
+        zones.append({
+            "name": properties.get("name", ""),
+            "zone_type": properties.get("zone_type", "MIXED_USE"),
+            "rings": rings
+        })
+    return zones
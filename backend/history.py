@@ -0,0 +1,303 @@
+"""
+Append-only AQI history per spatial cell.
+
+Raw samples land in a fixed-size in-memory ring per cell. Every sample
+also feeds 1-minute, 1-hour and 1-day rollups (mean, max, p95). Rings
+are flushed as .npy chunks under HISTORY_DIR/<level>/<cell>/ and read
+back memory-mapped, so long range queries only touch rollup points.
+Several worker processes may share one directory; their partial
+buckets for the same interval are merged at query time.
+
+compact() keeps the directory bounded: chunks past their level's
+retention are deleted (raw samples live on in the rollups, which are
+fed from every sample at record time) and older chunks of a cell are
+merged into one, partial buckets included.
+"""
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from cache import location_cell
+
+HISTORY_DIR = os.environ.get(
+    "AQI_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+)
+
+# (name, bucket seconds); raw uses a nominal 1 second for range planning
+LEVELS = [("raw", 1), ("1m", 60), ("1h", 3600), ("1d", 86400)]
+ROLLUP_LEVELS = LEVELS[1:]
+
+RAW_DTYPE = np.dtype([("t", "<f8"), ("value", "<f4")])
+ROLLUP_DTYPE = np.dtype([("t", "<f8"), ("mean", "<f4"), ("max", "<f4"), ("p95", "<f4"), ("count", "<i4")])
+
+# Seconds of data kept per level, None keeps everything
+RETENTION_SECONDS = {"raw": 2 * 86400, "1m": 30 * 86400, "1h": 2 * 365 * 86400, "1d": None}
+COMPACT_AFTER_SECONDS = 3600
+COMPACT_LOCK_STALE_SECONDS = 600
+
+RING_CAPACITY = 1024
+RESERVOIR_SIZE = 512
+MAX_POINTS = 2000
+
+class Ring:
+    """
+    Fixed-capacity circular buffer that remembers which rows are not on
+    disk yet
+    """
+
+    def __init__(self, dtype, capacity: int = RING_CAPACITY):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.head = 0      # next write position
+        self.pending = 0   # rows written since the last flush
+
+    def append(self, row):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.pending += 1
+
+    @property
+    def full(self):
+        return self.pending >= self.capacity
+
+    def take_pending(self):
+        """
+        Unflushed rows in write order, marking them flushed
+        """
+        rows = self.peek_pending()
+        self.pending = 0
+        return rows
+
+    def peek_pending(self):
+        count = min(self.pending, self.capacity)
+        idx = (self.head - count + np.arange(count)) % self.capacity
+        return self.data[idx]
+
+class Bucket:
+    """
+    Open rollup bucket with exact mean/max and a reservoir for p95
+    """
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.max = -np.inf
+        self.reservoir = []
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.reservoir) < RESERVOIR_SIZE:
+            self.reservoir.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.reservoir[slot] = value
+
+    def row(self):
+        return (self.start, self.total / self.count, self.max, np.percentile(self.reservoir, 95), self.count)
+
+class CellSeries:
+    def __init__(self):
+        self.rings = {"raw": Ring(RAW_DTYPE)}
+        self.rings.update({name: Ring(ROLLUP_DTYPE) for name, _ in ROLLUP_LEVELS})
+        self.buckets = {}
+
+class HistoryStore:
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        self.cells = {}
+        self._chunks = {}
+        self._lock = threading.Lock()
+
+    def record(self, lat: float, lon: float, value: float, t: float = None):
+        t = time.time() if t is None else t
+        cell = location_cell(lat, lon)
+        with self._lock:
+            series = self.cells.get(cell)
+            if series is None:
+                series = self.cells[cell] = CellSeries()
+            series.rings["raw"].append((t, value))
+
+            for name, seconds in ROLLUP_LEVELS:
+                start = t - t % seconds
+                bucket = series.buckets.get(name)
+                if bucket is not None and start > bucket.start:
+                    series.rings[name].append(bucket.row())
+                    bucket = None
+                if bucket is None:
+                    bucket = series.buckets[name] = Bucket(start)
+                bucket.add(value)
+
+            full = [name for name, ring in series.rings.items() if ring.full]
+            for name in full:
+                self._write_chunk(cell, name, series.rings[name].take_pending())
+
+    def flush(self):
+        """
+        Write every unflushed ring segment to disk
+        """
+        with self._lock:
+            for cell, series in self.cells.items():
+                for name, ring in series.rings.items():
+                    if ring.pending:
+                        self._write_chunk(cell, name, ring.take_pending())
+
+    def _cell_dir(self, cell, level: str):
+        return os.path.join(self.root, level, f"{cell[0]}_{cell[1]}")
+
+    def _write_chunk(self, cell, level: str, rows):
+        if rows.size == 0:
+            return None
+        directory = self._cell_dir(cell, level)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{rows['t'][0]:.3f}-{rows['t'][-1]:.3f}-{os.getpid()}.npy"
+        tmp = os.path.join(directory, f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, rows)
+        path = os.path.join(directory, name)
+        os.replace(tmp, path)
+        self._chunks.pop((cell, level), None)
+        return path
+
+    def _chunk_list(self, cell, level: str):
+        """
+        (first, last, path) of every chunk, re-listed when the directory
+        changed (another worker may have written to it)
+        """
+        key = (cell, level)
+        directory = self._cell_dir(cell, level)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        cached = self._chunks.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        chunks = []
+        for name in os.listdir(directory):
+            if name.endswith(".npy") and not name.startswith("."):
+                first, last = name[:-4].split("-")[:2]
+                chunks.append((float(first), float(last), os.path.join(directory, name)))
+        chunks.sort()
+        self._chunks[key] = (mtime, chunks)
+        return chunks
+
+    def compact(self, now: float = None):
+        """
+        Drop chunks past retention and merge the chunks of each cell that
+        are older than COMPACT_AFTER_SECONDS into one. Returns (removed,
+        written) file counts.
+        """
+        now = time.time() if now is None else now
+        removed = written = 0
+        for level, _ in LEVELS:
+            level_dir = os.path.join(self.root, level)
+            if not os.path.isdir(level_dir):
+                continue
+            retention = RETENTION_SECONDS.get(level)
+            for name in os.listdir(level_dir):
+                first, second = name.split("_")
+                cell = (int(first), int(second))
+                with self._lock:
+                    dropped, merged = self._compact_cell(cell, level, now, retention)
+                removed += dropped
+                written += merged
+        return removed, written
+
+    def _compact_cell(self, cell, level: str, now: float, retention):
+        directory = self._cell_dir(cell, level)
+        lock = os.path.join(directory, ".compact.lock")
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Another worker is compacting this cell, unless it died doing so
+            if time.time() - os.path.getmtime(lock) > COMPACT_LOCK_STALE_SECONDS:
+                os.remove(lock)
+            return 0, 0
+        os.close(fd)
+        try:
+            self._chunks.pop((cell, level), None)
+            chunks = self._chunk_list(cell, level)
+            expired = [path for _, last, path in chunks if retention is not None and last < now - retention]
+            old = [path for _, last, path in chunks if path not in expired and last < now - COMPACT_AFTER_SECONDS]
+            written = 0
+            if len(old) > 1:
+                rows = np.concatenate([np.load(path) for path in old])
+                rows = rows[np.argsort(rows["t"], kind="stable")]
+                merged = self._write_chunk(cell, level, rows if level == "raw" else merge_buckets(rows))
+                old = [path for path in old if path != merged]  # same name, already replaced
+                written = 1
+            else:
+                old = []
+            # The merged chunk is in place before its inputs go away
+            for path in expired + old:
+                os.remove(path)
+            self._chunks.pop((cell, level), None)
+            return len(expired) + len(old), written
+        finally:
+            os.remove(lock)
+
+    def query(self, lat: float, lon: float, start: float, end: float, level: str):
+        """
+        Rows of one level between start and end (epoch seconds) for the
+        cell containing (lat, lon), including the still-open bucket
+        """
+        cell = location_cell(lat, lon)
+        dtype = RAW_DTYPE if level == "raw" else ROLLUP_DTYPE
+        parts = []
+        with self._lock:
+            for first, last, path in self._chunk_list(cell, level):
+                if last >= start and first <= end:
+                    parts.append(np.load(path, mmap_mode="r"))
+            series = self.cells.get(cell)
+            if series is not None:
+                parts.append(series.rings[level].peek_pending())
+                bucket = series.buckets.get(level)
+                if bucket is not None:
+                    parts.append(np.array([bucket.row()], dtype=dtype))
+
+        if not parts:
+            return np.zeros(0, dtype=dtype)
+        rows = np.concatenate(parts)
+        rows = rows[(rows["t"] >= start) & (rows["t"] <= end)]
+        rows = rows[np.argsort(rows["t"], kind="stable")]
+        return rows if level == "raw" else merge_buckets(rows)
+
+def merge_buckets(rows):
+    """
+    Combine rollup rows sharing a bucket start (written by different
+    workers): count-weighted mean, overall max, and the largest p95 as a
+    conservative bound. rows must be sorted by t.
+    """
+    if rows.size < 2 or (np.diff(rows["t"]) > 0).all():
+        return rows
+    starts, first = np.unique(rows["t"], return_index=True)
+    counts = rows["count"].astype(np.float64)
+    merged = np.zeros(starts.size, dtype=ROLLUP_DTYPE)
+    merged["t"] = starts
+    merged["count"] = np.add.reduceat(rows["count"], first)
+    merged["mean"] = np.add.reduceat(rows["mean"] * counts, first) / merged["count"]
+    merged["max"] = np.maximum.reduceat(rows["max"], first)
+    merged["p95"] = np.maximum.reduceat(rows["p95"], first)
+    return merged
+
+def pick_level(start: float, end: float, max_points: int = MAX_POINTS, now: float = None):
+    """
+    Finest level that still holds data from start and whose bucket count
+    over the range fits in max_points
+    """
+    now = time.time() if now is None else now
+    for name, seconds in LEVELS:
+        retention = RETENTION_SECONDS.get(name)
+        if retention is not None and start < now - retention:
+            continue
+        if (end - start) / seconds <= max_points:
+            return name
+    return LEVELS[-1][0]
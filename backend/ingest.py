@@ -0,0 +1,307 @@
+"""
+Station reading ingestion.
+
+Sources listed in data/sources.json are polled through one pooled async
+HTTP client with a concurrency limit, retries and conditional GETs. The
+readings are normalized into a columnar in-memory StationStore which
+/aqi answers from when a station is close enough. A source that has not
+answered for a few refresh intervals is dropped from the store.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from geo import PointIndex
+
+SOURCES_PATH = os.environ.get(
+    "AQI_SOURCES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sources.json")
+)
+
+POLLUTANT_FIELDS = ["pm25", "pm10", "no2", "so2", "co", "o3", "nh3", "pb"]
+STATION_MAX_KM = 10.0
+STALE_AFTER_REFRESHES = 3
+
+class Source:
+    """
+    One HTTP endpoint serving station readings as CSV or JSON.
+
+    fields maps our column names (station_id, name, lat, lon, aqi,
+    timestamp and any pollutant) to the source's own field names.
+    """
+
+    def __init__(self, name: str, url: str, format: str = "json", fields: dict = None, records_path: str = None, enabled: bool = True):
+        self.name = name
+        self.url = url
+        self.format = format
+        self.fields = fields or {}
+        self.records_path = records_path
+        self.enabled = enabled
+        self.etag = None
+        self.last_modified = None
+
+    def field(self, column: str):
+        return self.fields.get(column, column)
+
+def load_sources(path: str = SOURCES_PATH):
+    """
+    Read (refresh interval, enabled sources) from the sources file
+    """
+    if not os.path.exists(path):
+        return 300, []
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    sources = [Source(**entry) for entry in config.get("sources", [])]
+    return config.get("refresh_interval", 300), [s for s in sources if s.enabled]
+
+def parse_records(source: Source, body: bytes):
+    """
+    Decode a response body into a list of row dicts
+    """
+    if source.format == "csv":
+        return list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+    payload = json.loads(body)
+    if source.records_path:
+        for key in source.records_path.split("."):
+            payload = payload[key]
+    return payload
+
+def normalize(source: Source, rows):
+    """
+    Columnar arrays for the rows that have a station id, a position and an AQI
+    """
+    ids, names, lats, lons, aqi, observed = [], [], [], [], [], []
+    pollutants = {key: [] for key in POLLUTANT_FIELDS}
+    for row in rows:
+        try:
+            lat = float(row[source.field("lat")])
+            lon = float(row[source.field("lon")])
+            value = float(row[source.field("aqi")])
+            station_id = f"{source.name}:{row[source.field('station_id')]}"
+        except (KeyError, TypeError, ValueError):
+            continue
+        ids.append(station_id)
+        names.append(row.get(source.field("name")) or station_id)
+        lats.append(lat)
+        lons.append(lon)
+        aqi.append(value)
+        observed.append(row.get(source.field("timestamp")) or datetime.now().isoformat())
+        for key in POLLUTANT_FIELDS:
+            pollutants[key].append(_to_float(row.get(source.field(key))))
+
+    return {
+        "station_id": np.array(ids, dtype=object),
+        "name": np.array(names, dtype=object),
+        "lat": np.array(lats, dtype=np.float64),
+        "lon": np.array(lons, dtype=np.float64),
+        "aqi": np.array(aqi, dtype=np.float64),
+        "observed_at": np.array(observed, dtype=object),
+        **{key: np.array(values, dtype=np.float64) for key, values in pollutants.items()}
+    }
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class StationStore:
+    """
+    Latest reading per station as numpy columns plus a KD-tree over the
+    station positions. Every update swaps in a new immutable snapshot.
+    """
+
+    COLUMNS = ["station_id", "name", "lat", "lon", "aqi", "observed_at"] + POLLUTANT_FIELDS
+
+    def __init__(self):
+        self._by_source = {}
+        self._seen_at = {}
+        self._lock = threading.Lock()
+        self.updated_at = None
+        self.columns = normalize(Source("", ""), [])
+        self.index = PointIndex([], [])
+
+    def __len__(self):
+        return int(self.columns["lat"].size)
+
+    def _rebuild(self):
+        if self._by_source:
+            merged = {
+                column: np.concatenate([cols[column] for cols in self._by_source.values()])
+                for column in self.COLUMNS
+            }
+        else:
+            merged = normalize(Source("", ""), [])
+        self.columns, self.index = merged, PointIndex(merged["lat"], merged["lon"])
+        self.updated_at = datetime.now()
+
+    def update(self, source_name: str, columns: dict):
+        with self._lock:
+            self._by_source[source_name] = columns
+            self._seen_at[source_name] = time.time()
+            self._rebuild()
+
+    def touch(self, source_name: str):
+        """
+        Record that a source answered without new readings (304)
+        """
+        with self._lock:
+            if source_name in self._by_source:
+                self._seen_at[source_name] = time.time()
+
+    def expire(self, max_age: float, now: float = None):
+        """
+        Drop the readings of sources not heard from in max_age seconds;
+        names of the dropped sources
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [name for name, seen_at in self._seen_at.items() if now - seen_at > max_age]
+            for name in stale:
+                del self._by_source[name], self._seen_at[name]
+            if stale:
+                self._rebuild()
+        return stale
+
+    def nearest(self, lat: float, lon: float, max_km: float = STATION_MAX_KM):
+        """
+        Latest reading of the closest station within max_km, or None
+        """
+        columns, index = self.columns, self.index
+        distance, idx = index.nearest(lat, lon, max_km=max_km)
+        if idx >= len(index):
+            return None
+        return {
+            "station_id": columns["station_id"][idx],
+            "name": columns["name"][idx],
+            "lat": float(columns["lat"][idx]),
+            "lon": float(columns["lon"][idx]),
+            "distance_km": round(float(distance), 2),
+            "aqi": float(columns["aqi"][idx]),
+            "observed_at": columns["observed_at"][idx],
+            "pollutants": {key: float(columns[key][idx]) for key in POLLUTANT_FIELDS if not np.isnan(columns[key][idx])}
+        }
+
+class Fetcher:
+    """
+    Pooled async HTTP client with a concurrency limit, retries with
+    exponential backoff and ETag/Last-Modified revalidation
+    """
+
+    def __init__(self, concurrency: int = 8, retries: int = 3, backoff: float = 0.5, timeout: float = 10.0, transport=None):
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport
+        )
+
+    async def fetch(self, source: Source):
+        """
+        Response body, or None when the source answered 304 Not Modified
+        """
+        headers = {}
+        if source.etag:
+            headers["If-None-Match"] = source.etag
+        if source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self._client.get(source.url, headers=headers)
+                    if response.status_code < 500:
+                        break
+                except httpx.TransportError:
+                    if attempt == self.retries:
+                        raise
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        source.etag = response.headers.get("etag", source.etag)
+        source.last_modified = response.headers.get("last-modified", source.last_modified)
+        return response.content
+
+    async def aclose(self):
+        await self._client.aclose()
+
+class Ingestor:
+    def __init__(self, sources, store: StationStore, refresh_interval: float = 300, fetcher: Fetcher = None, max_age: float = None):
+        self.sources = sources
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age if max_age is not None else refresh_interval * STALE_AFTER_REFRESHES
+        self.fetcher = fetcher
+        self.errors = {}
+        self.expired = []
+        self.listeners = []
+        self._task = None
+
+    def ingest(self, source: Source, body: bytes):
+        self.store.update(source.name, normalize(source, parse_records(source, body)))
+
+    async def refresh_source(self, source: Source):
+        try:
+            body = await self.fetcher.fetch(source)
+            if body is not None:
+                # Parsing and the KD-tree rebuild are CPU bound
+                await asyncio.to_thread(self.ingest, source, body)
+            else:
+                self.store.touch(source.name)
+            self.errors.pop(source.name, None)
+        except Exception as e:
+            self.errors[source.name] = str(e)
+
+    async def refresh(self):
+        if self.fetcher is None:
+            self.fetcher = Fetcher()
+        updated_at = self.store.updated_at
+        await asyncio.gather(*(self.refresh_source(source) for source in self.sources))
+        self.expired = await asyncio.to_thread(self.store.expire, self.max_age)
+        if self.store.updated_at != updated_at:
+            # Listeners do CPU heavy rebuilds, keep them off the event loop
+            for listener in self.listeners:
+                await asyncio.to_thread(listener, self.store)
+
+    async def run_forever(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self.sources and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.fetcher is not None:
+            await self.fetcher.aclose()
+            self.fetcher = None
+
+    def status(self):
+        return {
+            "sources": [source.name for source in self.sources],
+            "stations": len(self.store),
+            "updated_at": self.store.updated_at.isoformat() if self.store.updated_at else None,
+            "errors": dict(self.errors),
+            "expired": list(self.expired)
+        }
@@ -0,0 +1,148 @@
+"""
+Spatial interpolation of station readings.
+
+IDWInterpolator weights the k nearest stations by inverse distance.
+AQIGrid evaluates it once per update cycle over a regular lat/lon
+raster so point queries become array lookups (nearest cell or
+bilinear between cell centres).
+"""
+import threading
+import numpy as np
+
+from geo import PointIndex
+
+IDW_NEIGHBOURS = 8
+IDW_POWER = 2
+IDW_MAX_KM = 50.0
+
+# India bounding box and ~5 km cells
+GRID_BOUNDS = (6.0, 37.5, 68.0, 98.0)  # lat_min, lat_max, lon_min, lon_max
+GRID_RESOLUTION_DEG = 0.05
+
+class IDWInterpolator:
+    def __init__(self, lats, lons, values, k: int = IDW_NEIGHBOURS, power: float = IDW_POWER, max_km: float = IDW_MAX_KM):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.index = PointIndex(lats, lons)
+        self.k = min(k, len(self.index)) if len(self.index) else 1
+        self.power = power
+        self.max_km = max_km
+
+    def query(self, lats, lons):
+        """
+        Interpolated value for every point, NaN where no station is
+        within max_km
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        if len(self.index) == 0:
+            return np.full(lats.shape, np.nan)
+        distances, idx = self.index.nearest(lats, lons, k=self.k, max_km=self.max_km)
+        if self.k == 1:
+            distances, idx = distances[..., None], idx[..., None]
+
+        found = idx < len(self.index)
+        values = self.values[np.where(found, idx, 0)]
+        with np.errstate(divide="ignore"):
+            weights = np.where(found, 1.0 / np.maximum(distances, 1e-6) ** self.power, 0.0)
+
+        total = weights.sum(axis=-1)
+        with np.errstate(invalid="ignore"):
+            result = (weights * values).sum(axis=-1) / total
+        return np.where(total > 0, result, np.nan)
+
+class AQIGrid:
+    """
+    Raster of values at cell centres. query(lats, lons) is evaluated once
+    for every centre, e.g. IDWInterpolator.query.
+    """
+
+    def __init__(self, query, bounds=GRID_BOUNDS, resolution: float = GRID_RESOLUTION_DEG):
+        self.lat_min, self.lat_max, self.lon_min, self.lon_max = bounds
+        self.resolution = resolution
+        self.shape = (
+            int(np.ceil((self.lat_max - self.lat_min) / resolution)),
+            int(np.ceil((self.lon_max - self.lon_min) / resolution))
+        )
+        self.lat_centers = self.lat_min + (np.arange(self.shape[0]) + 0.5) * resolution
+        self.lon_centers = self.lon_min + (np.arange(self.shape[1]) + 0.5) * resolution
+        lat_grid, lon_grid = np.meshgrid(self.lat_centers, self.lon_centers, indexing="ij")
+        self.values = np.asarray(query(lat_grid.ravel(), lon_grid.ravel()), dtype=np.float64).reshape(self.shape)
+
+    def cell_indexes(self, lats, lons):
+        """
+        (row, col, inside) arrays for the cells containing each point
+        """
+        rows = np.floor((np.asarray(lats, dtype=np.float64) - self.lat_min) / self.resolution).astype(np.int64)
+        cols = np.floor((np.asarray(lons, dtype=np.float64) - self.lon_min) / self.resolution).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        return np.clip(rows, 0, self.shape[0] - 1), np.clip(cols, 0, self.shape[1] - 1), inside
+
+    def lookup(self, lats, lons):
+        """
+        Value of the containing cell for every point, NaN outside the grid
+        """
+        rows, cols, inside = self.cell_indexes(lats, lons)
+        return np.where(inside, self.values[rows, cols], np.nan)
+
+    def sample(self, lats, lons):
+        """
+        Bilinear interpolation between the four surrounding cell centres,
+        NaN outside the grid. Broadcasts lats against lons, so a column of
+        latitudes and a row of longitudes sample a whole raster at once.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        inside = (lats >= self.lat_min) & (lats < self.lat_max) & (lons >= self.lon_min) & (lons < self.lon_max)
+
+        # Fractional positions in cell-centre coordinates, clamped at the edges
+        fy = np.clip((lats - self.lat_min) / self.resolution - 0.5, 0, self.shape[0] - 1)
+        fx = np.clip((lons - self.lon_min) / self.resolution - 0.5, 0, self.shape[1] - 1)
+        y0 = np.minimum(fy.astype(np.int64), max(self.shape[0] - 2, 0))
+        x0 = np.minimum(fx.astype(np.int64), max(self.shape[1] - 2, 0))
+        y1 = np.minimum(y0 + 1, self.shape[0] - 1)
+        x1 = np.minimum(x0 + 1, self.shape[1] - 1)
+        wy = fy - y0
+        wx = fx - x0
+
+        top = self.values[y0, x0] * (1 - wx) + self.values[y0, x1] * wx
+        bottom = self.values[y1, x0] * (1 - wx) + self.values[y1, x1] * wx
+        return np.where(inside, top * (1 - wy) + bottom * wy, np.nan)
+
+class AQIField:
+    """
+    Current interpolated AQI field, rebuilt from a StationStore each
+    update cycle and swapped in atomically
+    """
+
+    def __init__(self, bounds=GRID_BOUNDS, resolution: float = GRID_RESOLUTION_DEG):
+        self.bounds = bounds
+        self.resolution = resolution
+        self.interpolator = None
+        self.grid = None
+        self.built_at = None
+        self._lock = threading.Lock()
+
+    def rebuild(self, store):
+        columns = store.columns
+        if columns["lat"].size == 0:
+            return
+        interpolator = IDWInterpolator(columns["lat"], columns["lon"], columns["aqi"])
+        grid = AQIGrid(interpolator.query, self.bounds, self.resolution)
+        with self._lock:
+            self.interpolator, self.grid = interpolator, grid
+            self.built_at = store.updated_at
+
+    def values_at(self, lats, lons):
+        """
+        Interpolated AQI for every point, NaN where no station data
+        applies. Points outside the grid fall back to direct IDW.
+        """
+        interpolator, grid = self.interpolator, self.grid
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        if grid is None:
+            return np.full(lats.shape, np.nan)
+        values = grid.lookup(lats, lons)
+        _, _, inside = grid.cell_indexes(lats, lons)
+        if not inside.all():
+            values[~inside] = interpolator.query(lats[~inside], lons[~inside])
+        return values
@@ -0,0 +1,311 @@
+"""
+Durable background jobs.
+
+JobQueue keeps jobs in a SQLite table (WAL mode) so they survive
+restarts and can be shared by every worker process. Jobs are claimed
+with a lease: a worker that dies mid-job leaves it to be picked up again
+once the lease expires. An optional dedup key makes enqueue idempotent,
+the second filing with the same key gets the first job back.
+
+WorkerPool runs the handlers. Each worker claims a small batch, runs the
+handler in a thread so rendering and I/O stay off the event loop, and
+marks the job done or schedules a retry with exponential backoff.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db")
+
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 2.0
+POLL_SECONDS = 1.0
+CLAIM_BATCH = 8
+DONE_RETENTION_SECONDS = 7 * 24 * 3600
+WORKERS = int(os.environ.get("AQI_JOB_WORKERS", "2"))
+
+STATUSES = ("queued", "running", "done", "failed")
+
+class JobQueue:
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dedup_key TEXT UNIQUE,
+                ref TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_until REAL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_ref ON jobs (ref);
+        """)
+        self.listeners = []
+
+    def enqueue(self, kind: str, payload: dict, dedup_key: str = None, ref: str = None, delay: float = 0.0):
+        """
+        Add one job. ref names the entity the job works on (e.g. a
+        complaint id) for later lookups. Returns (job id, payload, created)
+        where created is False when a job with the same dedup key already
+        existed; the payload is then the one stored with the original job.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, kind, dedup_key, ref, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, dedup_key, ref, json.dumps(payload), now + delay, now, now)
+            )
+            created = cursor.rowcount == 1
+            if not created:
+                job_id, stored = self._conn.execute(
+                    "SELECT id, payload FROM jobs WHERE dedup_key = ?", (dedup_key,)
+                ).fetchone()
+                payload = json.loads(stored)
+        if created:
+            self._notify()
+        return job_id, payload, created
+
+    def enqueue_many(self, kind: str, payloads, refs=None, dedup_keys=None, delay: float = 0.0):
+        """
+        Add many jobs in one transaction. Jobs whose dedup key already
+        exists are skipped. Returns (job id, payload, created) per payload
+        as enqueue does.
+        """
+        now = time.time()
+        payloads = list(payloads)
+        refs = refs if refs is not None else [None] * len(payloads)
+        dedup_keys = dedup_keys if dedup_keys is not None else [None] * len(payloads)
+        rows = [
+            (uuid.uuid4().hex, kind, dedup_key, ref, json.dumps(payload), now + delay, now, now)
+            for payload, ref, dedup_key in zip(payloads, refs, dedup_keys)
+        ]
+        if not rows:
+            return []
+        results = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for row, payload in zip(rows, payloads):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (id, kind, dedup_key, ref, payload, status, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    row
+                )
+                if cursor.rowcount == 1:
+                    results.append((row[0], payload, True))
+                else:
+                    job_id, stored = self._conn.execute(
+                        "SELECT id, payload FROM jobs WHERE dedup_key = ?", (row[2],)
+                    ).fetchone()
+                    results.append((job_id, json.loads(stored), False))
+            self._conn.execute("COMMIT")
+        if any(created for _, _, created in results):
+            self._notify()
+        return results
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
+
+    def claim(self, limit: int = CLAIM_BATCH, lease: float = LEASE_SECONDS):
+        """
+        Lease up to limit ready jobs, oldest first. Jobs whose lease ran
+        out count as ready again.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                "WHERE id IN ("
+                "  SELECT id FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "  OR (status = 'running' AND lease_until <= ?) ORDER BY available_at LIMIT ?"
+                ") RETURNING id, kind, payload, attempts",
+                (now + lease, now, now, now, limit)
+            ).fetchall()
+        return [
+            {"id": job_id, "kind": kind, "payload": json.loads(payload), "attempts": attempts}
+            for job_id, kind, payload, attempts in rows
+        ]
+
+    def complete(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str, attempts: int, max_attempts: int = MAX_ATTEMPTS):
+        """
+        Schedule a retry with exponential backoff, or give up after
+        max_attempts
+        """
+        now = time.time()
+        status = "failed" if attempts >= max_attempts else "queued"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_until = NULL, error = ?, updated_at = ? WHERE id = ?",
+                (status, now + RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), error, now, job_id)
+            )
+
+    def get(self, job_id: str):
+        return self._fetch_one("WHERE id = ?", (job_id,))
+
+    def find(self, kind: str, ref: str):
+        """
+        Most recent job of one kind for an entity
+        """
+        return self._fetch_one("WHERE kind = ? AND ref = ? ORDER BY created_at DESC LIMIT 1", (kind, ref))
+
+    def _fetch_one(self, where: str, params):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, kind, ref, payload, status, attempts, error FROM jobs {where}", params
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, kind, ref, payload, status, attempts, error = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "ref": ref,
+            "payload": json.loads(payload),
+            "status": status,
+            "attempts": attempts,
+            "error": error
+        }
+
+    def prune(self, older_than: float = DONE_RETENTION_SECONDS):
+        """
+        Drop finished jobs; their dedup keys become free again
+        """
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (time.time() - older_than,)
+            ).rowcount
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status").fetchall()
+        counts = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, dict.fromkeys(STATUSES, 0))[status] = count
+        return counts
+
+    def close(self):
+        self._conn.close()
+
+class WorkerPool:
+    """
+    handlers maps a job kind to a function taking the payload. Handlers
+    run in threads and may enqueue follow-up jobs themselves.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: dict, concurrency: int = WORKERS, poll: float = POLL_SECONDS):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll = poll
+        self.processed = 0
+        self.failed = 0
+        self._wakeup = None
+        self._loop = None
+        self._tasks = []
+        self._stopping = False
+
+    def wake(self):
+        """
+        Called on enqueue so idle workers start at once instead of
+        waiting for the next poll; safe from any thread
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run_worker(self):
+        while not self._stopping:
+            jobs = await asyncio.to_thread(self.queue.claim)
+            if not jobs:
+                self._wakeup.clear()
+                try:
+                    # Jobs from other processes and delayed retries are found by polling
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for job in jobs:
+                if self._stopping:
+                    break  # unstarted jobs come back when their lease runs out
+                await self.run_job(job)
+
+    async def run_job(self, job: dict):
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for job kind {job['kind']}")
+            await asyncio.to_thread(handler, job["payload"])
+        except Exception as e:
+            self.failed += 1
+            await asyncio.to_thread(self.queue.fail, job["id"], f"{type(e).__name__}: {e}", job["attempts"])
+        else:
+            self.processed += 1
+            await asyncio.to_thread(self.queue.complete, job["id"])
+
+    def start(self):
+        if self._tasks or self.concurrency <= 0:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.queue.listeners.append(self.wake)
+        self._tasks = [self._loop.create_task(self.run_worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 5.0):
+        """
+        Let running jobs finish for up to timeout seconds, then cancel
+        """
+        if self.wake in self.queue.listeners:
+            self.queue.listeners.remove(self.wake)
+        self._stopping = True
+        if self._tasks:
+            self._wakeup.set()
+            await asyncio.wait(self._tasks, timeout=timeout)
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._loop = None
+
+    def stats(self):
+        return {
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "jobs": self.queue.stats()
+        }
+
+def create_job_queue():
+    """
+    Queue at AQI_JOB_DB (":memory:" keeps jobs in this process only)
+    """
+    return JobQueue(os.environ.get("AQI_JOB_DB", DEFAULT_DB_PATH))
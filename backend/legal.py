@@ -0,0 +1,171 @@
+"""
+Legal threshold rule engine.
+
+The law catalogue is loaded once from data/laws.json into immutable rule
+sets, one per (pollutant, state), each sorted by threshold. A value
+violates every law whose threshold it exceeds, so evaluation is a single
+bisect and the summary fields come from prefix tables built at load time.
+"""
+from bisect import bisect_left
+import json
+import os
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+
+from bands import ACTION_URGENCY, SEVERE_EXCESS, VIOLATION_SEVERITY, freeze
+
+LAWS_PATH = os.environ.get(
+    "AQI_LAWS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "laws.json")
+)
+
+class Law(NamedTuple):
+    name: str
+    code: str
+    threshold: float
+    authority: str
+    penalties: Tuple[str, ...]
+    section: str
+    pollutant: str = "aqi"
+    states: Optional[Tuple[str, ...]] = None
+
+    def fields(self):
+        return {
+            "name": self.name,
+            "code": self.code,
+            "threshold": self.threshold,
+            "authority": self.authority,
+            "penalties": freeze(self.penalties),
+            "section": self.section,
+            "pollutant": self.pollutant
+        }
+
+def categorize_violation_severity(excess: float):
+    return VIOLATION_SEVERITY.lookup(excess)
+
+def action_required(value: float):
+    return ACTION_URGENCY.lookup(value)
+
+class RuleSet:
+    """
+    Laws for one pollutant and jurisdiction, sorted by threshold
+    """
+
+    def __init__(self, laws):
+        self.laws = tuple(sorted(laws, key=lambda law: law.threshold))
+        self.thresholds = tuple(law.threshold for law in self.laws)
+        self._fields = tuple(law.fields() for law in self.laws)
+        self._threshold_array = np.array(self.thresholds, dtype=np.float64)
+        self._threshold_sums = np.concatenate([[0.0], np.cumsum(self._threshold_array)])
+
+        # highest_penalty[k] is the longest penalty among the first k laws
+        self.highest_penalty = ["None"]
+        for law in self.laws:
+            best = self.highest_penalty[-1] if len(self.highest_penalty) > 1 else ""
+            for penalty in law.penalties:
+                if len(penalty) > len(best):
+                    best = penalty
+            self.highest_penalty.append(best)
+        self.highest_penalty = freeze(self.highest_penalty)
+        self.law_names = freeze([law.name for law in self.laws])
+
+    def __len__(self):
+        return len(self.laws)
+
+    def count_violations(self, value: float):
+        return bisect_left(self.thresholds, value)
+
+    def violations(self, value: float):
+        """
+        Violation records for every law exceeded by value
+        """
+        return [
+            {
+                **fields,
+                "current_aqi": value,
+                "excess": value - fields["threshold"],
+                "excess_percentage": ((value - fields["threshold"]) / fields["threshold"]) * 100,
+                "severity": categorize_violation_severity(value - fields["threshold"]),
+                "action_required": action_required(value),
+                "complaint_basis": f"Violation of {fields['name']} exceeding threshold by {value - fields['threshold']} points"
+            }
+            for fields in self._fields[:self.count_violations(value)]
+        ]
+
+    def summary(self, value: float):
+        count = self.count_violations(value)
+        return {
+            "total_violations": count,
+            "major_violations": bisect_left(self.thresholds, value - SEVERE_EXCESS),
+            "total_excess": count * value - float(self._threshold_sums[count]),
+            "highest_penalty": self.highest_penalty[count],
+            "legal_status": "COMPLIANT" if count == 0 else "NON-COMPLIANT"
+        }
+
+    def evaluate_many(self, values):
+        """
+        Vectorized summary for an array of values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.searchsorted(self._threshold_array, values, side="left")
+        return {
+            "total_violations": counts,
+            "major_violations": np.searchsorted(self._threshold_array, values - SEVERE_EXCESS, side="left"),
+            "total_excess": counts * values - self._threshold_sums[counts],
+            "highest_penalty": counts,
+            "compliant": counts == 0
+        }
+
+class LawCatalogue:
+    """
+    Rule sets keyed by (pollutant, state). A state's rule set holds the
+    national laws plus the laws scoped to that state.
+    """
+
+    def __init__(self, laws):
+        self.laws = tuple(laws)
+        national = {}
+        scoped = {}
+        for law in self.laws:
+            if law.states:
+                for state in law.states:
+                    scoped.setdefault((law.pollutant, state.lower()), []).append(law)
+            else:
+                national.setdefault(law.pollutant, []).append(law)
+
+        self._rulesets = {(pollutant, None): RuleSet(group) for pollutant, group in national.items()}
+        for (pollutant, state), group in scoped.items():
+            self._rulesets[(pollutant, state)] = RuleSet(national.get(pollutant, []) + group)
+        self._empty = RuleSet([])
+        self.pollutants = frozenset(law.pollutant for law in self.laws)
+
+    @classmethod
+    def load(cls, path: str = LAWS_PATH):
+        with open(path, encoding="utf-8") as f:
+            catalogue = json.load(f)
+        return cls([
+            Law(
+                name=entry["name"],
+                code=entry["code"],
+                threshold=entry["threshold"],
+                authority=entry["authority"],
+                penalties=tuple(entry["penalties"]),
+                section=entry["section"],
+                pollutant=entry.get("pollutant", "aqi"),
+                states=tuple(entry["states"]) if entry.get("states") else None
+            )
+            for entry in catalogue["laws"]
+        ])
+
+    def rules(self, pollutant: str = "aqi", state: Optional[str] = None):
+        """
+        Rule set for pollutant in state; ValueError for a pollutant no
+        law covers
+        """
+        if pollutant not in self.pollutants:
+            raise ValueError(f"Unknown pollutant {pollutant!r}, expected one of {sorted(self.pollutants)}")
+        if state:
+            ruleset = self._rulesets.get((pollutant, state.lower()))
+            if ruleset is not None:
+                return ruleset
+        return self._rulesets.get((pollutant, None), self._empty)
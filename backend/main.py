@@ -1,13 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import Optional, List
-import requests
 import numpy as np
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import json
+import time
 import uuid
 
+from attribution import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, SOURCE_TYPES, EmitterCatalogue
+from bands import AQI_CATEGORIES, AQI_CATEGORY_COLORS, AQI_CATEGORY_NAMES, HEALTH_RISKS, MEDICAL_ESCALATION, NAQI_CATEGORIES, PREDICTION_ALERTS
+from bulk import BulkItemError, DuplexStreamingResponse, iter_json_records
+from cache import ResponseCache, location_cell, time_bucket
+from stream import CellBroadcaster, STREAM_TICK_SECONDS, sse_events
+from forecast import forecast_aqi, MAX_FORECAST_HOURS
+from documents import ArtifactStore, DocumentRenderer, FORMATS as DOCUMENT_FORMATS, artifact_response
+from exposure import AQI_PER_CIGARETTE, DEFAULT_PEAK_AQI, DEFAULT_PEAKS, track_exposure, validate_track
+from geo import Gazetteer
+from history import HistoryStore, MAX_POINTS as HISTORY_MAX_POINTS, pick_level
+from ingest import Ingestor, StationStore, load_sources
+from interpolate import AQIField, AQIGrid
+from jobs import WorkerPool, create_job_queue
+from legal import LawCatalogue
+from metrics import Gauge, MetricsMiddleware, MetricsRegistry, SamplingProfiler
+from naqi import POLLUTANTS as NAQI_POLLUTANTS, UNITS as NAQI_UNITS, compute_naqi, concentration_for
+from notifications import authority_address, create_notification_sink
+from responses import FastJSONRoute, prebuilt
+from rng import RNGService
+from storage import create_complaint_store
+from subscriptions import AlertEngine, SubscriptionIndex
+from tiles import MAX_ZOOM, MIN_ZOOM, TileLayer, tile_response
+from timeline import NEXT_MILESTONES, status_update
+from users import create_user_store
+
 app = FastAPI(
     title="Air Justice API",
     description="AI-powered pollution monitoring and legal complaint system",
@@ -16,6 +44,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# orjson responses with ?fields= sparse fieldsets on every route
+app.router.route_class = FastJSONRoute
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +56,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus metrics and the opt-in sampling profiler (AQI_PROFILE_EVERY)
+metrics_registry = MetricsRegistry()
+profiler = SamplingProfiler()
+app.add_middleware(MetricsMiddleware, registry=metrics_registry, profiler=profiler)
+
 # Models
 class Location(BaseModel):
     lat: float
@@ -42,9 +78,185 @@ class ComplaintData(BaseModel):
     description: Optional[str] = None
     source_type: Optional[str] = None
 
-# Mock database
-complaints_db = []
-users_db = {}
+class LegalAudit(BaseModel):
+    values: List[float]
+    pollutant: str = "aqi"
+    state: Optional[str] = None
+
+class UserRegistration(BaseModel):
+    location: Location
+    profile: Optional[UserProfile] = None
+    threshold: float = 101
+    contact: Optional[str] = None
+
+class ExposureTrack(BaseModel):
+    """
+    GPS fixes in order, timestamps in epoch seconds
+    """
+    lats: List[float]
+    lons: List[float]
+    timestamps: List[float]
+
+class BatchLocations(BaseModel):
+    lats: List[float]
+    lons: List[float]
+
+class PollutantReadings(BaseModel):
+    """
+    Columnar concentrations in CPCB units, null where not measured
+    """
+    pm25: Optional[List[Optional[float]]] = None
+    pm10: Optional[List[Optional[float]]] = None
+    no2: Optional[List[Optional[float]]] = None
+    so2: Optional[List[Optional[float]]] = None
+    co: Optional[List[Optional[float]]] = None
+    o3: Optional[List[Optional[float]]] = None
+    nh3: Optional[List[Optional[float]]] = None
+    pb: Optional[List[Optional[float]]] = None
+
+# Storage
+complaint_store = create_complaint_store()
+users_db = create_user_store()
+
+# Reverse geocoding, loaded once at startup
+gazetteer = Gazetteer.load()
+
+# Law catalogue, loaded once at startup
+law_catalogue = LawCatalogue.load()
+
+# Known emitters for source attribution, loaded once at startup
+emitter_catalogue = EmitterCatalogue.load()
+
+# Legal documents, templates compiled once at startup
+document_renderer = DocumentRenderer()
+artifact_store = ArtifactStore()
+
+# Station readings, refreshed in the background from data/sources.json
+station_store = StationStore()
+refresh_interval, sources = load_sources()
+ingestor = Ingestor(sources, station_store, refresh_interval)
+aqi_field = AQIField()
+ingestor.listeners.append(aqi_field.rebuild)
+
+# AQI history with 1m/1h/1d rollups, flushed to disk and compacted periodically
+history_store = HistoryStore()
+HISTORY_FLUSH_SECONDS = 60
+HISTORY_COMPACT_SECONDS = 3600
+
+# Live AQI fan-out, one computation per active cell per tick
+aqi_broadcaster = CellBroadcaster(lambda lats, lons: stream_cell_updates(lats, lons))
+
+# Shared response cache, TTLs match the advertised update interval
+response_cache = ResponseCache()
+AQI_CACHE_TTL = 300
+PREDICT_CACHE_TTL = 900
+SOURCES_CACHE_TTL = 1800
+
+# AQI heatmap tiles, one grid and one render per tile per update tick
+tile_layer = TileLayer(lambda: AQIGrid(lambda lats, lons: current_aqi_values(lats, lons, datetime.now())))
+TILE_TICK_SECONDS = AQI_CACHE_TTL
+
+# Seeded random streams for the simulated values, keyed by cell and time bucket
+rng_service = RNGService()
+
+# Durable job queue: complaint analysis, documents and authority notifications
+job_queue = create_job_queue()
+notification_sink = create_notification_sink()
+job_workers = WorkerPool(job_queue, {
+    "complaint.file": lambda payload: process_complaint_job(payload),
+    "complaint.document": lambda payload: render_document_job(payload),
+    "complaint.notify": lambda payload: notify_authority_job(payload),
+    "alert.notify": lambda payload: notify_alerts_job(payload)
+})
+COMPLAINT_DEDUP_WINDOW = 3600
+JOB_PRUNE_SECONDS = 3600
+
+# Threshold alerts for registered users, matched once per stream tick by
+# whichever worker holds the alert lease
+user_subscriptions = SubscriptionIndex({}, lambda lats, lons: current_aqi_values(lats, lons, datetime.now()))
+alert_engine = AlertEngine(users_db, user_subscriptions, lambda alerts: enqueue_alerts(alerts), tick=STREAM_TICK_SECONDS)
+ALERT_JOB_BATCH = 500
+
+# Time-based complaint status transitions, applied in bulk
+STATUS_ADVANCE_SECONDS = 60
+
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    ingestor.start()
+    aqi_broadcaster.start()
+    alert_engine.start()
+    background_tasks.append(asyncio.get_running_loop().create_task(flush_history_forever()))
+    background_tasks.append(asyncio.get_running_loop().create_task(compact_history_forever()))
+    background_tasks.append(asyncio.get_running_loop().create_task(prune_jobs_forever()))
+    background_tasks.append(asyncio.get_running_loop().create_task(advance_statuses_forever()))
+    job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await aqi_broadcaster.stop()
+    await alert_engine.stop()
+    await ingestor.stop()
+    await job_workers.stop()
+    history_store.flush()
+    complaint_store.close()
+    job_queue.close()
+    users_db.close()
+
+async def flush_history_forever():
+    while True:
+        await asyncio.sleep(HISTORY_FLUSH_SECONDS)
+        await asyncio.to_thread(history_store.flush)
+
+async def compact_history_forever():
+    while True:
+        await asyncio.sleep(HISTORY_COMPACT_SECONDS)
+        await asyncio.to_thread(history_store.compact)
+
+async def advance_statuses_forever():
+    while True:
+        await asyncio.to_thread(complaint_store.advance)
+        await asyncio.sleep(STATUS_ADVANCE_SECONDS)
+
+async def prune_jobs_forever():
+    while True:
+        await asyncio.to_thread(job_queue.prune)
+        await asyncio.sleep(JOB_PRUNE_SECONDS)
+
+API_ENDPOINTS = prebuilt({
+    "/": "API info",
+    "/health": "Health check",
+    "/aqi": "Get AQI data",
+    "/aqi/batch": "Get AQI data for many locations",
+    "/aqi/stream": "Live AQI updates (Server-Sent Events)",
+    "/aqi/history": "AQI history with rollups",
+    "/aqi/tiles/{z}/{x}/{y}": "AQI heatmap tiles (PNG) for map overlays",
+    "/aqi/naqi": "Indian NAQI from pollutant concentrations",
+    "/aqi/predict": "Predict AQI",
+    "/aqi/predict/batch": "Predict AQI for many locations",
+    "/legal/check": "Check legal violations",
+    "/legal/audit": "Check legal violations for many values",
+    "/health/impact": "Health impact analysis",
+    "/exposure": "Cumulative exposure along a GPS track",
+    "/complaint/file": "File complaint (queued, 202)",
+    "/complaint/bulk": "File many complaints (NDJSON stream)",
+    "/complaint/status/{id}": "Check complaint status",
+    "/complaint/{id}/document": "Download legal document",
+    "/sources/detect": "Detect pollution sources",
+    "/sources/attribute/batch": "Source attribution for many locations",
+    "/cache/stats": "Response cache statistics",
+    "/metrics": "Prometheus metrics",
+    "/debug/profile": "Sampling profiler (collapsed stacks)",
+    "/ingest/status": "Station ingestion status",
+    "/jobs/stats": "Background job queue status",
+    "/users": "Register a profile with an AQI alert threshold",
+    "/users/{id}": "Get or delete a registered profile",
+    "/recommendations": "Get personalized recommendations"
+})
 
 @app.get("/")
 async def root():
@@ -53,20 +265,17 @@ async def root():
         "version": "2.0.0",
         "status": "operational",
         "timestamp": datetime.now().isoformat(),
-        "endpoints": {
-            "/": "API info",
-            "/health": "Health check",
-            "/aqi": "Get AQI data",
-            "/aqi/predict": "Predict AQI",
-            "/legal/check": "Check legal violations",
-            "/health/impact": "Health impact analysis",
-            "/complaint/file": "File complaint",
-            "/complaint/status/{id}": "Check complaint status",
-            "/sources/detect": "Detect pollution sources",
-            "/recommendations": "Get personalized recommendations"
-        }
+        "endpoints": API_ENDPOINTS
     }
 
+HEALTH_FEATURES = prebuilt({
+    "aqi_monitoring": True,
+    "legal_analysis": True,
+    "health_assessment": True,
+    "complaint_system": True,
+    "ai_predictions": True
+})
+
 @app.get("/health")
 async def health_check():
     return {
@@ -74,84 +283,165 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "uptime": "24/7",
         "version": "2.0.0",
-        "features": {
-            "aqi_monitoring": True,
-            "legal_analysis": True,
-            "health_assessment": True,
-            "complaint_system": True,
-            "ai_predictions": True
+        "features": HEALTH_FEATURES
+    }
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Response cache hit/miss/eviction counters
+    """
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "cache": response_cache.stats(),
+        "tiles": tile_layer.cache.stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Metrics in Prometheus text exposition format
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@metrics_registry.collector
+def collect_component_metrics():
+    cache = response_cache.stats()
+    hits = Gauge("aqi_response_cache_hits_total", "Response cache hits by endpoint", ["endpoint"], kind="counter")
+    misses = Gauge("aqi_response_cache_misses_total", "Response cache misses by endpoint", ["endpoint"], kind="counter")
+    hit_ratio = Gauge("aqi_response_cache_hit_ratio", "Response cache hit ratio by endpoint", ["endpoint"])
+    for endpoint, counts in cache["endpoints"].items():
+        lookups = counts["hits"] + counts["misses"]
+        hits.set(counts["hits"], endpoint)
+        misses.set(counts["misses"], endpoint)
+        hit_ratio.set(counts["hits"] / lookups if lookups else 0.0, endpoint)
+    entries = Gauge("aqi_response_cache_entries", "Entries in the response cache")
+    entries.set(cache.get("entries", 0))
+    evictions = Gauge("aqi_response_cache_evictions_total", "Entries evicted from the response cache", kind="counter")
+    evictions.set(cache.get("evictions", 0))
+    
+    stream = aqi_broadcaster.stats()
+    subscribers = Gauge("aqi_stream_subscribers", "Open /aqi/stream connections")
+    subscribers.set(stream["subscribers"])
+    stations = Gauge("aqi_stations", "Stations in the ingested snapshot")
+    stations.set(len(station_store))
+    alert_subscribers = Gauge("aqi_alert_subscribers", "Users subscribed to AQI threshold alerts")
+    alert_subscribers.set(users_db.count())
+    
+    jobs = Gauge("aqi_jobs", "Background jobs by kind and status", ["kind", "status"])
+    for kind, counts in job_queue.stats().items():
+        for status, count in counts.items():
+            jobs.set(count, kind, status)
+    return [hits, misses, hit_ratio, entries, evictions, subscribers, stations, alert_subscribers, jobs]
+
+@app.get("/debug/profile")
+async def get_profile():
+    """
+    Collapsed stacks of the event loop thread while sampled requests
+    were open, for flamegraph tools
+    """
+    return PlainTextResponse(profiler.collapsed())
+
+@app.post("/debug/profile")
+async def configure_profile(every: int = 0, reset: bool = False):
+    """
+    Start sampling on 1 in `every` requests (0 disables) without a
+    restart; the stacks cover the whole loop while one is open
+    """
+    if every < 0:
+        raise HTTPException(status_code=400, detail="every must be 0 or positive")
+    profiler.every = every
+    if reset:
+        profiler.reset()
+    return {"success": True, "profiler": profiler.status()}
+
+@app.get("/ingest/status")
+async def get_ingest_status():
+    """
+    Station ingestion sources, station count and last errors
+    """
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "ingestion": ingestor.status(),
+        "stream": aqi_broadcaster.stats(),
+        "alerts": alert_engine.stats(),
+        "grid": {
+            "built_at": aqi_field.built_at.isoformat() if aqi_field.built_at else None,
+            "shape": list(aqi_field.grid.shape) if aqi_field.grid is not None else None,
+            "resolution_deg": aqi_field.resolution
         }
     }
 
+@app.get("/jobs/stats")
+async def get_job_stats():
+    """
+    Job counts by kind and status plus this process's worker counters
+    """
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "jobs": await asyncio.to_thread(job_workers.stats)
+    }
+
 @app.get("/aqi")
+@response_cache.cached("aqi", ttl=AQI_CACHE_TTL)
 async def get_aqi(lat: float, lon: float):
     """
     Get comprehensive AQI data for location
     """
     try:
-        # Generate realistic AQI based on time and location
-        hour = datetime.now().hour
-        day_factor = np.sin(2 * np.pi * hour / 24) * 0.3 + 1.0
+        now = datetime.now()
         
-        # Base AQI with location variation
-        base_aqi = 150 + (abs(lat) % 10) * 10 + (abs(lon) % 10) * 5
-        
-        # Time-based adjustments
-        if 8 <= hour <= 10:
-            time_factor = 1.8  # Morning peak
-        elif 18 <= hour <= 20:
-            time_factor = 1.6  # Evening peak
-        elif 12 <= hour <= 16:
-            time_factor = 1.2  # Afternoon
+        # Prefer the interpolated station field, fall back to the model
+        interpolated = float(aqi_field.values_at(lat, lon)[0])
+        if not np.isnan(interpolated):
+            aqi_value = interpolated
+            station = station_store.nearest(lat, lon)
+            measured = station["pollutants"] if station else {}
+            measurement = {
+                "method": "IDW interpolation over monitoring stations",
+                "station": {k: station[k] for k in ("station_id", "name", "distance_km", "observed_at")} if station else None,
+                "next_update": f"{ingestor.refresh_interval // 60} minutes"
+            }
         else:
-            time_factor = 0.9  # Night
+            aqi_value = float(compute_aqi_values(np.array([lat]), np.array([lon]), now)[0])
+            measured = {}
+            measurement = {
+                "method": "AI-predicted based on patterns",
+                "accuracy": f"{rng_service.at('aqi_accuracy', lat, lon, window=AQI_CACHE_TTL).integers(85, 95)}%",
+                "next_update": "5 minutes"
+            }
         
-        # Weather simulation
-        weather_factor = 1.0 + np.random.normal(0, 0.1)
+        history_store.record(lat, lon, aqi_value, now.timestamp())
         
-        # Calculate final AQI
-        aqi_value = base_aqi * time_factor * weather_factor * day_factor
-        aqi_value = max(50, min(450, aqi_value))
+        # Pollutant concentrations, measured where a station reports them
+        estimated = estimate_concentrations(np.array([aqi_value]))
+        concentrations = {key: np.array([measured.get(key, values[0])]) for key, values in estimated.items()}
+        
+        # NAQI from measurements when they meet the CPCB minimum, else from the estimate
+        naqi_basis = "measured"
+        naqi = compute_naqi({key: np.array([measured.get(key, np.nan)], dtype=np.float64) for key in NAQI_POLLUTANTS})
+        estimated_naqi = compute_naqi(concentrations)
+        if not naqi["valid"][0]:
+            naqi_basis = "estimated"
+            naqi = estimated_naqi
+        sub_indices = estimated_naqi["sub_indices"][:, 0]
         
-        # Pollutants breakdown
         pollutants = {
-            "pm25": {
-                "value": round(aqi_value * 0.6, 1),
-                "unit": "µg/m³",
-                "source": "Particulate Matter 2.5",
-                "health_effect": "Respiratory issues, cardiovascular problems"
-            },
-            "pm10": {
-                "value": round(aqi_value * 0.8, 1),
-                "unit": "µg/m³",
-                "source": "Dust, construction, vehicles",
-                "health_effect": "Eye irritation, breathing discomfort"
-            },
-            "no2": {
-                "value": round(aqi_value * 0.3, 1),
-                "unit": "ppb",
-                "source": "Vehicle emissions, power plants",
-                "health_effect": "Asthma exacerbation, lung damage"
-            },
-            "so2": {
-                "value": round(aqi_value * 0.2, 1),
-                "unit": "ppb",
-                "source": "Industrial emissions",
-                "health_effect": "Respiratory tract irritation"
-            },
-            "co": {
-                "value": round(aqi_value * 0.01, 2),
-                "unit": "ppm",
-                "source": "Incomplete combustion",
-                "health_effect": "Headaches, dizziness, heart issues"
-            },
-            "o3": {
-                "value": round(aqi_value * 0.4, 1),
-                "unit": "ppb",
-                "source": "Photochemical reactions",
-                "health_effect": "Chest pain, coughing, throat irritation"
+            key: {
+                "value": round(float(concentrations[key][0]), decimals),
+                "unit": NAQI_UNITS[key],
+                "sub_index": round(float(sub_indices[NAQI_POLLUTANTS.index(key)])),
+                "measured": key in measured,
+                "source": source,
+                "health_effect": health_effect
             }
+            for key, _, decimals, source, health_effect in POLLUTANT_PROFILE
         }
+        naqi_value = float(naqi["aqi"][0])
+        naqi_category = NAQI_CATEGORIES.lookup(naqi_value)
         
         # AQI category
         aqi_category = categorize_aqi(aqi_value)
@@ -171,96 +461,243 @@ async def get_aqi(lat: float, lon: float):
                     "color": aqi_category["color"],
                     "health_implications": aqi_category["health_implications"]
                 },
+                "naqi": {
+                    "value": round(naqi_value),
+                    "category": naqi_category["name"],
+                    "color": naqi_category["color"],
+                    "dominant_pollutant": NAQI_POLLUTANTS[naqi["dominant"][0]],
+                    "basis": naqi_basis
+                },
                 "pollutants": pollutants,
                 "timestamp": datetime.now().isoformat(),
-                "measurement": {
-                    "method": "AI-predicted based on patterns",
-                    "accuracy": f"{np.random.randint(85, 95)}%",
-                    "next_update": "5 minutes"
-                }
+                "measurement": measurement
             }
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+MAX_NAQI_READINGS = 1000000
+
+@app.post("/aqi/naqi")
+async def compute_naqi_batch(readings: PollutantReadings, sub_indices: bool = False):
+    """
+    Indian NAQI, category and dominant pollutant for columnar readings
+    """
+    columns = {key: values for key, values in readings.dict().items() if values is not None}
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise HTTPException(status_code=400, detail="Provide at least one pollutant, all with the same number of readings")
+    count = lengths.pop()
+    if count > MAX_NAQI_READINGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_NAQI_READINGS} readings per request")
+    
+    result = await asyncio.to_thread(
+        compute_naqi,
+        {key: np.array(values, dtype=np.float64) for key, values in columns.items()}
+    )
+    aqi = result["aqi"]
+    valid = result["valid"]
+    
+    data = {
+        "aqi": rounded_or_none(aqi),
+        "category": np.where(valid, NAQI_CATEGORIES.indexes(np.nan_to_num(aqi)), -1).tolist(),
+        "dominant_pollutant": result["dominant"].tolist()
+    }
+    if sub_indices:
+        data["sub_indices"] = {
+            key: rounded_or_none(result["sub_indices"][row])
+            for row, key in enumerate(NAQI_POLLUTANTS) if key in columns
+        }
+    
+    return {
+        "success": True,
+        "count": count,
+        "valid": int(valid.sum()),
+        "data": data,
+        "pollutants": NAQI_POLLUTANTS,
+        "categories": NAQI_CATEGORIES.bands,
+        "units": NAQI_UNITS
+    }
+
+@app.get("/aqi/history")
+async def get_aqi_history(lat: float, lon: float, start: Optional[str] = None, end: Optional[str] = None, max_points: int = HISTORY_MAX_POINTS):
+    """
+    Recorded AQI for a location, at the finest rollup that fits max_points
+    """
+    try:
+        # Naive timestamps are local time; compare everything as aware
+        end_time = datetime.fromisoformat(end).astimezone() if end else datetime.now().astimezone()
+        start_time = datetime.fromisoformat(start).astimezone() if start else end_time - timedelta(hours=24)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO 8601 timestamps")
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if not 1 <= max_points <= MAX_BATCH_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points must be between 1 and {MAX_BATCH_POINTS}")
+    
+    start_ts, end_ts = start_time.timestamp(), end_time.timestamp()
+    level = pick_level(start_ts, end_ts, max_points)
+    rows = history_store.query(lat, lon, start_ts, end_ts, level)
+    
+    if level == "raw":
+        points = {"value": np.round(rows["value"].astype(np.float64), 1).tolist()}
+    else:
+        points = {
+            "mean": np.round(rows["mean"].astype(np.float64), 1).tolist(),
+            "max": np.round(rows["max"].astype(np.float64), 1).tolist(),
+            "p95": np.round(rows["p95"].astype(np.float64), 1).tolist(),
+            "count": rows["count"].tolist()
+        }
+    
+    return {
+        "success": True,
+        "location": {"lat": lat, "lon": lon},
+        "range": {"start": start_time.isoformat(), "end": end_time.isoformat()},
+        "resolution": level,
+        "count": int(rows.size),
+        "points": {
+            "timestamp": [datetime.fromtimestamp(t).isoformat() for t in rows["t"].tolist()],
+            **points
+        }
+    }
+
+@app.get("/aqi/tiles/{z}/{x}/{y}")
+async def get_aqi_tile(z: int, x: int, y: str, request: Request):
+    """
+    AQI heatmap tile for slippy maps; y may carry a .png suffix, so
+    Leaflet can use /aqi/tiles/{z}/{x}/{y}.png
+    """
+    y = y.removesuffix(".png")
+    if not y.isdigit():
+        raise HTTPException(status_code=404, detail="Tile not found")
+    y = int(y)
+    if not MIN_ZOOM <= z <= MAX_ZOOM:
+        raise HTTPException(status_code=400, detail=f"z must be between {MIN_ZOOM} and {MAX_ZOOM}")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+    
+    bucket = time_bucket(TILE_TICK_SECONDS)
+    version = tile_version(bucket)
+    entry = tile_layer.cached(version, z, x, y)
+    if entry is None:
+        entry = await asyncio.to_thread(tile_layer.tile, version, z, x, y)
+    png, etag = entry
+    
+    return tile_response(
+        png,
+        etag,
+        max_age=(bucket + 1) * TILE_TICK_SECONDS - time.time(),
+        if_none_match=request.headers.get("if-none-match")
+    )
+
+@app.get("/aqi/stream")
+async def stream_aqi(lat: float, lon: float):
+    """
+    Live AQI for a location as Server-Sent Events (snapshot, then deltas)
+    """
+    return StreamingResponse(
+        sse_events(aqi_broadcaster, lat, lon),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/aqi/batch")
+async def get_aqi_batch(batch: BatchLocations):
+    """
+    Get AQI data for many locations in one columnar response
+    """
+    if len(batch.lats) != len(batch.lons):
+        raise HTTPException(status_code=400, detail="lats and lons must have the same length")
+    if len(batch.lats) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POINTS} points per batch")
+    
+    try:
+        now = datetime.now()
+        lats = np.asarray(batch.lats, dtype=np.float64)
+        lons = np.asarray(batch.lons, dtype=np.float64)
+        aqi_values = current_aqi_values(lats, lons, now)
+        cities, city_index = np.unique(gazetteer.city_names_for(lats, lons).astype(str), return_inverse=True)
+        
+        return {
+            "success": True,
+            "count": int(aqi_values.size),
+            "timestamp": now.isoformat(),
+            "data": {
+                "lat": lats.tolist(),
+                "lon": lons.tolist(),
+                "city": city_index.reshape(-1).tolist(),
+                "aqi": np.round(aqi_values).astype(np.int64).tolist(),
+                "category": AQI_CATEGORIES.indexes(aqi_values).tolist(),
+                "pollutants": {
+                    key: np.round(values, decimals).tolist()
+                    for (key, values), (_, _, decimals, _, _) in zip(estimate_concentrations(aqi_values).items(), POLLUTANT_PROFILE)
+                }
+            },
+            "categories": AQI_CATEGORIES.bands,
+            "cities": cities.tolist(),
+            "units": NAQI_UNITS
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/aqi/predict")
+@response_cache.cached("aqi_predict", ttl=PREDICT_CACHE_TTL)
 async def predict_aqi(lat: float, lon: float, hours: int = 24):
     """
     Predict AQI for next N hours using AI models
     """
+    if not 1 <= hours <= MAX_FORECAST_HOURS:
+        raise HTTPException(status_code=400, detail=f"hours must be between 1 and {MAX_FORECAST_HOURS}")
+    
     try:
         current = await get_aqi(lat, lon)
         current_aqi = current["data"]["aqi"]["value"]
         
-        predictions = []
-        confidence_scores = []
+        rng = rng_service.points("aqi_predict", lat, lon, window=PREDICT_CACHE_TTL)
+        forecast = forecast_aqi(np.array([current_aqi]), datetime.now(), hours, rng)
+        aqi = forecast["aqi"][0]
+        confidence = forecast["confidence"][0]
+        categories = AQI_CATEGORIES.indexes(forecast["predicted"][0])
         
-        for hour in range(hours):
-            hour_of_day = (datetime.now().hour + hour) % 24
-            
-            # AI prediction model (simplified)
-            # Factors: time of day, weekday/weekend, seasonal pattern
-            
-            # Time pattern
-            if 7 <= hour_of_day <= 9:
-                time_factor = 1.8  # Morning commute
-            elif 17 <= hour_of_day <= 19:
-                time_factor = 1.7  # Evening commute
-            elif 10 <= hour_of_day <= 16:
-                time_factor = 1.3  # Daytime
-            else:
-                time_factor = 0.8  # Night
-            
-            # Day of week factor
-            day_of_week = datetime.now().weekday()
-            if day_of_week < 5:  # Weekday
-                day_factor = 1.2
-            else:  # Weekend
-                day_factor = 1.0
-            
-            # Random weather variation
-            weather_factor = 1.0 + np.random.normal(0, 0.15)
-            
-            # Calculate prediction
-            predicted = current_aqi * time_factor * day_factor * weather_factor
-            predicted = max(50, min(500, predicted))
-            
-            # Confidence based on time (more confident for near future)
-            confidence = 0.9 - (hour * 0.02) + np.random.normal(0, 0.05)
-            confidence = max(0.7, min(0.95, confidence))
-            
-            predictions.append({
+        predictions = [
+            {
                 "hour": hour_of_day,
-                "timestamp": (datetime.now() + timedelta(hours=hour)).isoformat(),
-                "aqi": round(predicted),
-                "category": categorize_aqi(predicted)["name"],
-                "confidence": round(confidence, 2),
+                "timestamp": timestamp,
+                "aqi": value,
+                "category": AQI_CATEGORY_NAMES[category],
+                "confidence": conf,
                 "factors": {
-                    "time_of_day": round(time_factor, 2),
-                    "day_type": "weekday" if day_of_week < 5 else "weekend",
-                    "weather_impact": round(weather_factor, 2)
+                    "time_of_day": time_factor,
+                    "day_type": "weekday" if is_weekday else "weekend",
+                    "weather_impact": weather_factor
                 }
-            })
-            
-            confidence_scores.append(confidence)
+            }
+            for hour_of_day, timestamp, value, category, conf, time_factor, is_weekday, weather_factor in zip(
+                forecast["hour_of_day"].tolist(),
+                forecast["timestamps"].tolist(),
+                aqi.tolist(),
+                categories.tolist(),
+                np.round(confidence, 2).tolist(),
+                np.round(forecast["time_factor"], 2).tolist(),
+                forecast["is_weekday"].tolist(),
+                np.round(forecast["weather_factor"][0], 2).tolist()
+            )
+        ]
         
-        # Find peaks
-        peak_hours = []
-        for i in range(1, len(predictions)-1):
-            if predictions[i]["aqi"] > predictions[i-1]["aqi"] and predictions[i]["aqi"] > predictions[i+1]["aqi"]:
-                peak_hours.append(predictions[i])
+        peak_hours = [predictions[i] for i in np.flatnonzero(forecast["peaks"][0])[:3]]
         
         return {
             "success": True,
             "current_aqi": current_aqi,
             "predictions": predictions,
             "statistics": {
-                "average_aqi": round(np.mean([p["aqi"] for p in predictions])),
-                "peak_aqi": max(p["aqi"] for p in predictions),
-                "lowest_aqi": min(p["aqi"] for p in predictions),
-                "average_confidence": round(np.mean(confidence_scores), 2),
-                "peak_hours": peak_hours[:3]  # Top 3 peak hours
+                "average_aqi": round(float(aqi.mean())),
+                "peak_aqi": int(aqi.max()),
+                "lowest_aqi": int(aqi.min()),
+                "average_confidence": round(float(confidence.mean()), 2),
+                "peak_hours": peak_hours  # Top 3 peak hours
             },
             "recommendations": generate_predictions_recommendations(predictions)
         }
@@ -268,157 +705,136 @@ async def predict_aqi(lat: float, lon: float, hours: int = 24):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/aqi/predict/batch")
+async def predict_aqi_batch(batch: BatchLocations, hours: int = 24):
+    """
+    Predict AQI for next N hours at many locations in one columnar response
+    """
+    if len(batch.lats) != len(batch.lons):
+        raise HTTPException(status_code=400, detail="lats and lons must have the same length")
+    if not 1 <= hours <= MAX_FORECAST_HOURS:
+        raise HTTPException(status_code=400, detail=f"hours must be between 1 and {MAX_FORECAST_HOURS}")
+    if len(batch.lats) * hours > MAX_BATCH_POINTS * 24:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POINTS * 24} location-hours per batch")
+    
+    try:
+        now = datetime.now()
+        lats = np.asarray(batch.lats, dtype=np.float64)
+        lons = np.asarray(batch.lons, dtype=np.float64)
+        current_aqi = np.round(current_aqi_values(lats, lons, now))
+        
+        rng = rng_service.points("aqi_predict", lats, lons, now.timestamp(), window=PREDICT_CACHE_TTL)
+        forecast = forecast_aqi(current_aqi, now, hours, rng)
+        aqi = forecast["aqi"]
+        
+        return {
+            "success": True,
+            "count": int(lats.size),
+            "hours": hours,
+            "timestamps": forecast["timestamps"].tolist(),
+            "hour_of_day": forecast["hour_of_day"].tolist(),
+            "data": {
+                "lat": lats.tolist(),
+                "lon": lons.tolist(),
+                "current_aqi": current_aqi.astype(np.int64).tolist(),
+                "aqi": aqi.tolist(),
+                "category": AQI_CATEGORIES.indexes(forecast["predicted"]).tolist(),
+                "confidence": np.round(forecast["confidence"], 2).tolist()
+            },
+            "statistics": {
+                "average_aqi": np.round(aqi.mean(axis=1)).astype(np.int64).tolist(),
+                "peak_aqi": aqi.max(axis=1).tolist(),
+                "lowest_aqi": aqi.min(axis=1).tolist(),
+                "peak_hour_indexes": [np.flatnonzero(row)[:3].tolist() for row in forecast["peaks"]]
+            },
+            "categories": AQI_CATEGORIES.bands
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/legal/check")
-async def check_legal_violations(aqi: float, lat: float, lon: float):
+@metrics_registry.instrument()
+async def check_legal_violations(aqi: float, lat: float, lon: float, pollutant: str = "aqi", state: Optional[str] = None):
     """
     Check legal violations based on AQI
     """
-    laws = [
-        {
-            "name": "National Green Tribunal Act, 2010",
-            "code": "NGT Order 2018",
-            "threshold": 200,
-            "authority": "National Green Tribunal",
-            "penalties": [
-                "₹5 lakh - ₹50 lakh fine",
-                "Imprisonment up to 5 years",
-                "Industry closure",
-                "Daily fines until compliance"
-            ],
-            "section": "Section 15, 16, 19"
-        },
-        {
-            "name": "CPCB National Ambient Air Quality Standards",
-            "code": "CPCB S.O. 3067(E)",
-            "threshold": 250,
-            "authority": "Central Pollution Control Board",
-            "penalties": [
-                "₹1 crore/day fine",
-                "Immediate closure notice",
-                "Criminal prosecution",
-                "Asset seizure"
-            ],
-            "section": "Schedule VI"
-        },
-        {
-            "name": "Environment Protection Act, 1986",
-            "code": "EPA Rules",
-            "threshold": 300,
-            "authority": "Ministry of Environment",
-            "penalties": [
-                "₹1 lakh/day penalty",
-                "National Green Tribunal case",
-                "Environmental compensation",
-                "Public interest litigation"
-            ],
-            "section": "Section 3, 5"
-        },
-        {
-            "name": "WHO Air Quality Guidelines",
-            "code": "WHO AQG 2021",
-            "threshold": 25,
-            "authority": "World Health Organization",
-            "penalties": [
-                "International pressure",
-                "Health advisory",
-                "Global ranking impact",
-                "Travel advisories"
-            ],
-            "section": "Guideline 4.1"
-        }
-    ]
-    
-    violations = []
-    for law in laws:
-        if aqi > law["threshold"]:
-            violations.append({
-                **law,
-                "current_aqi": aqi,
-                "excess": aqi - law["threshold"],
-                "excess_percentage": ((aqi - law["threshold"]) / law["threshold"]) * 100,
-                "severity": categorize_violation_severity(aqi - law["threshold"]),
-                "action_required": "IMMEDIATE" if aqi > 300 else "URGENT" if aqi > 200 else "WITHIN_48_HOURS",
-                "complaint_basis": f"Violation of {law['name']} exceeding threshold by {aqi - law['threshold']} points"
-            })
+    try:
+        rules = law_catalogue.rules(pollutant, state or gazetteer.state_name(lat, lon))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    violations = rules.violations(aqi)
     
     return {
         "success": True,
         "aqi": aqi,
         "location": {"lat": lat, "lon": lon},
         "violations": violations,
-        "summary": {
-            "total_violations": len(violations),
-            "major_violations": len([v for v in violations if v["severity"] == "SEVERE"]),
-            "total_excess": sum(v["excess"] for v in violations),
-            "highest_penalty": max([p for v in violations for p in v["penalties"]], key=len) if violations else "None",
-            "legal_status": "COMPLIANT" if not violations else "NON-COMPLIANT"
-        },
+        "summary": rules.summary(aqi),
         "recommended_actions": generate_legal_actions(violations)
     }
 
-@app.post("/complaint/file")
+@app.post("/legal/audit")
+async def audit_legal_violations(audit: LegalAudit):
+    """
+    Check legal violations for many historical AQI values at once
+    """
+    if len(audit.values) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POINTS} values per audit")
+    
+    try:
+        rules = law_catalogue.rules(audit.pollutant, audit.state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = rules.evaluate_many(audit.values)
+    
+    return {
+        "success": True,
+        "count": len(audit.values),
+        "pollutant": audit.pollutant,
+        "state": audit.state,
+        "data": {
+            "total_violations": result["total_violations"].tolist(),
+            "major_violations": result["major_violations"].tolist(),
+            "total_excess": np.round(result["total_excess"], 2).tolist(),
+            "highest_penalty": result["highest_penalty"].tolist(),
+            "compliant": result["compliant"].tolist()
+        },
+        "penalties": rules.highest_penalty,
+        "laws": rules.law_names
+    }
+
+@app.post("/complaint/file", status_code=202)
 async def file_complaint(complaint: ComplaintData):
     """
-    File a pollution complaint
+    Accept a pollution complaint. Legal analysis, the legal document and
+    authority notifications run on the job workers; the same complaint
+    filed again within the dedup window returns the original id.
     """
     try:
-        complaint_id = f"AJ-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
-        
-        # Generate legal analysis
-        legal_check = await check_legal_violations(complaint.aqi, complaint.location.lat, complaint.location.lon)
-        
-        complaint_record = {
-            "id": complaint_id,
-            "timestamp": datetime.now().isoformat(),
-            "status": "SUBMITTED",
-            "complainant": {
-                "type": "citizen",
-                "platform": "Air Justice",
-                "profile": complaint.user_profile.dict() if complaint.user_profile else None
-            },
-            "violation": {
-                "location": complaint.location.dict(),
-                "aqi": complaint.aqi,
-                "description": complaint.description,
-                "source_type": complaint.source_type,
-                "legal_basis": legal_check["violations"]
-            },
-            "processing": {
-                "authorities_notified": [
-                    "National Green Tribunal",
-                    "Central Pollution Control Board",
-                    "State Pollution Control Board",
-                    "District Magistrate"
-                ],
-                "expected_timeline": {
-                    "acknowledgment": "24 hours",
-                    "investigation": "48 hours",
-                    "action": "7 days",
-                    "resolution": "30 days"
-                },
-                "tracking_url": f"https://airjustice.tech/track/{complaint_id}",
-                "case_officer": "To be assigned"
-            },
-            "impact_analysis": {
-                "affected_area": "5 km radius",
-                "estimated_population": 2500,
-                "health_risk": "HIGH" if complaint.aqi > 200 else "MEDIUM",
-                "environmental_impact": "SIGNIFICANT" if complaint.aqi > 250 else "MODERATE"
-            }
+        job_payload = {
+            "id": new_complaint_id(),
+            "received_at": datetime.now().isoformat(),
+            "complaint": complaint.dict()
         }
-        
-        complaints_db.append(complaint_record)
-        
-        # Generate legal document
-        legal_document = generate_legal_document(complaint_record)
+        _, job_payload, created = await asyncio.to_thread(
+            job_queue.enqueue,
+            "complaint.file",
+            job_payload,
+            dedup_key=complaint_dedup_key(complaint),
+            ref=job_payload["id"]
+        )
+        complaint_id = job_payload["id"]
         
         return {
             "success": True,
-            "message": "Complaint filed successfully",
+            "message": "Complaint accepted for processing" if created else "Complaint already filed",
             "complaint_id": complaint_id,
+            "duplicate": not created,
             "details": {
-                "status": "PENDING_AUTHORITY_REVIEW",
+                "status": "QUEUED",
                 "tracking_id": complaint_id,
+                "received_at": job_payload["received_at"],
                 "expected_updates": "Within 24 hours",
                 "next_steps": [
                     "Complaint forwarded to NGT",
@@ -427,7 +843,10 @@ async def file_complaint(complaint: ComplaintData):
                     "Case number generated"
                 ]
             },
-            "legal_document": legal_document,
+            "legal_document": {
+                "url": f"/complaint/{complaint_id}/document",
+                "formats": list(DOCUMENT_FORMATS)
+            },
             "actions": {
                 "immediate": "Monitor your email for updates",
                 "follow_up": f"Check status at /complaint/status/{complaint_id}",
@@ -439,48 +858,56 @@ async def file_complaint(complaint: ComplaintData):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/complaint/bulk")
+async def file_complaints_bulk(request: Request):
+    """
+    File many complaints from an NDJSON or JSON array upload, streaming
+    one NDJSON result line per complaint
+    """
+    async def results():
+        chunk = []
+        index = 0
+        filed = 0
+        failed = 0
+        
+        async for item in iter_json_records(request.stream()):
+            chunk.append((index, item))
+            index += 1
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                lines, ok = await asyncio.to_thread(process_complaint_chunk, chunk)
+                filed += ok
+                failed += len(chunk) - ok
+                chunk = []
+                yield lines
+        
+        if chunk:
+            lines, ok = await asyncio.to_thread(process_complaint_chunk, chunk)
+            filed += ok
+            failed += len(chunk) - ok
+            yield lines
+        
+        yield json.dumps({"summary": {"total": index, "filed": filed, "failed": failed}}) + "\n"
+    
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/complaint/status/{complaint_id}")
 async def get_complaint_status(complaint_id: str):
     """
-    Get complaint status
+    Get complaint status and its stored timeline
     """
-    complaint = next((c for c in complaints_db if c["id"] == complaint_id), None)
+    complaint = await asyncio.to_thread(complaint_store.get, complaint_id)
     
     if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    # Simulate status progression
-    status_map = {
-        "SUBMITTED": "UNDER_REVIEW",
-        "UNDER_REVIEW": "INVESTIGATION_STARTED",
-        "INVESTIGATION_STARTED": "ACTION_TAKEN",
-        "ACTION_TAKEN": "RESOLVED"
-    }
-    
-    # Update status based on time
-    submitted_time = datetime.fromisoformat(complaint["timestamp"])
-    hours_since = (datetime.now() - submitted_time).total_seconds() / 3600
-    
-    if hours_since > 72:
-        current_status = "RESOLVED"
-    elif hours_since > 48:
-        current_status = "ACTION_TAKEN"
-    elif hours_since > 24:
-        current_status = "INVESTIGATION_STARTED"
-    elif hours_since > 2:
-        current_status = "UNDER_REVIEW"
-    else:
-        current_status = "SUBMITTED"
-    
-    complaint["status"] = current_status
+        return await asyncio.to_thread(pending_complaint_status, complaint_id)
     
+    timeline = await asyncio.to_thread(complaint_store.timeline, complaint_id)
     return {
         "success": True,
         "complaint_id": complaint_id,
-        "status": current_status,
+        "status": complaint["status"],
         "details": complaint,
-        "updates": generate_status_updates(complaint_id, current_status),
-        "next_milestone": get_next_milestone(current_status),
+        "updates": [status_update(status, at) for status, at in timeline],
+        "next_milestone": NEXT_MILESTONES.get(complaint["status"], "Monitoring in progress"),
         "contact": {
             "ngt": "ngt@nic.in",
             "cpcb": "cpcb@nic.in",
@@ -488,33 +915,34 @@ async def get_complaint_status(complaint_id: str):
         }
     }
 
+@app.get("/complaint/{complaint_id}/document")
+async def get_complaint_document(complaint_id: str, request: Request, format: str = "text"):
+    """
+    Download the legal document for a complaint (text, markdown or pdf)
+    """
+    if format not in DOCUMENT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(DOCUMENT_FORMATS)}")
+    
+    # Lookup, a first render and the artifact read all touch disk
+    return await asyncio.to_thread(
+        complaint_document_response,
+        complaint_id,
+        format,
+        request.headers.get("if-none-match"),
+        request.headers.get("range")
+    )
+
 @app.get("/health/impact")
 async def get_health_impact(aqi: float, age: Optional[int] = None, conditions: Optional[str] = None):
     """
     Get health impact analysis
     """
     # Cigarette equivalent
-    cigarettes = aqi / 100
+    cigarettes = aqi / AQI_PER_CIGARETTE
     
     # Risk levels
-    if aqi <= 50:
-        risk = "LOW"
-        advice = ["No restrictions needed", "Ideal for outdoor activities"]
-    elif aqi <= 100:
-        risk = "MODERATE"
-        advice = ["Sensitive groups take precautions", "Limit prolonged exertion"]
-    elif aqi <= 150:
-        risk = "HIGH for sensitive groups"
-        advice = ["Sensitive groups avoid outdoor activities", "Keep medications handy"]
-    elif aqi <= 200:
-        risk = "HIGH for everyone"
-        advice = ["Everyone reduce outdoor activities", "Use air purifiers", "Wear masks"]
-    elif aqi <= 300:
-        risk = "VERY HIGH"
-        advice = ["Avoid all outdoor activities", "Stay indoors", "Use N95 masks"]
-    else:
-        risk = "SEVERE"
-        advice = ["Health emergency", "Stay indoors with purifiers", "Consider relocation"]
+    band = HEALTH_RISKS.lookup(aqi)
+    risk, advice = band["risk"], band["advice"]
     
     # Age-specific risks
     age_risk = ""
@@ -561,164 +989,537 @@ async def get_health_impact(aqi: float, age: Optional[int] = None, conditions: O
         "medical_advice": generate_medical_advice(aqi, age, conditions)
     }
 
-@app.get("/sources/detect")
-async def detect_pollution_sources(lat: float, lon: float):
+@app.post("/exposure")
+async def calculate_exposure(track: ExposureTrack, peak_aqi: float = DEFAULT_PEAK_AQI, peaks: int = DEFAULT_PEAKS):
     """
-    Detect likely pollution sources
+    Cumulative AQI exposure along a GPS track, sampled from the same
+    gridded field as the heatmap tiles
     """
-    sources = [
-        {
-            "type": "VEHICULAR_TRAFFIC",
-            "confidence": np.random.randint(70, 95),
-            "impact": "HIGH",
-            "distance_km": round(np.random.uniform(0.5, 3), 2),
-            "description": "Major road junction with heavy traffic",
-            "recommendation": "Promote public transport, implement odd-even scheme"
-        },
-        {
-            "type": "INDUSTRIAL_EMISSIONS",
-            "confidence": np.random.randint(60, 85),
-            "impact": "VERY_HIGH",
-            "distance_km": round(np.random.uniform(2, 5), 2),
-            "description": "Manufacturing units without proper filters",
-            "recommendation": "Install emission control devices, regular inspections"
-        },
-        {
-            "type": "CONSTRUCTION_ACTIVITY",
-            "confidence": np.random.randint(50, 80),
-            "impact": "MEDIUM",
-            "distance_km": round(np.random.uniform(0.3, 1.5), 2),
-            "description": "Building construction with dust emissions",
-            "recommendation": "Use dust suppressants, cover construction material"
-        },
-        {
-            "type": "WASTE_BURNING",
-            "confidence": np.random.randint(40, 75),
-            "impact": "HIGH",
-            "distance_km": round(np.random.uniform(1, 4), 2),
-            "description": "Open burning of garbage and leaves",
-            "recommendation": "Promote waste segregation, provide collection services"
+    lats = np.array(track.lats, dtype=np.float64)
+    lons = np.array(track.lons, dtype=np.float64)
+    timestamps = np.array(track.timestamps, dtype=np.float64)
+    error = validate_track(lats, lons, timestamps)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    if peaks < 0:
+        raise HTTPException(status_code=400, detail="peaks must be 0 or positive")
+    
+    aqi = await asyncio.to_thread(track_aqi_values, lats, lons)
+    exposure = await asyncio.to_thread(track_exposure, aqi, lats, lons, timestamps, peak_aqi, peaks)
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "exposure": exposure
+    }
+
+@app.post("/users")
+async def register_user(registration: UserRegistration):
+    """
+    Store a profile and subscribe it to alerts when the AQI at its
+    location rises into the category band containing threshold
+    """
+    band = AQI_CATEGORIES.index(registration.threshold)
+    if band == 0:
+        raise HTTPException(status_code=400, detail=f"threshold must be above {AQI_CATEGORIES.bounds[0]}")
+    
+    profile = registration.profile or UserProfile()
+    user = {
+        "id": uuid.uuid4().hex,
+        "lat": registration.location.lat,
+        "lon": registration.location.lon,
+        "threshold": registration.threshold,
+        "age": profile.age,
+        "health_conditions": profile.health_conditions,
+        "sensitivity_level": profile.sensitivity_level,
+        "contact": registration.contact,
+        "created_at": datetime.now().isoformat()
+    }
+    await asyncio.to_thread(users_db.put, user)
+    
+    aqi = float(current_aqi_values(np.array([user["lat"]]), np.array([user["lon"]]), datetime.now())[0])
+    return {
+        "success": True,
+        "user": user,
+        "alert": {
+            "threshold": registration.threshold,
+            "category": AQI_CATEGORY_NAMES[band],
+            "current_aqi": round(aqi),
+            "current_category": AQI_CATEGORY_NAMES[AQI_CATEGORIES.index(aqi)],
+            "above_threshold": AQI_CATEGORIES.index(aqi) >= band
         }
-    ]
+    }
+
+@app.get("/users/{user_id}")
+async def get_user(user_id: str):
+    user = await asyncio.to_thread(users_db.get, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"success": True, "user": user}
+
+@app.delete("/users/{user_id}")
+async def delete_user(user_id: str):
+    if not await asyncio.to_thread(users_db.delete, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"success": True, "user_id": user_id}
+
+@app.get("/recommendations")
+async def get_recommendations(user_id: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, age: Optional[int] = None, conditions: Optional[str] = None):
+    """
+    Personalized advice for the current AQI, for a registered user or an
+    ad-hoc location and profile
+    """
+    if user_id is not None:
+        user = await asyncio.to_thread(users_db.get, user_id)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        lat, lon, age = user["lat"], user["lon"], user["age"]
+        conditions = ",".join(user["health_conditions"]) or None
+    elif lat is None or lon is None:
+        raise HTTPException(status_code=400, detail="user_id or lat and lon required")
+    
+    aqi = float(current_aqi_values(np.array([lat]), np.array([lon]), datetime.now())[0])
+    band = HEALTH_RISKS.lookup(aqi)
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "location": {"lat": lat, "lon": lon},
+        "aqi": round(aqi),
+        "category": AQI_CATEGORIES.lookup(aqi)["name"],
+        "risk": band["risk"],
+        "recommendations": band["advice"],
+        "medical_advice": generate_medical_advice(aqi, age, conditions)
+    }
+
+@app.get("/sources/detect")
+@response_cache.cached("sources_detect", ttl=SOURCES_CACHE_TTL)
+async def detect_pollution_sources(lat: float, lon: float, radius_km: float = DEFAULT_RADIUS_KM, wind_from: Optional[float] = None, wind_speed: float = 0.0):
+    """
+    Attribute local pollution to catalogued emitters within radius_km,
+    weighted by distance and, when given, wind direction (degrees the
+    wind blows from) and speed (m/s)
+    """
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+    
+    sources, emitters, total = emitter_catalogue.ranked(lat, lon, radius_km, wind_from, wind_speed)
     
-    # Sort by impact and confidence
-    sources.sort(key=lambda x: (x["impact"], x["confidence"]), reverse=True)
+    if sources:
+        insights = [
+            f"Primary source: {sources[0]['type'].replace('_', ' ').title()}",
+            f"Top recommendation: {sources[0]['recommendation']}",
+            "Consider filing source-specific complaint",
+            "Share findings with local community"
+        ]
+    else:
+        insights = [
+            f"No catalogued emitters within {radius_km:g} km",
+            "Try a larger radius or report an unlisted source",
+            "Share findings with local community"
+        ]
     
     return {
         "success": True,
         "location": {"lat": lat, "lon": lon},
         "detected_sources": sources,
+        "emitters": emitters,
         "analysis": {
             "total_sources": len(sources),
             "primary_source": sources[0]["type"] if sources else "UNKNOWN",
-            "estimated_contribution": f"{np.random.randint(60, 90)}% of local pollution",
+            "estimated_contribution": f"{sources[0]['contribution_pct']}% of catalogued emissions within {radius_km:g} km" if sources else None,
+            "emitters_considered": sum(source["emitters"] for source in sources),
+            "total_impact_score": round(total, 3),
+            "radius_km": radius_km,
+            "wind": {"from_deg": wind_from, "speed_ms": wind_speed} if wind_from is not None else None,
             "peak_hours": "8-10 AM, 6-8 PM"
         },
-        "actionable_insights": [
-            f"Primary source: {sources[0]['type'].replace('_', ' ').title()}",
-            f"Top recommendation: {sources[0]['recommendation']}",
-            "Consider filing source-specific complaint",
-            "Share findings with local community"
-        ]
+        "actionable_insights": insights
+    }
+
+@app.post("/sources/attribute/batch")
+async def attribute_sources_batch(batch: BatchLocations, radius_km: float = DEFAULT_RADIUS_KM, wind_from: Optional[float] = None, wind_speed: float = 0.0):
+    """
+    Source type shares for many receptors in one columnar response
+    """
+    if len(batch.lats) != len(batch.lons):
+        raise HTTPException(status_code=400, detail="lats and lons must have the same length")
+    if len(batch.lats) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POINTS} points per batch")
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"radius_km must be between 0 and {MAX_RADIUS_KM}")
+    
+    result = emitter_catalogue.attribute_many(batch.lats, batch.lons, radius_km, wind_from, wind_speed)
+    shares, primary = emitter_catalogue.shares(result)
+    
+    return {
+        "success": True,
+        "count": len(batch.lats),
+        "radius_km": radius_km,
+        "source_types": SOURCE_TYPES,
+        "data": {
+            "lat": batch.lats,
+            "lon": batch.lons,
+            "primary_source": primary.tolist(),
+            "emitters": np.bincount(result["query"], minlength=len(batch.lats)).tolist(),
+            "contribution_pct": {
+                source_type: np.round(shares[:, t] * 100, 1).tolist()
+                for t, source_type in enumerate(SOURCE_TYPES)
+            }
+        }
     }
 
 # Helper functions
-def categorize_aqi(aqi: float):
-    if aqi <= 50:
-        return {"name": "Good", "color": "#10B981", "health_implications": "Minimal impact"}
-    elif aqi <= 100:
-        return {"name": "Moderate", "color": "#FBBF24", "health_implications": "Minor discomfort for sensitive people"}
-    elif aqi <= 150:
-        return {"name": "Unhealthy for Sensitive", "color": "#F97316", "health_implications": "Increased health effects for sensitive groups"}
-    elif aqi <= 200:
-        return {"name": "Unhealthy", "color": "#EF4444", "health_implications": "Everyone may experience health effects"}
-    elif aqi <= 300:
-        return {"name": "Very Unhealthy", "color": "#8B5CF6", "health_implications": "Health alert: everyone may experience more serious health effects"}
-    else:
-        return {"name": "Hazardous", "color": "#7C2D12", "health_implications": "Health emergency: entire population affected"}
-
-def categorize_violation_severity(excess: float):
-    if excess > 100:
-        return "SEVERE"
-    elif excess > 50:
-        return "HIGH"
-    elif excess > 20:
-        return "MEDIUM"
-    else:
-        return "LOW"
 
-def get_city_name(lat: float, lon: float):
-    cities = {
-        (28.6139, 77.2090): "Delhi",
-        (19.0760, 72.8777): "Mumbai",
-        (12.9716, 77.5946): "Bengaluru",
-        (13.0827, 80.2707): "Chennai",
-        (22.5726, 88.3639): "Kolkata",
-        (17.3850, 78.4867): "Hyderabad",
-        (26.9124, 75.7873): "Jaipur",
-        (23.0225, 72.5714): "Ahmedabad",
-        (18.5204, 73.8567): "Pune",
-        (30.7333, 76.7794): "Chandigarh"
-    }
+# (key, sub-index as a share of the AQI, decimals, source, health effect).
+# Used to estimate concentrations where no station measures them.
+POLLUTANT_PROFILE = [
+    ("pm25", 1.0, 1, "Particulate Matter 2.5", "Respiratory issues, cardiovascular problems"),
+    ("pm10", 0.85, 1, "Dust, construction, vehicles", "Eye irritation, breathing discomfort"),
+    ("no2", 0.45, 1, "Vehicle emissions, power plants", "Asthma exacerbation, lung damage"),
+    ("so2", 0.2, 1, "Industrial emissions", "Respiratory tract irritation"),
+    ("co", 0.5, 2, "Incomplete combustion", "Headaches, dizziness, heart issues"),
+    ("o3", 0.4, 1, "Photochemical reactions", "Chest pain, coughing, throat irritation"),
+    ("nh3", 0.1, 1, "Agriculture, waste, sewage", "Eye, nose and throat irritation"),
+    ("pb", 0.05, 3, "Smelting, battery recycling", "Neurological and developmental damage")
+]
+
+def estimate_concentrations(aqi_values: np.ndarray):
+    """
+    Concentrations whose NAQI sub-indices follow POLLUTANT_PROFILE for
+    the given AQI values
+    """
+    return {key: concentration_for(key, aqi_values * share) for key, share, _, _, _ in POLLUTANT_PROFILE}
+
+def rounded_or_none(values: np.ndarray, decimals: int = 0):
+    """
+    JSON-ready list with NaN as None
+    """
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return [None if v != v else (int(v) if decimals == 0 else v) for v in values.tolist()]
+
+MAX_BATCH_POINTS = 50000
+
+@metrics_registry.instrument()
+def compute_aqi_values(lats: np.ndarray, lons: np.ndarray, now: datetime):
+    """
+    Vectorized AQI model shared by /aqi and /aqi/batch
+    """
+    hour = now.hour
+    day_factor = np.sin(2 * np.pi * hour / 24) * 0.3 + 1.0
+    
+    # Base AQI with location variation
+    base_aqi = 150 + (np.abs(lats) % 10) * 10 + (np.abs(lons) % 10) * 5
     
-    for (city_lat, city_lon), name in cities.items():
-        if abs(lat - city_lat) < 0.5 and abs(lon - city_lon) < 0.5:
-            return name
+    # Time-based adjustments
+    if 8 <= hour <= 10:
+        time_factor = 1.8  # Morning peak
+    elif 18 <= hour <= 20:
+        time_factor = 1.6  # Evening peak
+    elif 12 <= hour <= 16:
+        time_factor = 1.2  # Afternoon
+    else:
+        time_factor = 0.9  # Night
+    
+    # Weather simulation, one draw per point
+    rng = rng_service.points("aqi", lats, lons, now.timestamp(), window=AQI_CACHE_TTL)
+    weather_factor = 1.0 + rng.normal(0, 0.1, size=base_aqi.shape)
     
-    return "Urban Area"
+    aqi_values = base_aqi * (time_factor * day_factor) * weather_factor
+    return np.clip(aqi_values, 50, 450)
+
+def current_aqi_values(lats: np.ndarray, lons: np.ndarray, now: datetime):
+    """
+    Interpolated station AQI where available, model AQI elsewhere
+    """
+    interpolated = aqi_field.values_at(lats, lons)
+    return np.where(np.isnan(interpolated), compute_aqi_values(lats, lons, now), interpolated)
+
+def tile_version(bucket: int = None):
+    """
+    Field version for the tile layer: the update tick plus the station
+    snapshot the field was built from
+    """
+    bucket = time_bucket(TILE_TICK_SECONDS) if bucket is None else bucket
+    return f"{bucket}-{int(aqi_field.built_at.timestamp()) if aqi_field.built_at else 0}"
+
+def track_aqi_values(lats: np.ndarray, lons: np.ndarray):
+    """
+    Bilinear samples of the tile layer's grid, current_aqi_values for
+    points outside it
+    """
+    values = tile_layer.grid_for(tile_version()).sample(lats, lons)
+    outside = np.isnan(values)
+    if outside.any():
+        values[outside] = current_aqi_values(lats[outside], lons[outside], datetime.now())
+    return values
+
+def stream_cell_updates(lats: np.ndarray, lons: np.ndarray):
+    """
+    Fields pushed to /aqi/stream subscribers, one dict per cell
+    """
+    now = datetime.now()
+    aqi_values = current_aqi_values(lats, lons, now)
+    for lat, lon, value in zip(lats.tolist(), lons.tolist(), aqi_values.tolist()):
+        history_store.record(lat, lon, value, now.timestamp())
+    return [
+        {
+            "aqi": value,
+            "category": AQI_CATEGORY_NAMES[category],
+            "color": AQI_CATEGORY_COLORS[category],
+            "timestamp": now.isoformat()
+        }
+        for value, category in zip(
+            np.round(aqi_values).astype(np.int64).tolist(),
+            AQI_CATEGORIES.indexes(aqi_values).tolist()
+        )
+    ]
+
+@metrics_registry.instrument()
+def categorize_aqi(aqi: float):
+    return AQI_CATEGORIES.lookup(aqi)
+
+def get_city_name(lat: float, lon: float):
+    return gazetteer.city_name(lat, lon)
 
 def get_zone_type(lat: float, lon: float):
-    # Simple zone detection
-    if abs(lat - 28.6139) < 0.1 and abs(lon - 77.2090) < 0.1:
-        return "COMMERCIAL_CENTER"
-    elif np.random.random() > 0.5:
+    zone = gazetteer.zone_type(lat, lon)
+    if zone is not None:
+        return zone
+    elif rng_service.at("zone", lat, lon, window=0).random() > 0.5:
         return "RESIDENTIAL"
     else:
         return "MIXED_USE"
 
-def generate_predictions_recommendations(predictions):
-    peak_aqi = max(p["aqi"] for p in predictions)
+BULK_CHUNK_SIZE = 500
+
+def process_complaint_chunk(chunk):
+    """
+    Validate one chunk of bulk complaints and queue them in a single
+    write, with the same dedup keys and filing jobs as /complaint/file.
+    Returns the NDJSON result lines and the number filed.
+    """
+    results = []
+    valid = []
+    for index, item in chunk:
+        if isinstance(item, BulkItemError):
+            results.append({"index": index, "success": False, "error": str(item)})
+            continue
+        try:
+            valid.append((index, ComplaintData(**item)))
+        except (ValidationError, TypeError) as e:
+            errors = e.errors() if isinstance(e, ValidationError) else [{"loc": [], "msg": str(e)}]
+            results.append({
+                "index": index,
+                "success": False,
+                "error": [{"loc": list(err["loc"]), "msg": err["msg"]} for err in errors]
+            })
     
-    if peak_aqi > 300:
-        return {
-            "alert": "HEALTH EMERGENCY PREDICTED",
-            "actions": [
-                "Avoid all outdoor activities during peak hours",
-                "Use highest grade air purifiers",
-                "Consider temporary relocation if possible",
-                "Keep emergency medications ready"
-            ]
-        }
-    elif peak_aqi > 200:
-        return {
-            "alert": "LEGAL VIOLATIONS PREDICTED",
-            "actions": [
-                "Plan indoor activities during peak hours",
-                "Use N95 masks if going outside",
-                "File preventive complaint with authorities",
-                "Alert community members"
-            ]
-        }
-    elif peak_aqi > 150:
-        return {
-            "alert": "UNHEALTHY CONDITIONS PREDICTED",
-            "actions": [
-                "Sensitive groups stay indoors",
-                "Use air purifiers",
-                "Keep windows closed during peak hours",
-                "Monitor health symptoms"
-            ]
+    if valid:
+        received_at = datetime.now().isoformat()
+        payloads = [
+            {"id": new_complaint_id(), "received_at": received_at, "complaint": complaint.dict()}
+            for _, complaint in valid
+        ]
+        queued = job_queue.enqueue_many(
+            "complaint.file",
+            payloads,
+            refs=[payload["id"] for payload in payloads],
+            dedup_keys=[complaint_dedup_key(complaint) for _, complaint in valid]
+        )
+        for (index, _), (_, payload, created) in zip(valid, queued):
+            results.append({"index": index, "success": True, "complaint_id": payload["id"], "duplicate": not created})
+    
+    results.sort(key=lambda r: r["index"])
+    return "".join(json.dumps(r) + "\n" for r in results), len(valid)
+
+def complaint_dedup_key(complaint: ComplaintData):
+    """
+    Same place, reading, text and complainant inside one dedup window
+    """
+    cell = location_cell(complaint.location.lat, complaint.location.lon)
+    window = int(time.time() // COMPLAINT_DEDUP_WINDOW)
+    content = json.dumps([
+        cell,
+        round(complaint.aqi),
+        complaint.description,
+        complaint.source_type,
+        complaint.user_profile.dict() if complaint.user_profile else None,
+        window
+    ], sort_keys=True)
+    return "complaint:" + hashlib.sha256(content.encode()).hexdigest()
+
+def process_complaint_job(payload: dict):
+    """
+    Analyse and store one queued complaint, then queue its document and
+    notifications. Safe to run twice: the record is keyed by id and the
+    follow-up jobs by dedup key.
+    """
+    complaint = ComplaintData(**payload["complaint"])
+    lat, lon = complaint.location.lat, complaint.location.lon
+    legal_basis = law_catalogue.rules("aqi", gazetteer.state_name(lat, lon)).violations(complaint.aqi)
+    attribution = attribute_complaint_sources(np.array([lat]), np.array([lon]))[0]
+    
+    record = build_complaint_record(payload["id"], complaint, legal_basis, attribution, timestamp=payload["received_at"])
+    complaint_store.add(record)
+    complaint_store.flush()
+    
+    job_queue.enqueue("complaint.document", {"id": record["id"]}, dedup_key=f"document:{record['id']}", ref=record["id"])
+    enqueue_notifications([record])
+
+def enqueue_notifications(records):
+    """
+    One notification job per complaint and authority, so a failed
+    delivery is retried without re-sending the others. Keyed by both, so
+    queueing them again (a retried filing job) sends nothing twice.
+    """
+    payloads = [
+        {"id": record["id"], "authority": authority}
+        for record in records
+        for authority in record["processing"]["authorities_notified"]
+    ]
+    job_queue.enqueue_many(
+        "complaint.notify",
+        payloads,
+        refs=[payload["id"] for payload in payloads],
+        dedup_keys=[f"{payload['id']}:{payload['authority']}" for payload in payloads]
+    )
+
+def render_document_job(payload: dict):
+    complaint = complaint_store.get(payload["id"])
+    if complaint is None:
+        raise LookupError(f"complaint {payload['id']} not stored")
+    store_legal_document(complaint)
+
+def notify_authority_job(payload: dict):
+    complaint = complaint_store.get(payload["id"])
+    if complaint is None:
+        raise LookupError(f"complaint {payload['id']} not stored")
+    violation = complaint["violation"]
+    notification_sink.send({
+        "to": authority_address(payload["authority"]),
+        "authority": payload["authority"],
+        "complaint_id": complaint["id"],
+        "subject": f"Air pollution complaint {complaint['id']} (AQI {violation['aqi']:.0f})",
+        "body": generate_legal_document(complaint),
+        "document_url": f"/complaint/{complaint['id']}/document"
+    })
+
+def enqueue_alerts(alerts):
+    """
+    Queue notifications for (user ids, aqi, band) alerts, ALERT_JOB_BATCH
+    per job. The profile fields the message needs travel with the job.
+    """
+    payloads = []
+    for user_ids, aqi, _ in alerts:
+        for user_id in user_ids:
+            user = user_subscriptions.profiles.get(user_id)
+            if user is None:
+                continue  # removed since the tick matched
+            payloads.append({
+                "user_id": user_id,
+                "contact": user["contact"],
+                "aqi": round(aqi),
+                "age": user["age"],
+                "conditions": ",".join(user["health_conditions"]) or None
+            })
+    job_queue.enqueue_many("alert.notify", [
+        {"alerts": payloads[i:i + ALERT_JOB_BATCH]} for i in range(0, len(payloads), ALERT_JOB_BATCH)
+    ])
+
+def notify_alerts_job(payload: dict):
+    for alert in payload["alerts"]:
+        category = AQI_CATEGORIES.lookup(alert["aqi"])["name"]
+        notification_sink.send({
+            "to": alert["contact"] or f"{alert['user_id']}@users.airjustice.local",
+            "user_id": alert["user_id"],
+            "subject": f"Air quality alert: AQI {alert['aqi']} ({category})",
+            "body": "\n".join(generate_medical_advice(alert["aqi"], alert["age"], alert["conditions"])),
+            "aqi": alert["aqi"],
+            "category": category
+        })
+
+def pending_complaint_status(complaint_id: str):
+    """
+    Status of a complaint that is still queued or failed processing
+    """
+    job = job_queue.find("complaint.file", complaint_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    status = "PROCESSING_FAILED" if job["status"] == "failed" else "QUEUED"
+    return {
+        "success": True,
+        "complaint_id": complaint_id,
+        "status": status,
+        "details": None,
+        "job": {"status": job["status"], "attempts": job["attempts"], "error": job["error"]},
+        "updates": [],
+        "next_milestone": "Registration once processing completes"
+    }
+
+def new_complaint_id():
+    return f"AJ-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+
+def attribute_complaint_sources(lats: np.ndarray, lons: np.ndarray):
+    """
+    Primary source type and type shares for every complaint location,
+    scored in one batch against the emitter catalogue
+    """
+    shares, primary = emitter_catalogue.shares(emitter_catalogue.attribute_many(lats, lons))
+    return [
+        {
+            "primary_source": SOURCE_TYPES[p] if p >= 0 else None,
+            "contributions": {
+                source_type: pct for source_type, pct in zip(SOURCE_TYPES, np.round(row * 100, 1).tolist()) if pct > 0
+            },
+            "radius_km": DEFAULT_RADIUS_KM
         }
-    else:
-        return {
-            "alert": "CONDITIONS MANAGEABLE",
-            "actions": [
-                "Normal activities with precautions",
-                "Stay hydrated",
-                "Monitor AQI changes",
-                "Support clean air initiatives"
-            ]
+        for p, row in zip(primary.tolist(), shares)
+    ]
+
+def build_complaint_record(complaint_id: str, complaint: ComplaintData, legal_basis: list, attribution: dict = None, timestamp: str = None):
+    return {
+        "id": complaint_id,
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "status": "SUBMITTED",
+        "complainant": {
+            "type": "citizen",
+            "platform": "Air Justice",
+            "profile": complaint.user_profile.dict() if complaint.user_profile else None
+        },
+        "violation": {
+            "location": complaint.location.dict(),
+            "aqi": complaint.aqi,
+            "description": complaint.description,
+            "source_type": complaint.source_type,
+            "source_attribution": attribution,
+            "legal_basis": legal_basis
+        },
+        "processing": {
+            "authorities_notified": [
+                "National Green Tribunal",
+                "Central Pollution Control Board",
+                "State Pollution Control Board",
+                "District Magistrate"
+            ],
+            "expected_timeline": {
+                "acknowledgment": "24 hours",
+                "investigation": "48 hours",
+                "action": "7 days",
+                "resolution": "30 days"
+            },
+            "tracking_url": f"https://airjustice.tech/track/{complaint_id}",
+            "case_officer": "To be assigned"
+        },
+        "impact_analysis": {
+            "affected_area": "5 km radius",
+            "estimated_population": 2500,
+            "health_risk": "HIGH" if complaint.aqi > 200 else "MEDIUM",
+            "environmental_impact": "SIGNIFICANT" if complaint.aqi > 250 else "MODERATE"
         }
+    }
+
+def generate_predictions_recommendations(predictions):
+    peak_aqi = max(p["aqi"] for p in predictions)
+    return PREDICTION_ALERTS.lookup(peak_aqi)
 
 def generate_legal_actions(violations):
     if not violations:
@@ -743,102 +1544,45 @@ def generate_legal_actions(violations):
     
     return actions
 
+@metrics_registry.instrument()
 def generate_legal_document(complaint):
-    return f"""
-    ======================================================================
-                     OFFICIAL LEGAL COMPLAINT DOCUMENT
-    ======================================================================
-    
-    COMPLAINT ID: {complaint['id']}
-    DATE: {complaint['timestamp']}
-    STATUS: {complaint['status']}
-    
-    VIOLATION DETAILS:
-    Location: {complaint['violation']['location']}
-    AQI: {complaint['violation']['aqi']}
-    Source Type: {complaint['violation']['source_type'] or 'Multiple Sources'}
-    
-    LEGAL BASIS:
-    {chr(10).join([f"- {v['name']} (Exceeded by {v['excess']} points)" for v in complaint['violation']['legal_basis']])}
-    
-    IMPACT ANALYSIS:
-    - Affected Area: {complaint['impact_analysis']['affected_area']}
-    - Estimated Population: {complaint['impact_analysis']['estimated_population']}
-    - Health Risk: {complaint['impact_analysis']['health_risk']}
-    - Environmental Impact: {complaint['impact_analysis']['environmental_impact']}
-    
-    REQUESTED ACTIONS:
-    1. Immediate investigation under relevant environmental laws
-    2. Installation of continuous monitoring systems
-    3. Penalties for violators as per law
-    4. Public health advisory issuance
-    5. Regular compliance reporting
-    
-    AUTHORITIES NOTIFIED:
-    {chr(10).join([f"- {auth}" for auth in complaint['processing']['authorities_notified']])}
-    
-    This complaint is filed in public interest under:
-    - Right to Information Act, 2005
-    - Right to Clean Air (Article 21, Constitution)
-    - Environmental protection laws
-    
-    ======================================================================
-    """
-
-def generate_status_updates(complaint_id: str, status: str):
-    updates = []
-    base_time = datetime.now() - timedelta(hours=np.random.randint(1, 72))
-    
-    status_sequence = ["SUBMITTED", "UNDER_REVIEW", "INVESTIGATION_STARTED", "ACTION_TAKEN", "RESOLVED"]
-    
-    for s in status_sequence:
-        if status_sequence.index(s) <= status_sequence.index(status):
-            update_time = base_time + timedelta(hours=status_sequence.index(s) * 12)
-            updates.append({
-                "timestamp": update_time.isoformat(),
-                "status": s,
-                "message": get_status_message(s),
-                "authority": get_authority_for_status(s)
-            })
+    return document_renderer.render_text(complaint)
+
+def complaint_document_response(complaint_id: str, fmt: str, if_none_match: Optional[str], range_header: Optional[str]):
+    complaint = complaint_store.get(complaint_id)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
     
-    return updates
+    # The document shows the status, so each status gets its own artifact
+    ref = artifact_store.resolve(document_ref_name(complaint, fmt))
+    if ref is None:
+        ref = store_legal_document(complaint, fmt)
+    
+    digest, ext = ref
+    return artifact_response(
+        artifact_store.path(digest, ext),
+        digest,
+        DOCUMENT_FORMATS[fmt][1],
+        if_none_match=if_none_match,
+        range_header=range_header
+    )
 
-def get_status_message(status: str):
-    messages = {
-        "SUBMITTED": "Complaint received and registered",
-        "UNDER_REVIEW": "Under initial review by authorities",
-        "INVESTIGATION_STARTED": "Field investigation initiated",
-        "ACTION_TAKEN": "Corrective actions being implemented",
-        "RESOLVED": "Complaint resolved successfully"
-    }
-    return messages.get(status, "Status update")
-
-def get_authority_for_status(status: str):
-    authorities = {
-        "SUBMITTED": "Air Justice System",
-        "UNDER_REVIEW": "NGT Registry",
-        "INVESTIGATION_STARTED": "CPCB Field Team",
-        "ACTION_TAKEN": "Local Pollution Board",
-        "RESOLVED": "All Concerned Authorities"
-    }
-    return authorities.get(status, "System")
-
-def get_next_milestone(status: str):
-    milestones = {
-        "SUBMITTED": "Authority acknowledgment within 24 hours",
-        "UNDER_REVIEW": "Investigation start within 48 hours",
-        "INVESTIGATION_STARTED": "Corrective actions within 7 days",
-        "ACTION_TAKEN": "Resolution confirmation within 30 days",
-        "RESOLVED": "Case closed successfully"
-    }
-    return milestones.get(status, "Monitoring in progress")
+def document_ref_name(complaint, fmt: str):
+    return f"{complaint['id']}.{complaint['status']}.{fmt}"
+
+@metrics_registry.instrument()
+def store_legal_document(complaint, fmt: str = "text"):
+    """
+    Render a complaint document once per status and keep it as an
+    on-disk artifact
+    """
+    _, _, ext = DOCUMENT_FORMATS[fmt]
+    digest = artifact_store.put(document_renderer.render(complaint, fmt), ext)
+    artifact_store.link(document_ref_name(complaint, fmt), digest, ext)
+    return digest, ext
 
 def generate_medical_advice(aqi: float, age: Optional[int], conditions: Optional[str]):
-    advice = []
-    
-    if aqi > 200:
-        advice.append("CONSULT DOCTOR IF: Experiencing breathing difficulty, chest pain, or dizziness")
-        advice.append("EMERGENCY: Call ambulance if severe respiratory distress")
+    advice = list(MEDICAL_ESCALATION.lookup(aqi))
     
     if age and age < 12:
         advice.append("PEDIATRIC ADVICE: Limit outdoor play, use child-sized masks")
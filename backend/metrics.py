@@ -0,0 +1,324 @@
+"""
+Request and hot-path instrumentation.
+
+MetricsMiddleware records per-route latency, in-flight requests and
+payload sizes; @registry.instrument times internal helpers. Everything
+is rendered in the Prometheus text exposition format for /metrics.
+SamplingProfiler optionally samples the serving thread's stack during
+1 in N requests and aggregates collapsed stacks for flame graphs.
+"""
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+import inspect
+import os
+import sys
+import threading
+import time
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+FUNCTION_BUCKETS = [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0]
+SIZE_BUCKETS = [100, 1000, 10000, 100000, 1000000, 10000000]
+
+PROFILE_EVERY = int(os.environ.get("AQI_PROFILE_EVERY", "0"))
+PROFILE_INTERVAL_SECONDS = 0.005
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra: str = ""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = list(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[slot] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float("inf")], values):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {values[-1]}")
+        return lines
+
+class Gauge:
+    """
+    Numeric value per label set; counters use the same class with
+    kind="counter" and only ever inc()
+    """
+
+    def __init__(self, name: str, help: str, labels=(), kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, amount: float = 1, *label_values):
+        self.inc(-amount, *label_values)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.function_duration = self.histogram(
+            "aqi_function_duration_seconds", "Time spent in instrumented helpers", ["function"], FUNCTION_BUCKETS
+        )
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labels=()):
+        metric = Gauge(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels=()):
+        metric = Gauge(name, help, labels, kind="counter")
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """
+        Register func() -> iterable of metrics, called on every scrape
+        for values owned by other components (e.g. cache counters)
+        """
+        self.collectors.append(func)
+        return func
+
+    def instrument(self, name: str = None):
+        """
+        Decorator recording the duration of a sync or async function
+        """
+        def decorator(func):
+            label = name or func.__name__
+            observe = self.function_duration.observe
+
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        observe(time.perf_counter() - start, label)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    observe(time.perf_counter() - start, label)
+            return wrapper
+        return decorator
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler for selected requests.
+
+    While at least one sampled request is in flight, a daemon thread
+    records the serving thread's stack every interval. Stacks are kept
+    in collapsed form ("a;b;c count"), ready for flamegraph.pl/speedscope.
+
+    Samples are taken per thread, not per request. Under asyncio every
+    request shares the event loop thread, so while a sampled request is
+    open the profile also picks up whatever other requests, background
+    tasks and loop internals run on that loop. "1 in every" picks when
+    sampling starts; it does not limit the profile to those requests.
+    """
+
+    def __init__(self, every: int = PROFILE_EVERY, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.every = every
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests = 0
+        self._active = Counter()  # thread id -> sampled requests in flight
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def should_sample(self):
+        if self.every <= 0:
+            return False
+        self.requests += 1
+        return self.requests % self.every == 0
+
+    def begin(self):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        return thread_id
+
+    def end(self, thread_id: int):
+        with self._lock:
+            self._active[thread_id] -= 1
+            if self._active[thread_id] <= 0:
+                del self._active[thread_id]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                thread_ids = list(self._active)
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = collapse_stack(frame)
+                    with self._lock:
+                        self.stacks[stack] += 1
+                        self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def status(self):
+        return {
+            "every": self.every,
+            "interval_seconds": self.interval,
+            "sampled_requests": self.requests // self.every if self.every > 0 else 0,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks)
+        }
+
+def collapse_stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency by route template, in-flight
+    requests and request/response body sizes
+    """
+
+    def __init__(self, app, registry: MetricsRegistry, profiler: SamplingProfiler = None):
+        self.app = app
+        self.profiler = profiler
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"]
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "Requests currently being served")
+        self.request_size = registry.histogram(
+            "http_request_size_bytes", "Request body size by route", ["method", "route"], SIZE_BUCKETS
+        )
+        self.response_size = registry.histogram(
+            "http_response_size_bytes", "Response body size by route", ["method", "route"], SIZE_BUCKETS
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal response_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        profiled = self.profiler is not None and self.profiler.should_sample()
+        thread_id = self.profiler.begin() if profiled else None
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec()
+            if profiled:
+                self.profiler.end(thread_id)
+            # Route templates keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            self.latency.observe(elapsed, method, route, str(status))
+            self.request_size.observe(request_bytes, method, route)
+            self.response_size.observe(response_bytes, method, route)
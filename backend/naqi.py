@@ -0,0 +1,84 @@
+"""
+Indian National Air Quality Index (NAQI) from pollutant concentrations.
+
+Each pollutant's concentration is mapped to a sub-index by linear
+interpolation between the CPCB breakpoints; the AQI is the highest
+sub-index and that pollutant is reported as dominant. Everything works
+on arrays (one np.interp per pollutant), so historical data can be
+reprocessed in bulk. Concentrations above the last breakpoint cap the
+sub-index at 500.
+
+Units follow CPCB: µg/m³ for every pollutant except CO (mg/m³).
+Averaging periods are the caller's responsibility (24 h for most,
+8 h for CO and O3).
+"""
+import numpy as np
+
+POLLUTANTS = ("pm25", "pm10", "no2", "so2", "co", "o3", "nh3", "pb")
+
+# Sub-index values at each concentration breakpoint
+INDEX_BREAKPOINTS = (0, 50, 100, 200, 300, 400, 500)
+
+# Concentrations at INDEX_BREAKPOINTS; the last edge closes the Severe band
+CONCENTRATION_BREAKPOINTS = {
+    "pm25": (0, 30, 60, 90, 120, 250, 380),
+    "pm10": (0, 50, 100, 250, 350, 430, 510),
+    "no2": (0, 40, 80, 180, 280, 400, 520),
+    "so2": (0, 40, 80, 380, 800, 1600, 2400),
+    "co": (0, 1.0, 2.0, 10, 17, 34, 51),
+    "o3": (0, 50, 100, 168, 208, 748, 1028),
+    "nh3": (0, 200, 400, 800, 1200, 1800, 2400),
+    "pb": (0, 0.5, 1.0, 2.0, 3.0, 3.5, 4.0)
+}
+
+UNITS = {pollutant: "mg/m³" if pollutant == "co" else "µg/m³" for pollutant in POLLUTANTS}
+
+# CPCB requires at least three pollutants, one of them particulate
+MIN_POLLUTANTS = 3
+PARTICULATES = ("pm25", "pm10")
+
+_INDEX_EDGES = np.array(INDEX_BREAKPOINTS, dtype=np.float64)
+_CONCENTRATION_EDGES = {p: np.array(edges, dtype=np.float64) for p, edges in CONCENTRATION_BREAKPOINTS.items()}
+
+def sub_index(pollutant: str, concentrations):
+    """
+    Sub-index for every concentration of one pollutant, NaN stays NaN
+    """
+    values = np.asarray(concentrations, dtype=np.float64)
+    return np.interp(np.maximum(values, 0.0), _CONCENTRATION_EDGES[pollutant], _INDEX_EDGES)
+
+def concentration_for(pollutant: str, sub_indices):
+    """
+    Inverse of sub_index: the concentration giving each sub-index
+    """
+    values = np.asarray(sub_indices, dtype=np.float64)
+    return np.interp(np.clip(values, 0, INDEX_BREAKPOINTS[-1]), _INDEX_EDGES, _CONCENTRATION_EDGES[pollutant])
+
+def compute_naqi(concentrations: dict, min_pollutants: int = MIN_POLLUTANTS):
+    """
+    NAQI for arrays of readings.
+
+    concentrations maps pollutant names to equally shaped arrays, with
+    NaN (or a missing key) for pollutants that were not measured.
+    Returns the AQI (NaN where the CPCB minimum data rule is not met),
+    the dominant pollutant index into POLLUTANTS (-1 where invalid),
+    the (pollutants, readings) sub-index matrix and the validity mask.
+    """
+    shape = np.broadcast(*[np.asarray(v) for v in concentrations.values()]).shape if concentrations else ()
+    indices = np.full((len(POLLUTANTS),) + shape, np.nan)
+    for row, pollutant in enumerate(POLLUTANTS):
+        if pollutant in concentrations:
+            indices[row] = sub_index(pollutant, concentrations[pollutant])
+
+    measured = ~np.isnan(indices)
+    particulate = measured[[POLLUTANTS.index(p) for p in PARTICULATES]].any(axis=0)
+    valid = (measured.sum(axis=0) >= min_pollutants) & particulate
+
+    dominant = np.where(measured, indices, -np.inf).argmax(axis=0)
+    aqi = np.take_along_axis(indices, dominant[None], axis=0)[0]
+    return {
+        "aqi": np.where(valid, aqi, np.nan),
+        "dominant": np.where(valid, dominant, -1),
+        "sub_indices": indices,
+        "valid": valid
+    }
@@ -0,0 +1,75 @@
+"""
+Outgoing authority notifications.
+
+The sink is chosen by AQI_NOTIFY_SINK:
+  - a file path (default outbox/notifications.jsonl): one JSON line per
+    message, for local runs and tests
+  - http(s)://host/path: POST each message as JSON
+  - smtp://host:port: send each message as a plain-text email, e.g. to
+    a local debugging SMTP server
+
+Sinks are synchronous and called from job worker threads.
+"""
+import json
+import os
+import smtplib
+import threading
+from email.message import EmailMessage
+from urllib.parse import urlparse
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTBOX = os.path.join(BASE_DIR, "outbox", "notifications.jsonl")
+SENDER = "complaints@airjustice.tech"
+
+AUTHORITY_ADDRESSES = {
+    "National Green Tribunal": "ngt@nic.in",
+    "Central Pollution Control Board": "cpcb@nic.in"
+}
+
+def authority_address(authority: str):
+    return AUTHORITY_ADDRESSES.get(authority) or f"{authority.lower().replace(' ', '.')}@airjustice.local"
+
+class OutboxSink:
+    def __init__(self, path: str = DEFAULT_OUTBOX):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, message: dict):
+        line = json.dumps(message) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+class HTTPSink:
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self._client = httpx.Client(timeout=timeout)
+
+    def send(self, message: dict):
+        self._client.post(self.url, json=message).raise_for_status()
+
+class SMTPSink:
+    def __init__(self, host: str, port: int = 25, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def send(self, message: dict):
+        email = EmailMessage()
+        email["From"] = SENDER
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email.set_content(message["body"])
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(email)
+
+def create_notification_sink(target: str = None):
+    target = target or os.environ.get("AQI_NOTIFY_SINK", DEFAULT_OUTBOX)
+    url = urlparse(target)
+    if url.scheme in ("http", "https"):
+        return HTTPSink(target)
+    if url.scheme == "smtp":
+        return SMTPSink(url.hostname or "localhost", url.port or 25)
+    return OutboxSink(target)
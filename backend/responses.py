@@ -0,0 +1,199 @@
+"""
+JSON response layer.
+
+Every route is registered through FastJSONRoute. Its handler's dict is
+encoded with orjson directly instead of FastAPI's jsonable_encoder, and
+an optional ?fields= parameter trims it to the requested paths.
+
+Constant fragments (anything built with bands.freeze, e.g. category
+legends, law penalty lists or the endpoint map) are serialized once and spliced into every response
+as raw bytes. Results of response-cached handlers keep their encoded
+bytes as well, so a cache hit is served without re-encoding.
+"""
+import asyncio
+import inspect
+import secrets
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from bands import FrozenDict, FrozenList, freeze
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_SUBCLASS
+ENCODED_MEMO_ENTRIES = 256
+
+# Placeholders are JSON strings no client data can produce: NUL-delimited
+# around a random per-process token
+_TOKEN = secrets.token_hex(8)
+_fragments = {}
+
+def _fragment_bytes(value):
+    entry = _fragments.get(id(value))
+    if entry is None:
+        # Keep a reference so the id is never reused by another object
+        plain = dict(value) if isinstance(value, FrozenDict) else list(value)
+        entry = _fragments[id(value)] = (value, dumps(plain))
+    return entry[1]
+
+def dumps(content):
+    """
+    orjson encoding with frozen fragments spliced in from their cached
+    bytes
+    """
+    spliced = []
+
+    def default(value):
+        if isinstance(value, (FrozenDict, FrozenList)):
+            spliced.append(value)
+            return f"\x00{_TOKEN}{len(spliced) - 1}\x00"
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, float):
+            return float(value)  # np.float64 and other float subclasses
+        if isinstance(value, tuple):
+            return list(value)  # named tuples
+        return jsonable_encoder(value)
+
+    body = orjson.dumps(content, default=default, option=ORJSON_OPTIONS)
+    for i, value in enumerate(spliced):
+        body = body.replace(f'"\\u0000{_TOKEN}{i}\\u0000"'.encode(), _fragment_bytes(value), 1)
+    return body
+
+def prebuilt(value):
+    """
+    Freeze a constant and serialize it now, so requests only splice it
+    """
+    value = freeze(value)
+    if isinstance(value, (FrozenDict, FrozenList)):
+        _fragment_bytes(value)
+    return value
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+def parse_fields(fields: str):
+    """
+    "aqi.value,aqi.category" -> {"aqi": {"value": {}, "category": {}}};
+    an empty subtree selects the whole value
+    """
+    tree = {}
+    for path in fields.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        node = tree
+        for part in parts[:-1]:
+            if part in node and not node[part]:
+                break  # a shorter path already selects all of it
+            node = node.setdefault(part, {})
+        else:
+            if parts:
+                node[parts[-1]] = {}
+    return tree
+
+def _select(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, dict):
+        return {key: _select(value[key], subtree) for key, subtree in tree.items() if key in value}
+    if isinstance(value, (list, tuple)):
+        return [_select(item, tree) for item in value]
+    return value
+
+def _merge(tree, other):
+    for key, subtree in other.items():
+        if key not in tree:
+            tree[key] = subtree
+        elif tree[key] and subtree:
+            _merge(tree[key], subtree)
+        else:
+            tree[key] = {}
+
+def select_fields(content, fields: str):
+    """
+    Keep only the requested dotted paths. A path whose first part is not
+    a top-level key is looked up inside the "data" envelope, so /aqi
+    takes fields=aqi.value,aqi.category. Lists apply the path to every
+    item; "success" is always kept.
+    """
+    tree = parse_fields(fields)
+    if not tree or not isinstance(content, dict):
+        return content
+
+    top = {}
+    inner = {}
+    for key, subtree in tree.items():
+        if key in content:
+            top[key] = subtree
+        elif isinstance(content.get("data"), dict):
+            inner[key] = subtree
+    if inner:
+        if "data" not in top:
+            top["data"] = inner
+        elif top["data"]:
+            _merge(top["data"], inner)
+
+    selected = _select(content, top) if top else {}
+    if "success" in content:
+        selected = {"success": content["success"], **selected}
+    return selected
+
+class EncodedMemo:
+    """
+    Encoded bytes of recently served result objects, by identity. Holds
+    the objects themselves so their ids stay unique while memoized.
+    """
+
+    def __init__(self, max_entries: int = ENCODED_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def encode(self, content):
+        entry = self._entries.get(id(content))
+        if entry is not None and entry[0] is content:
+            self._entries.move_to_end(id(content))
+            return entry[1]
+        body = dumps(content)
+        self._entries[id(content)] = (content, body)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+def sparse_json(endpoint, status_code: int = 200):
+    """
+    Wrap a handler so dict results become ORJSONResponses with the
+    route's status code and the route accepts ?fields=. Handlers
+    returning a Response are passed through.
+    """
+    memo = EncodedMemo() if getattr(endpoint, "response_cached", False) else None
+    is_async = asyncio.iscoroutinefunction(endpoint)
+
+    @wraps(endpoint)
+    async def wrapper(*args, fields: Optional[str] = None, **kwargs):
+        if is_async:
+            content = await endpoint(*args, **kwargs)
+        else:
+            content = await run_in_threadpool(endpoint, *args, **kwargs)
+        if isinstance(content, Response):
+            return content
+        if fields:
+            return ORJSONResponse(dumps(select_fields(content, fields)), status_code=status_code)
+        return ORJSONResponse(memo.encode(content) if memo is not None else dumps(content), status_code=status_code)
+
+    signature = inspect.signature(endpoint)
+    fields_parameter = inspect.Parameter("fields", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[str])
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), fields_parameter])
+    return wrapper
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, sparse_json(endpoint, kwargs.get("status_code") or 200), **kwargs)
@@ -0,0 +1,113 @@
+"""
+Deterministic random streams for the simulated parts of the API.
+
+Every draw comes from a stream keyed by (endpoint, location cell, time
+bucket) and a global seed, so identical inputs inside one window give
+identical outputs. Nothing touches the legacy global np.random state.
+Set AQI_RNG_SEED to replay a run and AQI_RNG_FROZEN=1 to drop the time
+bucket from every key.
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from cache import CELL_SIZE_DEG
+
+RNG_SEED = int(os.environ.get("AQI_RNG_SEED", "0"))
+RNG_FROZEN = os.environ.get("AQI_RNG_FROZEN", "0") == "1"
+RNG_WINDOW_SECONDS = 300
+
+MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def splitmix64(x):
+    """
+    SplitMix64 finalizer over a uint64 array (wrapping arithmetic)
+    """
+    x = np.asarray(x, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _mix(key, part):
+    return splitmix64(key ^ (np.asarray(part).astype(np.int64).astype(np.uint64) & MASK64))
+
+class PointStreams:
+    """
+    One independent stream per point, drawn in a single vectorized call.
+
+    Mirrors the Generator methods the models use; the first axis of size
+    must be the number of points. Successive calls continue the streams.
+    """
+
+    def __init__(self, keys):
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.draws = 0
+
+    def _bits(self, size):
+        size = (self.keys.size,) if size is None else tuple(np.atleast_1d(size))
+        if size[0] != self.keys.size:
+            raise ValueError(f"first dimension must be {self.keys.size}, got {size[0]}")
+        per_point = int(np.prod(size[1:], dtype=np.int64))
+        counters = np.arange(self.draws, self.draws + per_point, dtype=np.uint64)
+        self.draws += per_point
+        return splitmix64(self.keys[:, None] ^ splitmix64(counters)[None, :]).reshape(size)
+
+    def random(self, size=None):
+        return (self._bits(size) >> np.uint64(11)) * (1.0 / 2 ** 53)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + (high - low) * self.random(size)
+
+    def integers(self, low, high, size=None):
+        return low + (self._bits(size) % np.uint64(high - low)).astype(np.int64)
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        # Box-Muller on two uniforms, 1 - u keeps the log argument positive
+        u1 = 1.0 - self.random(size)
+        u2 = self.random(size)
+        return loc + scale * np.sqrt(-2.0 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+class RNGService:
+    def __init__(self, seed: int = RNG_SEED, window: float = RNG_WINDOW_SECONDS, frozen: bool = RNG_FROZEN, cell_size: float = CELL_SIZE_DEG):
+        self.seed = seed
+        self.window = window
+        self.frozen = frozen
+        self.cell_size = cell_size
+
+    def _base(self, endpoint: str, *parts):
+        digest = hashlib.blake2b(repr((self.seed, endpoint) + parts).encode(), digest_size=8).digest()
+        return np.uint64(int.from_bytes(digest, "little"))
+
+    def bucket(self, now: float = None, window: float = None):
+        """
+        Time bucket index, 0 when frozen or when window is 0
+        """
+        window = self.window if window is None else window
+        if self.frozen or not window:
+            return 0
+        return int((time.time() if now is None else now) // window)
+
+    def point_keys(self, endpoint: str, lats, lons, now: float = None, window: float = None):
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        key = np.full(lats.shape, self._base(endpoint, self.bucket(now, window)), dtype=np.uint64)
+        key = _mix(key, np.floor(lats / self.cell_size))
+        return _mix(key, np.floor(lons / self.cell_size))
+
+    def points(self, endpoint: str, lats, lons, now: float = None, window: float = None):
+        """
+        Per-point streams for a batch of coordinates; a point gets the
+        same numbers whether it is requested alone or in a batch
+        """
+        return PointStreams(self.point_keys(endpoint, lats, lons, now, window))
+
+    def at(self, endpoint: str, lat: float, lon: float, now: float = None, window: float = None):
+        """
+        Generator for one location cell and time bucket
+        """
+        key = int(self.point_keys(endpoint, lat, lon, now, window)[0])
+        return np.random.Generator(np.random.PCG64(key))
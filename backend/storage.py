@@ -0,0 +1,373 @@
+"""
+Complaint storage backends.
+
+SQLiteComplaintStore is the default and keeps complaints across restarts
+and worker processes. MemoryComplaintStore keeps everything in a dict
+and is meant for tests and local experiments.
+
+Status changes are appended as events (see timeline.py) and the current
+status is materialized on the complaint together with the time its next
+scheduled transition is due. advance() applies every due transition in
+one pass, so status reads stay plain lookups.
+"""
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from cache import location_cell
+from timeline import due_events, next_due
+
+ADVANCE_BATCH = 5000
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "complaints.db")
+
+class ComplaintStore:
+    """
+    Interface shared by all complaint backends
+    """
+
+    def add(self, record: dict):
+        self.add_many([record])
+
+    def add_many(self, records):
+        raise NotImplementedError
+
+    def get(self, complaint_id: str):
+        raise NotImplementedError
+
+    def update_status(self, complaint_id: str, status: str, at: str = None):
+        """
+        Append a status event and make it the current status
+        """
+        raise NotImplementedError
+
+    def timeline(self, complaint_id: str):
+        """
+        (status, ISO timestamp) events in the order they happened
+        """
+        raise NotImplementedError
+
+    def advance(self, now: float = None):
+        """
+        Apply every time-based transition due by now; returns how many
+        events were appended
+        """
+        raise NotImplementedError
+
+    def find_by_location(self, lat: float, lon: float, limit: int = 100):
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class MemoryComplaintStore(ComplaintStore):
+    """
+    Dict keyed by complaint id with a secondary cell index and a heap of
+    upcoming transitions
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._by_cell = {}
+        self._events = {}
+        self._due = []
+        self._lock = threading.Lock()
+
+    def add_many(self, records):
+        with self._lock:
+            for record in records:
+                existing = self._records.get(record["id"])
+                if existing is not None:
+                    # Written again: keep the status it has advanced to
+                    self._records[record["id"]] = {**record, "status": existing["status"]}
+                    continue
+                self._events[record["id"]] = [(record["status"], record["timestamp"])]
+                location = record["violation"]["location"]
+                self._by_cell.setdefault(location_cell(location["lat"], location["lon"]), []).append(record["id"])
+                self._records[record["id"]] = record
+                self._schedule(record)
+
+    def _schedule(self, record):
+        due = next_due(record["status"], record["timestamp"])
+        if due is not None:
+            heapq.heappush(self._due, (due, record["id"], record["status"]))
+
+    def get(self, complaint_id: str):
+        return self._records.get(complaint_id)
+
+    def update_status(self, complaint_id: str, status: str, at: str = None):
+        with self._lock:
+            record = self._records.get(complaint_id)
+            if record is None:
+                return
+            record["status"] = status
+            self._events[complaint_id].append((status, at or _now_iso()))
+            self._schedule(record)
+
+    def timeline(self, complaint_id: str):
+        return list(self._events.get(complaint_id, ()))
+
+    def advance(self, now: float = None):
+        now = time.time() if now is None else now
+        applied = 0
+        with self._lock:
+            while self._due and self._due[0][0] <= now:
+                _, complaint_id, status = heapq.heappop(self._due)
+                record = self._records[complaint_id]
+                if record["status"] != status:
+                    continue  # superseded by a manual update
+                events = due_events(status, record["timestamp"], now)
+                if not events:
+                    continue
+                self._events[complaint_id].extend(events)
+                record["status"] = events[-1][0]
+                self._schedule(record)
+                applied += len(events)
+        return applied
+
+    def find_by_location(self, lat: float, lon: float, limit: int = 100):
+        ids = self._by_cell.get(location_cell(lat, lon), [])
+        return [self._records[i] for i in reversed(ids[-limit:])]
+
+    def count(self):
+        return len(self._records)
+
+class SQLiteComplaintStore(ComplaintStore):
+    """
+    SQLite (WAL mode) store indexed by id, timestamp, status and location cell.
+
+    add() buffers records and a background thread writes them in one
+    transaction per batch; reads check the buffer first so a complaint is
+    visible to its own process as soon as it is filed.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = 64, flush_interval: float = 0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS complaints (
+                id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                status TEXT NOT NULL,
+                cell_lat INTEGER NOT NULL,
+                cell_lon INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                next_due REAL
+            );
+            CREATE TABLE IF NOT EXISTS complaint_events (
+                complaint_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                at TEXT NOT NULL,
+                PRIMARY KEY (complaint_id, seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_complaints_timestamp ON complaints (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_complaints_status ON complaints (status);
+            CREATE INDEX IF NOT EXISTS idx_complaints_cell ON complaints (cell_lat, cell_lon);
+        """)
+        self._migrate()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_next_due ON complaints (next_due)")
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    def _migrate(self):
+        """
+        Databases created before status events get a next_due column and
+        one event for each complaint's current status
+        """
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(complaints)")]
+        if "next_due" in columns:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("ALTER TABLE complaints ADD COLUMN next_due REAL")
+        rows = self._conn.execute("SELECT id, status, timestamp FROM complaints").fetchall()
+        self._conn.executemany(
+            "UPDATE complaints SET next_due = ? WHERE id = ?",
+            [(next_due(status, timestamp), complaint_id) for complaint_id, status, timestamp in rows]
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO complaint_events VALUES (?, 0, ?, ?)",
+            [(complaint_id, status, timestamp) for complaint_id, status, timestamp in rows]
+        )
+        self._conn.execute("COMMIT")
+
+    def _flush_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def add_many(self, records):
+        with self._lock:
+            for record in records:
+                self._pending[record["id"]] = record
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            rows = []
+            events = []
+            for record in self._pending.values():
+                location = record["violation"]["location"]
+                cell_lat, cell_lon = location_cell(location["lat"], location["lon"])
+                rows.append((
+                    record["id"], record["timestamp"], record["status"], cell_lat, cell_lon, json.dumps(record),
+                    next_due(record["status"], record["timestamp"])
+                ))
+                events.append((record["id"], record["status"], record["timestamp"]))
+            self._conn.execute("BEGIN")
+            # A complaint written again keeps the status advance() moved it to
+            self._conn.executemany(
+                "INSERT INTO complaints VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "timestamp = excluded.timestamp, cell_lat = excluded.cell_lat, cell_lon = excluded.cell_lon, record = excluded.record",
+                rows
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO complaint_events VALUES (?, 0, ?, ?)", events)
+            self._conn.execute("COMMIT")
+            self._pending.clear()
+
+    def get(self, complaint_id: str):
+        with self._lock:
+            record = self._pending.get(complaint_id)
+            if record is not None:
+                return record
+            row = self._conn.execute(
+                "SELECT status, record FROM complaints WHERE id = ?", (complaint_id,)
+            ).fetchone()
+        return _row_to_record(row) if row else None
+
+    def update_status(self, complaint_id: str, status: str, at: str = None):
+        self.flush()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT timestamp FROM complaints WHERE id = ?", (complaint_id,)).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE complaints SET status = ?, next_due = ? WHERE id = ?",
+                    (status, next_due(status, row[0]), complaint_id)
+                )
+                self._append_events([(complaint_id, status, at or _now_iso())])
+            self._conn.execute("COMMIT")
+
+    def _append_events(self, events):
+        """
+        Insert (complaint id, status, at) events after each complaint's
+        last one; call inside a transaction
+        """
+        ids = sorted({complaint_id for complaint_id, _, _ in events})
+        last = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            last.update(self._conn.execute(
+                f"SELECT complaint_id, MAX(seq) FROM complaint_events WHERE complaint_id IN ({','.join('?' * len(chunk))}) "
+                "GROUP BY complaint_id",
+                chunk
+            ).fetchall())
+        rows = []
+        for complaint_id, status, at in events:
+            last[complaint_id] = last.get(complaint_id, -1) + 1
+            rows.append((complaint_id, last[complaint_id], status, at))
+        self._conn.executemany("INSERT INTO complaint_events VALUES (?, ?, ?, ?)", rows)
+
+    def timeline(self, complaint_id: str):
+        with self._lock:
+            events = self._conn.execute(
+                "SELECT status, at FROM complaint_events WHERE complaint_id = ? ORDER BY seq", (complaint_id,)
+            ).fetchall()
+            record = self._pending.get(complaint_id)
+        if not events and record is not None:
+            # Not flushed yet: the intake event flush() will write
+            return [(record["status"], record["timestamp"])]
+        return events
+
+    def advance(self, now: float = None):
+        now = time.time() if now is None else now
+        self.flush()
+        applied = 0
+        while True:
+            with self._lock:
+                # IMMEDIATE takes the write lock up front, so two processes
+                # never apply the same transition
+                self._conn.execute("BEGIN IMMEDIATE")
+                due = self._conn.execute(
+                    "SELECT id, status, timestamp FROM complaints WHERE next_due <= ? LIMIT ?", (now, ADVANCE_BATCH)
+                ).fetchall()
+                updates = []
+                events = []
+                for complaint_id, status, filed_at in due:
+                    transitions = due_events(status, filed_at, now)
+                    current = transitions[-1][0] if transitions else status
+                    updates.append((current, next_due(current, filed_at), complaint_id))
+                    events.extend((complaint_id, following, at) for following, at in transitions)
+                self._conn.executemany("UPDATE complaints SET status = ?, next_due = ? WHERE id = ?", updates)
+                if events:
+                    self._append_events(events)
+                self._conn.execute("COMMIT")
+            applied += len(events)
+            if len(due) < ADVANCE_BATCH:
+                return applied
+
+    def find_by_location(self, lat: float, lon: float, limit: int = 100):
+        self.flush()
+        cell_lat, cell_lon = location_cell(lat, lon)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, record FROM complaints WHERE cell_lat = ? AND cell_lon = ? "
+                "ORDER BY timestamp DESC LIMIT ?",
+                (cell_lat, cell_lon, limit)
+            ).fetchall()
+        return [_row_to_record(row) for row in rows]
+
+    def count(self):
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self._conn.close()
+
+def _now_iso():
+    return datetime.now().isoformat()
+
+def _row_to_record(row):
+    status, payload = row
+    record = json.loads(payload)
+    record["status"] = status
+    return record
+
+def create_complaint_store():
+    """
+    Build the store selected by AQI_COMPLAINT_STORE ("sqlite" or "memory").
+    AQI_COMPLAINT_BATCH_SIZE=1 writes every complaint through immediately,
+    which multi-worker servers need so any worker can read it back.
+    """
+    backend = os.environ.get("AQI_COMPLAINT_STORE", "sqlite")
+    if backend == "memory":
+        return MemoryComplaintStore()
+    return SQLiteComplaintStore(
+        os.environ.get("AQI_COMPLAINT_DB", DEFAULT_DB_PATH),
+        batch_size=int(os.environ.get("AQI_COMPLAINT_BATCH_SIZE", "64"))
+    )
@@ -0,0 +1,116 @@
+"""
+Live AQI fan-out per spatial cell.
+
+Clients subscribe to the cell containing their location. One background
+producer computes every active cell once per tick and pushes only the
+fields that changed to each subscriber queue.
+"""
+import asyncio
+import json
+from datetime import datetime
+
+import numpy as np
+
+from cache import CELL_SIZE_DEG, location_cell
+
+STREAM_TICK_SECONDS = 60
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 8
+
+class CellBroadcaster:
+    """
+    compute(lats, lons) receives the centres of all active cells and
+    returns one dict of fields per cell.
+    """
+
+    def __init__(self, compute, tick: float = STREAM_TICK_SECONDS, cell_size: float = CELL_SIZE_DEG):
+        self.compute = compute
+        self.tick = tick
+        self.cell_size = cell_size
+        self.subscribers = {}
+        self.latest = {}
+        self.ticks = 0
+        self._task = None
+
+    def subscribe(self, lat: float, lon: float):
+        cell = location_cell(lat, lon, self.cell_size)
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(cell, set()).add(queue)
+        if cell not in self.latest:
+            self.publish([cell])
+        queue.put_nowait({"type": "snapshot", **self.latest[cell]})
+        return cell, queue
+
+    def unsubscribe(self, cell, queue):
+        queues = self.subscribers.get(cell)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[cell]
+            self.latest.pop(cell, None)
+
+    def publish(self, cells):
+        """
+        Recompute the given cells in one batch and queue deltas
+        """
+        if not cells:
+            return
+        centres = (np.array(cells, dtype=np.float64) + 0.5) * self.cell_size
+        for cell, fields in zip(cells, self.compute(centres[:, 0], centres[:, 1])):
+            previous = self.latest.get(cell)
+            self.latest[cell] = fields
+            if previous is None:
+                continue
+            delta = {k: v for k, v in fields.items() if previous.get(k) != v and k != "timestamp"}
+            if not delta:
+                continue
+            message = {"type": "delta", "timestamp": fields.get("timestamp"), **delta}
+            for queue in self.subscribers.get(cell, ()):
+                if queue.full():
+                    queue.get_nowait()  # slow consumer, drop the oldest update
+                queue.put_nowait(message)
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.publish(list(self.subscribers))
+            self.ticks += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "active_cells": len(self.subscribers),
+            "subscribers": sum(len(queues) for queues in self.subscribers.values()),
+            "ticks": self.ticks,
+            "tick_seconds": self.tick
+        }
+
+async def sse_events(broadcaster: CellBroadcaster, lat: float, lon: float):
+    """
+    Server-Sent Events for one subscriber, with keepalive comments
+    """
+    cell, queue = broadcaster.subscribe(lat, lon)
+    try:
+        yield f"retry: {int(broadcaster.tick * 1000)}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield f": keepalive {datetime.now().isoformat()}\n\n"
+                continue
+            yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+    finally:
+        broadcaster.unsubscribe(cell, queue)
@@ -0,0 +1,250 @@
+"""
+AQI threshold alerts for registered users.
+
+Every subscription is a location and a threshold, snapped to the AQI
+category band the threshold falls in. The index maps (cell, band) to the
+ids of the users in that cell waiting for that band, so matching never
+looks at users whose cell did not change band.
+
+Once per tick the engine computes the AQI of every cell that has
+subscribers in one vectorized call, compares each cell's band with the
+previous tick and probes the index once per band a cell rose through.
+A cell's first evaluation only records its band; alerts fire on the
+crossings after that.
+
+Profiles live in the shared UserStore. Only the process holding the
+alert lease builds the index: it loads every profile when it takes the
+lease and follows the store's change log on each tick after that.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from bands import AQI_CATEGORIES
+from cache import CELL_SIZE_DEG, location_cell
+
+ALERT_TICK_SECONDS = 60
+ALERT_LEASE = "alerts"
+UNKNOWN_BAND = -1
+
+class SubscriptionIndex:
+    """
+    profiles is the user store (user id -> record); the index only holds
+    ids. compute(lats, lons) returns the AQI at the given cell centres.
+    """
+
+    def __init__(self, profiles: dict, compute, cell_size: float = CELL_SIZE_DEG, bands=AQI_CATEGORIES):
+        self.profiles = profiles
+        self.compute = compute
+        self.cell_size = cell_size
+        self.bands = bands
+        self.index = {}
+        self.cell_users = {}
+        self.evaluations = 0
+        self.alerts = 0
+        self.last_match_ms = 0.0
+        self._cells = []
+        self._centres = np.empty((0, 2), dtype=np.float64)
+        self._last_bands = np.empty(0, dtype=np.int64)
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._evaluate_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def band_for(self, threshold: float):
+        return self.bands.index(threshold)
+
+    def add(self, record: dict):
+        """
+        Store a user record (id, lat, lon, threshold, ...) and index it;
+        replaces an earlier record with the same id
+        """
+        cell = location_cell(record["lat"], record["lon"], self.cell_size)
+        band = self.band_for(record["threshold"])
+        with self._lock:
+            if record["id"] in self.profiles:
+                self._unindex(self.profiles[record["id"]])
+            self.profiles[record["id"]] = record
+            self.index.setdefault((cell, band), set()).add(record["id"])
+            count = self.cell_users.get(cell, 0)
+            self.cell_users[cell] = count + 1
+            if count == 0:
+                self._dirty = True
+
+    def add_many(self, records):
+        for record in records:
+            self.add(record)
+
+    def clear(self):
+        with self._lock:
+            self.profiles.clear()
+            self.index.clear()
+            self.cell_users.clear()
+            self._cells = []
+            self._centres = np.empty((0, 2), dtype=np.float64)
+            self._last_bands = np.empty(0, dtype=np.int64)
+            self._dirty = False
+
+    def remove(self, user_id: str):
+        with self._lock:
+            record = self.profiles.pop(user_id, None)
+            if record is not None:
+                self._unindex(record)
+        return record
+
+    def _unindex(self, record: dict):
+        cell = location_cell(record["lat"], record["lon"], self.cell_size)
+        key = (cell, self.band_for(record["threshold"]))
+        users = self.index.get(key)
+        if users is not None:
+            users.discard(record["id"])
+            if not users:
+                del self.index[key]
+        count = self.cell_users.get(cell, 0) - 1
+        if count > 0:
+            self.cell_users[cell] = count
+        else:
+            self.cell_users.pop(cell, None)
+            self._dirty = True
+
+    def _refresh(self):
+        """
+        Rebuild the cell arrays after cells gained or lost their last
+        subscriber, keeping the bands already known
+        """
+        known = dict(zip(self._cells, self._last_bands.tolist()))
+        self._cells = list(self.cell_users)
+        cells = np.array(self._cells, dtype=np.float64).reshape(-1, 2)
+        self._centres = (cells + 0.5) * self.cell_size
+        self._last_bands = np.array([known.get(cell, UNKNOWN_BAND) for cell in self._cells], dtype=np.int64)
+        self._dirty = False
+
+    def evaluate(self):
+        """
+        One tick: recompute every subscribed cell and return one alert
+        (user ids, aqi, band) per cell and band that was crossed
+        """
+        with self._evaluate_lock:
+            with self._lock:
+                if self._dirty:
+                    self._refresh()
+                cells, centres = self._cells, self._centres
+            if not cells:
+                return []
+
+            # The AQI model runs outside the index lock so registrations are
+            # not held up; cells added meanwhile are picked up next tick
+            values = np.asarray(self.compute(centres[:, 0], centres[:, 1]), dtype=np.float64)
+            current = self.bands.indexes(values)
+            return self._match(cells, values, current)
+
+    def _match(self, cells, values, current):
+        started = time.perf_counter()
+        alerts = []
+        with self._lock:
+            previous = self._last_bands
+            rose = np.flatnonzero((previous != UNKNOWN_BAND) & (current > previous))
+            index = self.index
+            for i, aqi, low, high in zip(rose.tolist(), values[rose].tolist(), previous[rose].tolist(), current[rose].tolist()):
+                cell = cells[i]
+                for band in range(low + 1, high + 1):
+                    users = index.get((cell, band))
+                    if users:
+                        alerts.append((tuple(users), aqi, band))
+            self._last_bands = current
+            self.evaluations += 1
+            self.alerts += sum(len(users) for users, _, _ in alerts)
+            self.last_match_ms = (time.perf_counter() - started) * 1000
+        return alerts
+
+    def stats(self):
+        return {
+            "subscribers": len(self.profiles),
+            "cells": len(self.cell_users),
+            "index_keys": len(self.index),
+            "evaluations": self.evaluations,
+            "alerts": self.alerts,
+            "last_match_ms": round(self.last_match_ms, 3)
+        }
+
+class AlertEngine:
+    """
+    Every tick, if this process holds the alert lease, applies the
+    store's profile changes to the index, runs SubscriptionIndex.evaluate
+    and hands the alerts to deliver(alerts), e.g. to queue notifications
+    """
+
+    def __init__(self, store, subscriptions: SubscriptionIndex, deliver, tick: float = ALERT_TICK_SECONDS):
+        self.store = store
+        self.subscriptions = subscriptions
+        self.deliver = deliver
+        self.tick = tick
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        self.synced = 0
+        self.ticks = 0
+        self._task = None
+
+    def sync(self):
+        """
+        Apply profile writes and deletions made since the last sync
+        """
+        while True:
+            changes = self.store.changes(self.synced)
+            if not changes:
+                return
+            for seq, user_id, record in changes:
+                if record is None:
+                    self.subscriptions.remove(user_id)
+                else:
+                    self.subscriptions.add(record)
+                self.synced = seq
+
+    def run_once(self):
+        """
+        One tick; returns the alerts, empty when another process leads
+        """
+        if not self.store.acquire_lease(ALERT_LEASE, self.owner, self.tick * 3):
+            if self.leader:
+                # Lost the lease, the new leader rebuilds from the store
+                self.subscriptions.clear()
+                self.synced = 0
+                self.leader = False
+            return []
+        self.leader = True
+        self.sync()
+        return self.subscriptions.evaluate()
+
+    async def run_forever(self):
+        while True:
+            alerts = await asyncio.to_thread(self.run_once)
+            if alerts:
+                await asyncio.to_thread(self.deliver, alerts)
+            self.ticks += 1
+            await asyncio.sleep(self.tick)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.leader:
+            await asyncio.to_thread(self.store.release_lease, ALERT_LEASE, self.owner)
+            self.leader = False
+
+    def stats(self):
+        return {**self.subscriptions.stats(), "leader": self.leader, "ticks": self.ticks, "tick_seconds": self.tick}
@@ -0,0 +1,160 @@
+"""
+Fetcher and Ingestor against stub sources served by httpx.MockTransport
+"""
+import asyncio
+import json
+
+import httpx
+import numpy as np
+
+from ingest import Fetcher, Ingestor, Source, StationStore
+
+CSV_FIELDS = {"station_id": "id", "name": "station", "lat": "latitude", "lon": "longitude", "aqi": "aqi"}
+CSV_BODY = "id,station,latitude,longitude,aqi\n1,Anand Vihar,28.65,77.31,310\n2,ITO,28.63,77.24,250\n"
+
+def csv_source(name: str = "csv"):
+    return Source(name, f"http://stub/{name}.csv", format="csv", fields=CSV_FIELDS)
+
+def test_retries_after_server_error():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, text=CSV_BODY)
+
+    async def run():
+        fetcher = Fetcher(retries=2, backoff=0, transport=httpx.MockTransport(handler))
+        try:
+            return await fetcher.fetch(csv_source())
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(run()) == CSV_BODY.encode()
+    assert len(calls) == 2
+
+def test_not_modified_keeps_cached_readings():
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=CSV_BODY, headers={"ETag": '"v1"', "Last-Modified": "Fri, 16 Oct 2026 10:00:00 GMT"})
+
+    async def run():
+        store = StationStore()
+        rebuilds = []
+        ingestor = Ingestor([csv_source()], store, fetcher=Fetcher(backoff=0, transport=httpx.MockTransport(handler)))
+        ingestor.listeners.append(rebuilds.append)
+        try:
+            await ingestor.refresh()
+            first_update = store.updated_at
+            await ingestor.refresh()
+        finally:
+            await ingestor.stop()
+        return store, first_update, rebuilds, ingestor.errors
+
+    store, first_update, rebuilds, errors = asyncio.run(run())
+    assert seen_headers[1]["if-none-match"] == '"v1"'
+    assert seen_headers[1]["if-modified-since"] == "Fri, 16 Oct 2026 10:00:00 GMT"
+    assert len(store) == 2
+    assert store.updated_at == first_update
+    assert len(rebuilds) == 1
+    assert errors == {}
+
+def test_concurrency_is_capped():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, text=CSV_BODY)
+
+    async def run():
+        store = StationStore()
+        sources = [csv_source(f"source{i}") for i in range(10)]
+        ingestor = Ingestor(sources, store, fetcher=Fetcher(concurrency=3, transport=httpx.MockTransport(handler)))
+        try:
+            await ingestor.refresh()
+        finally:
+            await ingestor.stop()
+        return store
+
+    store = asyncio.run(run())
+    assert peak == 3
+    assert len(store) == 20
+
+def test_ingestor_merges_sources_into_store():
+    readings = {"aqi": 310}
+
+    def handler(request):
+        if request.url.path == "/csv.csv":
+            return httpx.Response(200, text=f"id,station,latitude,longitude,aqi\n1,Anand Vihar,28.65,77.31,{readings['aqi']}\n")
+        return httpx.Response(200, json={"data": [
+            {"id": "A", "station": "Bandra", "lat": 19.06, "lon": 72.84, "aqi": 120, "pm2_5": 48.5},
+            {"id": "B", "station": "missing position", "aqi": 90}
+        ]})
+
+    json_source = Source("json", "http://stub/stations.json", records_path="data", fields={"station_id": "id", "name": "station", "pm25": "pm2_5"})
+
+    async def run():
+        store = StationStore()
+        ingestor = Ingestor([csv_source(), json_source], store, fetcher=Fetcher(transport=httpx.MockTransport(handler)))
+        try:
+            await ingestor.refresh()
+            before = dict(zip(store.columns["station_id"], store.columns["aqi"]))
+            readings["aqi"] = 280
+            await ingestor.refresh()
+        finally:
+            await ingestor.stop()
+        return store, before
+
+    store, before = asyncio.run(run())
+    assert before == {"csv:1": 310, "json:A": 120}
+    assert sorted(store.columns["station_id"]) == ["csv:1", "json:A"]
+    assert dict(zip(store.columns["station_id"], store.columns["aqi"]))["csv:1"] == 280
+
+    nearest = store.nearest(19.07, 72.85)
+    assert nearest["station_id"] == "json:A"
+    assert nearest["pollutants"] == {"pm25": 48.5}
+    assert np.isnan(store.columns["pm25"][list(store.columns["station_id"]).index("csv:1")])
+
+def test_silent_source_expires():
+    answering = {"json": True}
+
+    def handler(request):
+        if request.url.path == "/csv.csv":
+            return httpx.Response(200, text=CSV_BODY)
+        if not answering["json"]:
+            return httpx.Response(404)
+        return httpx.Response(200, json=[{"station_id": "A", "name": "Bandra", "lat": 19.06, "lon": 72.84, "aqi": 120}])
+
+    async def run():
+        store = StationStore()
+        rebuilds = []
+        sources = [csv_source(), Source("json", "http://stub/stations.json")]
+        ingestor = Ingestor(sources, store, fetcher=Fetcher(transport=httpx.MockTransport(handler)), max_age=0.05)
+        ingestor.listeners.append(rebuilds.append)
+        try:
+            await ingestor.refresh()
+            before = len(store)
+            answering["json"] = False
+            await asyncio.sleep(0.1)
+            await ingestor.refresh()
+        finally:
+            await ingestor.stop()
+        return store, before, rebuilds, ingestor
+
+    store, before, rebuilds, ingestor = asyncio.run(run())
+    assert before == 3
+    assert sorted(store.columns["station_id"]) == ["csv:1", "csv:2"]
+    assert ingestor.expired == ["json"]
+    assert "json" in ingestor.errors
+    assert len(rebuilds) == 2
+    assert store.nearest(19.07, 72.85) is None
@@ -0,0 +1,244 @@
+"""
+AQI heatmap tiles for slippy maps (Leaflet, OSM z/x/y scheme).
+
+Each tile is 256x256 pixels in Web Mercator. The pixel centres of a tile
+are one column of latitudes and one row of longitudes, so the whole tile
+is a single broadcast bilinear sample of the gridded AQI field. Pixels
+are coloured by AQI category and written as a palette PNG (one byte per
+pixel, zlib from the standard library).
+
+Rendered tiles are kept in an in-memory LRU and on disk under the field
+version they were rendered from. A new version (new station snapshot or
+next update tick) clears the memory LRU; older versions on disk are
+removed once no worker has written to them for a while. ETags are
+content hashes, so an unchanged tile still revalidates after a version
+change.
+"""
+import hashlib
+import os
+import shutil
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import Response
+
+from bands import AQI_CATEGORIES
+
+TILE_SIZE = 256
+MIN_ZOOM = 0
+MAX_ZOOM = 12
+TILE_ALPHA = 170  # overlay translucency; the map draws the layer at full opacity
+MEMORY_TILES = 2048
+DISK_RETENTION_SECONDS = 900  # other workers may still serve an older version
+TILE_DIR = os.environ.get("AQI_TILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiles"))
+
+def _rgba(color: str, alpha: int):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5)) + (alpha,)
+
+# Palette index 0 is transparent (no data), then one entry per AQI category
+PALETTE = [(0, 0, 0, 0)] + [_rgba(band["color"], TILE_ALPHA) for band in AQI_CATEGORIES.bands]
+
+def tile_bounds(z: int, x: int, y: int):
+    """
+    (north, south, west, east) in degrees
+    """
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return float(north), float(south), west, east
+
+def pixel_centres(z: int, x: int, y: int, size: int = TILE_SIZE):
+    """
+    Latitudes (one per pixel row) and longitudes (one per column)
+    """
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lats, lons
+
+def encode_png(indexes: np.ndarray, palette):
+    """
+    8-bit palette PNG with per-entry alpha (tRNS)
+    """
+    height, width = indexes.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = indexes
+
+    def chunk(kind: bytes, data: bytes):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)),
+        chunk(b"PLTE", bytes(channel for color in palette for channel in color[:3])),
+        chunk(b"tRNS", bytes(color[3] for color in palette)),
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        chunk(b"IEND", b"")
+    ])
+
+def render_tile(grid, z: int, x: int, y: int, size: int = TILE_SIZE):
+    """
+    PNG bytes for one tile sampled from an AQIGrid
+    """
+    lats, lons = pixel_centres(z, x, y, size)
+    values = grid.sample(lats[:, None], lons[None, :])
+    indexes = np.where(np.isnan(values), 0, AQI_CATEGORIES.indexes(np.nan_to_num(values)) + 1)
+    return encode_png(indexes.astype(np.uint8), PALETTE)
+
+def etag_for(png: bytes):
+    return hashlib.sha1(png).hexdigest()[:20]
+
+class TileCache:
+    """
+    LRU of (png, etag) in memory backed by TILE_DIR/<version>/z/x/y.png.
+    Switching to a new version clears memory and removes stale versions
+    from disk.
+    """
+
+    def __init__(self, directory: str = TILE_DIR, max_entries: int = MEMORY_TILES, retention: float = DISK_RETENTION_SECONDS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.retention = retention
+        self.version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, version: str, z: int, x: int, y: int):
+        return os.path.join(self.directory, version, str(z), str(x), f"{y}.png")
+
+    def set_version(self, version: str):
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+        if os.path.isdir(self.directory):
+            cutoff = time.time() - self.retention
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name != version and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def peek(self, version: str, z: int, x: int, y: int):
+        """
+        Entry from memory only, never touching disk
+        """
+        key = (version, z, x, y)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def get(self, version: str, z: int, x: int, y: int):
+        key = (version, z, x, y)
+        entry = self.peek(version, z, x, y)
+        if entry is not None:
+            return entry
+        path = self._path(version, z, x, y)
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        entry = (png, etag_for(png))
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, entry)
+        return entry
+
+    def put(self, version: str, z: int, x: int, y: int, png: bytes):
+        entry = (png, etag_for(png))
+        self._remember((version, z, x, y), entry)
+        path = self._path(version, z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, path)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if key[0] != self.version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+class TileLayer:
+    """
+    build_grid() returns the AQIGrid for the current field version; it is
+    called once per version and the grid reused for every tile.
+    """
+
+    def __init__(self, build_grid, cache: TileCache = None):
+        self.build_grid = build_grid
+        self.cache = cache if cache is not None else TileCache()
+        self.grid = None
+        self.grid_version = None
+        self._build_lock = threading.Lock()
+
+    def grid_for(self, version: str):
+        """
+        The grid for a version, built on first use
+        """
+        with self._build_lock:
+            if self.grid_version != version:
+                self.grid = self.build_grid()
+                self.grid_version = version
+                self.cache.set_version(version)
+            return self.grid
+
+    def cached(self, version: str, z: int, x: int, y: int):
+        """
+        (png, etag) when the tile is in memory; disk reads and renders go
+        through tile()
+        """
+        if self.cache.version != version:
+            return None
+        return self.cache.peek(version, z, x, y)
+
+    def tile(self, version: str, z: int, x: int, y: int):
+        """
+        (png, etag), rendered at most once per version
+        """
+        grid = self.grid_for(version)
+        entry = self.cache.get(version, z, x, y)
+        if entry is None:
+            entry = self.cache.put(version, z, x, y, render_tile(grid, z, x, y))
+        return entry
+
+def tile_response(png: bytes, etag: str, max_age: int, if_none_match: str = None):
+    """
+    PNG tile with a strong ETag, cacheable until the next update tick
+    """
+    etag = f'"{etag}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max(int(max_age), 0)}"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=png, media_type="image/png", headers=headers)
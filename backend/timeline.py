@@ -0,0 +1,64 @@
+"""
+Complaint status lifecycle.
+
+Status changes are stored as events; the complaint's current status is
+a materialized copy of the last one. Time-based transitions follow
+TRANSITIONS and are applied in bulk by the store's advance() from a
+periodic scheduler, so reading a status never computes or writes.
+"""
+from datetime import datetime, timedelta
+
+# (status, hours after filing when it is reached, message, authority)
+TRANSITIONS = (
+    ("SUBMITTED", 0, "Complaint received and registered", "Air Justice System"),
+    ("UNDER_REVIEW", 2, "Under initial review by authorities", "NGT Registry"),
+    ("INVESTIGATION_STARTED", 24, "Field investigation initiated", "CPCB Field Team"),
+    ("ACTION_TAKEN", 48, "Corrective actions being implemented", "Local Pollution Board"),
+    ("RESOLVED", 72, "Complaint resolved successfully", "All Concerned Authorities")
+)
+STATUS_SEQUENCE = tuple(status for status, _, _, _ in TRANSITIONS)
+STATUS_OFFSETS = {status: timedelta(hours=hours) for status, hours, _, _ in TRANSITIONS}
+STATUS_MESSAGES = {status: (message, authority) for status, _, message, authority in TRANSITIONS}
+
+NEXT_MILESTONES = {
+    "SUBMITTED": "Authority acknowledgment within 24 hours",
+    "UNDER_REVIEW": "Investigation start within 48 hours",
+    "INVESTIGATION_STARTED": "Corrective actions within 7 days",
+    "ACTION_TAKEN": "Resolution confirmation within 30 days",
+    "RESOLVED": "Case closed successfully"
+}
+
+def next_due(status: str, filed_at: str):
+    """
+    Epoch seconds at which the status after this one is reached, None
+    once the sequence is complete or for statuses outside it
+    """
+    if status not in STATUS_OFFSETS:
+        return None
+    position = STATUS_SEQUENCE.index(status)
+    if position + 1 == len(STATUS_SEQUENCE):
+        return None
+    return (datetime.fromisoformat(filed_at) + STATUS_OFFSETS[STATUS_SEQUENCE[position + 1]]).timestamp()
+
+def due_events(status: str, filed_at: str, now: float):
+    """
+    Every transition from status that is due by now, as (status, at)
+    events stamped with the time they were due
+    """
+    filed = datetime.fromisoformat(filed_at)
+    events = []
+    if status not in STATUS_OFFSETS:
+        return events
+    for following in STATUS_SEQUENCE[STATUS_SEQUENCE.index(status) + 1:]:
+        at = filed + STATUS_OFFSETS[following]
+        if at.timestamp() > now:
+            break
+        events.append((following, at.isoformat()))
+    return events
+
+def status_update(status: str, at: str):
+    """
+    One timeline entry as served by /complaint/status
+    """
+    message, authority = STATUS_MESSAGES.get(status, ("Status update", "System"))
+    return {"timestamp": at, "status": status, "message": message, "authority": authority}
@@ -0,0 +1,117 @@
+"""
+Registered user profiles.
+
+UserStore keeps profiles in a SQLite file (WAL mode) shared by every
+worker process, so a user registered on one worker is visible on all of
+them and survives restarts. Every write takes the next sequence number
+and deletions leave a tombstone, so the alert engine can follow changes
+with changes(after) instead of re-reading the table.
+
+The file also holds named leases, used to let exactly one process run
+the alert tick.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "users.db")
+CHANGES_BATCH = 10000
+
+class UserStore:
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                record TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_users_seq ON users (seq);
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def _write(self, user_id: str, deleted: int, record):
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO users (id, seq, deleted, record) "
+                "VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM users), ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, deleted = excluded.deleted, record = excluded.record "
+                "WHERE ? = 0 OR users.deleted = 0",
+                (user_id, deleted, record, deleted)
+            ).rowcount
+
+    def put(self, record: dict):
+        self._write(record["id"], 0, json.dumps(record))
+
+    def delete(self, user_id: str):
+        """
+        Tombstone a profile; False if there was none
+        """
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM users WHERE id = ? AND deleted = 0", (user_id,)
+            ).fetchone()
+        if exists is None:
+            return False
+        self._write(user_id, 1, None)
+        return True
+
+    def get(self, user_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM users WHERE id = ? AND deleted = 0", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def changes(self, after: int = 0, limit: int = CHANGES_BATCH):
+        """
+        (seq, user id, record or None when deleted) written after seq
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, id, record FROM users WHERE seq > ? ORDER BY seq LIMIT ?", (after, limit)
+            ).fetchall()
+        return [(seq, user_id, json.loads(record) if record is not None else None) for seq, user_id, record in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users WHERE deleted = 0").fetchone()[0]
+
+    def acquire_lease(self, name: str, owner: str, ttl: float):
+        """
+        Take or renew the named lease for ttl seconds; False while
+        another owner holds it
+        """
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now)
+            ).rowcount == 1
+
+    def release_lease(self, name: str, owner: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def close(self):
+        self._conn.close()
+
+def create_user_store():
+    """
+    Store at AQI_USER_DB (":memory:" keeps users in this process only)
+    """
+    return UserStore(os.environ.get("AQI_USER_DB", DEFAULT_DB_PATH))
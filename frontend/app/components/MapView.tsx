@@ -163,7 +163,13 @@ export default function MapView({ location, aqi }: MapViewProps) {
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
           attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
         />
-        
+
+        {/* AQI heatmap overlay */}
+        <TileLayer
+          url={`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/aqi/tiles/{z}/{x}/{y}.png`}
+          maxNativeZoom={12}
+        />
+
         {/* Pollution effect circle around user */}
         <Circle
           center={[location.lat, location.lon]}